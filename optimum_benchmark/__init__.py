@@ -1,7 +1,9 @@
 from .backends import (
     BackendConfig,
+    EchoConfig,
     IPEXConfig,
     LlamaCppConfig,
+    OpenAIConfig,
     ORTConfig,
     OVConfig,
     PyTorchConfig,
@@ -13,24 +15,42 @@ from .backends import (
 from .benchmark.base import Benchmark
 from .benchmark.config import BenchmarkConfig
 from .benchmark.report import BenchmarkReport
+from .benchmark.store import BenchmarkStore
+from .hub_utils import HubOutbox
 from .launchers import InlineConfig, LauncherConfig, ProcessConfig, TorchrunConfig
-from .scenarios import EnergyStarConfig, InferenceConfig, ScenarioConfig, TrainingConfig
+from .scenarios import (
+    EnergyStarConfig,
+    InferenceConfig,
+    LongContextConfig,
+    PipelineConfig,
+    ProcessorConfig,
+    ProfilingConfig,
+    ScenarioConfig,
+    TrainingConfig,
+)
 
 __all__ = [
     "BackendConfig",
     "Benchmark",
     "BenchmarkConfig",
     "BenchmarkReport",
+    "BenchmarkStore",
     "EnergyStarConfig",
+    "HubOutbox",
     "InferenceConfig",
     "IPEXConfig",
     "InlineConfig",
     "LauncherConfig",
+    "LongContextConfig",
     "ORTConfig",
     "OVConfig",
+    "PipelineConfig",
     "ProcessConfig",
+    "ProcessorConfig",
+    "ProfilingConfig",
     "PyTorchConfig",
     "PyTXIConfig",
+    "OpenAIConfig",
     "ScenarioConfig",
     "TorchORTConfig",
     "TorchrunConfig",
@@ -38,4 +58,5 @@ __all__ = [
     "TRTLLMConfig",
     "VLLMConfig",
     "LlamaCppConfig",
+    "EchoConfig",
 ]
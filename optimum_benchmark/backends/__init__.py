@@ -1,7 +1,9 @@
 from .config import BackendConfig
+from .echo.config import EchoConfig
 from .ipex.config import IPEXConfig
 from .llama_cpp.config import LlamaCppConfig
 from .onnxruntime.config import ORTConfig
+from .openai.config import OpenAIConfig
 from .openvino.config import OVConfig
 from .py_txi.config import PyTXIConfig
 from .pytorch.config import PyTorchConfig
@@ -17,7 +19,9 @@ __all__ = [
     "TorchORTConfig",
     "TRTLLMConfig",
     "PyTXIConfig",
+    "OpenAIConfig",
     "BackendConfig",
     "VLLMConfig",
     "LlamaCppConfig",
+    "EchoConfig",
 ]
@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+import torch
+
+from ..base import Backend
+from .config import EchoConfig
+
+
+class EchoBackend(Backend[EchoConfig]):
+    """
+    A backend without a model, whose methods return (an echo of) their inputs after a configurable synthetic
+    latency, while calling the logits processors and step callbacks passed to them like a real model would.
+    Benchmarking it measures the overhead of the harness itself (trackers, measurement loops, inputs preparation).
+    """
+
+    NAME: str = "echo"
+
+    def __init__(self, config: EchoConfig) -> None:
+        super().__init__(config)
+
+    def load(self) -> None:
+        self.logger.info("\t+ Echo backend has no model to load")
+        self.pretrained_model = None
+
+    def wait(self, latency: float) -> None:
+        if latency <= 0:
+            return
+
+        if self.config.busy_wait:
+            end = time.perf_counter() + latency
+            while time.perf_counter() < end:
+                pass
+        else:
+            time.sleep(latency)
+
+    def forward(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> OrderedDict:
+        self.wait(self.config.forward_latency)
+
+        return OrderedDict(inputs)
+
+    def prefill(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> torch.Tensor:
+        return self.generate(inputs, kwargs)
+
+    def generate(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> torch.Tensor:
+        input_ids = inputs["input_ids"]
+        logits_processor = kwargs.get("logits_processor", None)
+
+        for token in range(kwargs.get("max_new_tokens", 1)):
+            self.wait(self.config.forward_latency if token == 0 else self.config.per_token_latency)
+
+            if logits_processor is not None:
+                logits_processor(input_ids, None)
+
+        return torch.cat([input_ids, input_ids.new_zeros((input_ids.shape[0], kwargs.get("max_new_tokens", 1)))], dim=1)
+
+    def call(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> OrderedDict:
+        callback_on_step_end = kwargs.get("callback_on_step_end", None)
+
+        for step in range(kwargs.get("num_inference_steps", 1)):
+            self.wait(self.config.forward_latency)
+
+            if callback_on_step_end is not None:
+                callback_on_step_end(None, step, None, {})
+
+        return OrderedDict(inputs)
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from ...import_utils import optimum_benchmark_version
+from ..config import BackendConfig
+
+
+@dataclass
+class EchoConfig(BackendConfig):
+    name: str = "echo"
+    version: Optional[str] = optimum_benchmark_version()
+    _target_: str = "optimum_benchmark.backends.echo.backend.EchoBackend"
+
+    # synthetic latencies, in seconds
+    forward_latency: float = 0.0  # of a forward pass, a prefill or a diffusion step
+    per_token_latency: float = 0.0  # of each decoded token after the first one
+    # spin on the performance counter instead of sleeping, for sub-millisecond latencies
+    busy_wait: bool = False
+
+    def __post_init__(self):
+        super().__post_init__()
+
+        if self.forward_latency < 0 or self.per_token_latency < 0:
+            raise ValueError("`forward_latency` and `per_token_latency` must be greater than or equal to 0.")
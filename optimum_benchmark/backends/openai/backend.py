@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+from ...task_utils import TEXT_EMBEDDING_TASKS
+from ..base import Backend
+from ..streaming_utils import stream_batch
+from .config import OpenAIConfig
+
+
+class OpenAIBackend(Backend[OpenAIConfig]):
+    """
+    A client of an OpenAI-compatible API (`/v1/completions` and `/v1/embeddings`), e.g. an already deployed vLLM,
+    TGI or TEI endpoint. Requests are sent with an asynchronous HTTP client over a keep-alive connection pool, each
+    input of a batch as a concurrent request, and completions are streamed (server-sent events) so that the
+    per-token latency tracker of the inference scenario measures the time to first token and inter-token latencies.
+    """
+
+    NAME: str = "openai"
+
+    def __init__(self, config: OpenAIConfig) -> None:
+        super().__init__(config)
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.warned_about_early_stop = False
+
+    def load(self) -> None:
+        self.logger.info("\t+ Creating event loop")
+        self.loop = asyncio.new_event_loop()
+        self.logger.info(f"\t+ Creating client session with a pool of {self.config.max_connections} connections")
+        self.session = self.loop.run_until_complete(self.create_session())
+
+        self.logger.info(f"\t+ Checking that {self.config.base_url} serves {self.config.served_model_name}")
+        served_models = self.loop.run_until_complete(self.get_served_models())
+        if self.config.served_model_name not in served_models:
+            self.logger.warning(
+                f"\t+ {self.config.served_model_name} is not in the models served by the endpoint {served_models}, "
+                "the model name used in the requests can be set with `served_model_name`"
+            )
+
+        # the backend has no model in this process, memory tracking only measures the client
+        self.pretrained_model = None
+
+    async def create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.config.max_connections, keepalive_timeout=self.config.keepalive_timeout
+        )
+
+        headers = {}
+        if os.environ.get("OPENAI_API_KEY", None) is not None:
+            headers["Authorization"] = f"Bearer {os.environ['OPENAI_API_KEY']}"
+
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=self.config.request_timeout),
+            raise_for_status=True,
+        )
+
+    async def get_served_models(self) -> List[str]:
+        async with self.session.get(f"{self.config.base_url}/models") as response:
+            return [model["id"] for model in (await response.json())["data"]]
+
+    def __del__(self):
+        if getattr(self, "session", None) is not None and not self.loop.is_closed():
+            self.loop.run_until_complete(self.session.close())
+            self.loop.close()
+
+    def serves_in_waves(self, batch_size: int) -> bool:
+        # with fewer concurrent requests than inputs, a batch is served in several waves of requests
+        return self.config.max_concurrent_requests is not None and self.config.max_concurrent_requests < batch_size
+
+    def prepare_inputs(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        texts = self.pretrained_processor.batch_decode(inputs["input_ids"].tolist())
+
+        if self.config.task in TEXT_EMBEDDING_TASKS:
+            return {"input": texts}
+        else:
+            return {"prompt": texts}
+
+    def forward(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> List[List[float]]:
+        return self.loop.run_until_complete(self.embed(inputs["input"], kwargs))
+
+    def prefill(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> List[str]:
+        return self.loop.run_until_complete(self.complete(inputs["prompt"], kwargs))
+
+    def generate(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> List[str]:
+        return self.loop.run_until_complete(self.complete(inputs["prompt"], kwargs))
+
+    async def embed(self, texts: List[str], kwargs: Dict[str, Any]) -> List[List[float]]:
+        semaphore = asyncio.Semaphore(self.config.max_concurrent_requests or len(texts))
+
+        async def embed_text(text: str) -> List[float]:
+            body = {"model": self.config.served_model_name, "input": text, **self.config.extra_body}
+
+            async with semaphore, self.session.post(f"{self.config.base_url}/embeddings", json=body) as response:
+                return (await response.json())["data"][0]["embedding"]
+
+        return await asyncio.gather(*(embed_text(text) for text in texts))
+
+    async def complete(self, prompts: List[str], kwargs: Dict[str, Any]) -> List[str]:
+        async def stream_completion(prompt: str) -> AsyncIterator[str]:
+            body = {
+                "model": self.config.served_model_name,
+                "prompt": prompt,
+                "max_tokens": kwargs["max_new_tokens"],
+                "stream": True,
+                **({} if kwargs.get("do_sample", False) else {"temperature": 0.0}),
+                **self.config.extra_body,
+            }
+
+            async with self.session.post(f"{self.config.base_url}/completions", json=body) as response:
+                async for line in response.content:
+                    # server-sent events are `data: <json>` lines separated by blank lines, ending with `[DONE]`
+                    if not line.startswith(b"data:"):
+                        continue
+
+                    data = line[len(b"data:") :].strip()
+                    if data == b"[DONE]":
+                        break
+
+                    choices = json.loads(data)["choices"]
+                    # the last chunks may only carry the finish reason or the usage
+                    if choices and choices[0]["text"]:
+                        yield choices[0]["text"]
+
+        completions = await stream_batch(
+            prompts,
+            stream_completion,
+            max_in_flight_requests=self.config.max_concurrent_requests,
+            logits_processor=kwargs.get("logits_processor", None),
+            request_latency_tracker=kwargs.get("request_latency_tracker", None),
+        )
+
+        for chunks in completions:
+            if len(chunks) < kwargs["max_new_tokens"] and not self.warned_about_early_stop:
+                self.logger.warning(
+                    f"\t+ A generation stopped after {len(chunks)} chunks instead of {kwargs['max_new_tokens']} tokens, "
+                    'latencies and throughputs will be wrong, consider setting `extra_body={"ignore_eos": true}`'
+                )
+                self.warned_about_early_stop = True
+
+        return ["".join(chunks) for chunks in completions]
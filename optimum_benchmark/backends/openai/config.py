@@ -0,0 +1,59 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from ...import_utils import aiohttp_version, is_aiohttp_available
+from ...task_utils import TEXT_EMBEDDING_TASKS
+from ..config import BackendConfig
+
+
+@dataclass
+class OpenAIConfig(BackendConfig):
+    name: str = "openai"
+    version: Optional[str] = aiohttp_version()
+    _target_: str = "optimum_benchmark.backends.openai.backend.OpenAIBackend"
+
+    # Base URL of the OpenAI-compatible API e.g. "http://localhost:8000/v1",
+    # the API key (if any) is read from the OPENAI_API_KEY environment variable so that it's never saved
+    base_url: Optional[str] = None
+    # Name of the model in the requests, defaults to `model` (which is used for the tokenizer and input shapes)
+    served_model_name: Optional[str] = None
+
+    # Keep-alive connection pool
+    max_connections: int = 100
+    keepalive_timeout: float = 60.0
+    # Timeout of a whole request (including its streamed response), in seconds
+    request_timeout: Optional[float] = None
+    # Each input of a batch is sent as a request, this limits the requests in flight (defaults to the batch size),
+    # below the batch size the batch is served in waves and the generation latencies are reported per request
+    max_concurrent_requests: Optional[int] = None
+
+    # Extra parameters added to the body of every request, e.g. {"ignore_eos": true} for vLLM or TGI,
+    # so that generations aren't stopped before `max_new_tokens`
+    extra_body: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        super().__post_init__()
+
+        if not is_aiohttp_available():
+            raise ValueError(
+                "The library aiohttp is required to send requests to an OpenAI-compatible API, but is not installed. "
+                "Please install it through `pip install optimum-benchmark[openai]` or `pip install aiohttp`."
+            )
+
+        if self.base_url is None:
+            raise ValueError("`base_url` must be specified, e.g. http://localhost:8000/v1")
+
+        # prompts are decoded from text inputs and sent to the completions or embeddings endpoints
+        if self.task not in ["text-generation"] + TEXT_EMBEDDING_TASKS:
+            raise NotImplementedError(f"OpenAI-compatible API does not support task {self.task}")
+
+        if self.max_connections < 1:
+            raise ValueError(f"`max_connections` must be at least 1, but got {self.max_connections}")
+
+        if self.max_concurrent_requests is not None and self.max_concurrent_requests < 1:
+            raise ValueError(f"`max_concurrent_requests` must be at least 1, but got {self.max_concurrent_requests}")
+
+        self.base_url = self.base_url.rstrip("/")
+
+        if self.served_model_name is None:
+            self.served_model_name = self.model
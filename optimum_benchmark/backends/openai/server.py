@@ -0,0 +1,141 @@
+import asyncio
+import json
+import threading
+import time
+from logging import getLogger
+from typing import Optional
+
+from aiohttp import web
+
+LOGGER = getLogger("openai-stand-in")
+
+
+class OpenAIStandInServer:
+    """
+    A local stand-in for an OpenAI-compatible server, serving `/v1/models`, `/v1/completions` (streamed or not, one
+    prompt per request) and `/v1/embeddings` with synthetic latencies and outputs, from an event loop in a
+    background thread. It's meant for testing the `openai` backend without deploying a model:
+
+    ```python
+    with OpenAIStandInServer(model="gpt2", per_token_latency=0.01) as server:
+        backend_config = OpenAIConfig(model="gpt2", base_url=server.url)
+    ```
+    """
+
+    def __init__(
+        self,
+        model: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        first_token_latency: float = 0.0,
+        per_token_latency: float = 0.0,
+        embedding_dim: int = 8,
+    ):
+        self.model = model
+        self.host = host
+        self.port = port
+        self.first_token_latency = first_token_latency
+        self.per_token_latency = per_token_latency
+        self.embedding_dim = embedding_dim
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.runner: Optional[web.AppRunner] = None
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/v1/models", self.models)
+        app.router.add_post("/v1/completions", self.completions)
+        app.router.add_post("/v1/embeddings", self.embeddings)
+
+        self.loop = asyncio.new_event_loop()
+        self.runner = web.AppRunner(app)
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+        asyncio.run_coroutine_threadsafe(self.serve(), self.loop).result()
+        LOGGER.info(f"\t+ Serving {self.model} at {self.url}")
+
+    async def serve(self) -> None:
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        # the port is picked by the system when it's 0
+        self.port = self.runner.addresses[0][1]
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def __enter__(self) -> "OpenAIStandInServer":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    async def models(self, request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": [{"id": self.model, "object": "model"}]})
+
+    def check_model(self, body: dict) -> None:
+        if body.get("model") != self.model:
+            raise web.HTTPNotFound(text=f"The model {body.get('model')} does not exist")
+
+    async def completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.check_model(body)
+
+        if not isinstance(body.get("prompt"), str):
+            raise web.HTTPBadRequest(text="The stand-in server only supports one prompt per request")
+
+        max_tokens = body.get("max_tokens", 16)
+
+        def completion(text: str, finish_reason: Optional[str] = None) -> dict:
+            return {
+                "id": "cmpl-stand-in",
+                "object": "text_completion",
+                "created": int(time.time()),
+                "model": self.model,
+                "choices": [{"index": 0, "text": text, "logprobs": None, "finish_reason": finish_reason}],
+            }
+
+        if not body.get("stream", False):
+            await asyncio.sleep(self.first_token_latency + (max_tokens - 1) * self.per_token_latency)
+            return web.json_response(completion(" token" * max_tokens, finish_reason="length"))
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        for token in range(max_tokens):
+            await asyncio.sleep(self.first_token_latency if token == 0 else self.per_token_latency)
+            await response.write(f"data: {json.dumps(completion(' token'))}\n\n".encode())
+
+        await response.write(f"data: {json.dumps(completion('', finish_reason='length'))}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+
+        return response
+
+    async def embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.check_model(body)
+
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+
+        await asyncio.sleep(self.first_token_latency)
+
+        return web.json_response(
+            {
+                "object": "list",
+                "model": self.model,
+                "data": [
+                    {"object": "embedding", "index": index, "embedding": [0.0] * self.embedding_dim}
+                    for index in range(len(inputs))
+                ],
+            }
+        )
@@ -1,15 +1,18 @@
+import asyncio
 import shutil
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Any, Dict, List, Union
+from typing import Any, AsyncIterator, Dict, List, Union
 
+import numpy as np
 import torch
-from huggingface_hub import hf_hub_download, snapshot_download
+from huggingface_hub import AsyncInferenceClient, hf_hub_download, snapshot_download
 from py_txi import TEI, TGI, TEIConfig, TGIConfig
 from safetensors.torch import save_model
 
 from ...task_utils import TEXT_EMBEDDING_TASKS, TEXT_GENERATION_TASKS
 from ..base import Backend
+from ..streaming_utils import stream_batch
 from ..transformers_utils import fast_weights_init
 from .config import PyTXIConfig
 
@@ -41,6 +44,16 @@ class PyTXIBackend(Backend[PyTXIConfig]):
         except Exception:
             shutil.rmtree(self.tmpdir.name, ignore_errors=True)
 
+        self.logger.info("\t+ Creating asynchronous client and event loop")
+        # requests are sent by the backend (instead of the server's own client) to control their concurrency
+        self.loop = asyncio.new_event_loop()
+        self.client = AsyncInferenceClient(model=self.pretrained_model.url)
+
+    def __del__(self):
+        if getattr(self, "client", None) is not None and not self.loop.is_closed():
+            self.loop.run_until_complete(self.client.close())
+            self.loop.close()
+
     def download_pretrained_model(self) -> None:
         model_snapshot_folder = snapshot_download(self.config.model, **self.config.model_kwargs)
 
@@ -168,6 +181,10 @@ class PyTXIBackend(Backend[PyTXIConfig]):
 
         return kwargs
 
+    def serves_in_waves(self, batch_size: int) -> bool:
+        # with fewer concurrent requests than inputs, a batch is served in several waves of requests
+        return self.config.max_in_flight_requests is not None and self.config.max_in_flight_requests < batch_size
+
     def prepare_inputs(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         if self.config.task in TEXT_GENERATION_TASKS:
             inputs = {"prompt": self.pretrained_processor.batch_decode(inputs["input_ids"].tolist())}
@@ -178,19 +195,42 @@ class PyTXIBackend(Backend[PyTXIConfig]):
 
         return inputs
 
-    def forward(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> List[str]:
-        return self.pretrained_model.encode(**inputs, **kwargs)
+    def forward(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> List[np.ndarray]:
+        return self.loop.run_until_complete(self.encode(inputs["text"], kwargs))
 
-    def prefill(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> Dict[str, Any]:
-        return self.pretrained_model.generate(
-            **inputs,
-            do_sample=kwargs.get("do_sample", False),
-            max_new_tokens=kwargs.get("max_new_tokens"),
-        )
+    def prefill(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> List[str]:
+        return self.loop.run_until_complete(self.stream_generate(inputs["prompt"], kwargs))
 
     def generate(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> List[str]:
-        return self.pretrained_model.generate(
-            **inputs,
-            do_sample=kwargs.get("do_sample", False),
-            max_new_tokens=kwargs.get("max_new_tokens"),
+        return self.loop.run_until_complete(self.stream_generate(inputs["prompt"], kwargs))
+
+    async def encode(self, texts: List[str], kwargs: Dict[str, Any]) -> List[np.ndarray]:
+        semaphore = asyncio.Semaphore(self.config.max_in_flight_requests or len(texts))
+
+        async def encode_text(text: str) -> np.ndarray:
+            async with semaphore:
+                return await self.client.feature_extraction(text, **kwargs)
+
+        return await asyncio.gather(*(encode_text(text) for text in texts))
+
+    async def stream_generate(self, prompts: List[str], kwargs: Dict[str, Any]) -> List[str]:
+        async def stream_tokens(prompt: str) -> AsyncIterator[str]:
+            stream = await self.client.text_generation(
+                prompt,
+                stream=True,
+                do_sample=kwargs.get("do_sample", False),
+                max_new_tokens=kwargs.get("max_new_tokens"),
+            )
+            async for token in stream:
+                yield token
+
+        generations = await stream_batch(
+            prompts,
+            stream_tokens,
+            # the scenario overrides the limit of the config to sweep the concurrency levels
+            max_in_flight_requests=kwargs.get("max_in_flight_requests", self.config.max_in_flight_requests),
+            logits_processor=kwargs.get("logits_processor", None),
+            request_latency_tracker=kwargs.get("request_latency_tracker", None),
         )
+
+        return ["".join(tokens) for tokens in generations]
@@ -33,6 +33,13 @@ class PyTXIConfig(BackendConfig):
     connection_timeout: Optional[int] = None
     first_request_timeout: Optional[int] = None
     max_concurrent_requests: Optional[int] = None
+    # Client-side limit of the requests in flight, each input of a batch being a request (defaults to the batch size),
+    # unlike `max_concurrent_requests` it can be swept without changing the container's configuration,
+    # below the batch size the batch is served in waves and the generation latencies are reported per request
+    max_in_flight_requests: Optional[int] = None
+    # Client-side limits of the requests in flight swept against the same container after the other latency
+    # measurements, each level reported under its own `concurrency_<level>` targets (text generation only)
+    concurrency_levels: Optional[List[int]] = None
 
     # Common options
     dtype: Optional[str] = None
@@ -63,3 +70,12 @@ class PyTXIConfig(BackendConfig):
             self.devices = ["/dev/kfd"] + [f"/dev/dri/{renderDs[i]}" for i in ids]
 
         self.trust_remote_code = self.model_kwargs.get("trust_remote_code", None)
+
+        if self.max_in_flight_requests is not None and self.max_in_flight_requests < 1:
+            raise ValueError(f"`max_in_flight_requests` must be at least 1, but got {self.max_in_flight_requests}")
+
+        if self.concurrency_levels is not None:
+            if self.task not in TEXT_GENERATION_TASKS:
+                raise ValueError(f"`concurrency_levels` are only swept for text generation, not for task {self.task}")
+            if any(level < 1 for level in self.concurrency_levels):
+                raise ValueError(f"`concurrency_levels` must all be at least 1, but got {self.concurrency_levels}")
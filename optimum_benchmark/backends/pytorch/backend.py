@@ -1,7 +1,7 @@
 import os
 from collections import OrderedDict
 from tempfile import TemporaryDirectory
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
 import torch
 from accelerate import Accelerator, init_empty_weights, init_on_device
@@ -11,6 +11,7 @@ from transformers import (
     AwqConfig,
     BitsAndBytesConfig,
     GPTQConfig,
+    PreTrainedModel,
     TorchAoConfig,
     Trainer,
     TrainerCallback,
@@ -37,6 +38,8 @@ if is_zentorch_available():
 class PyTorchBackend(Backend[PyTorchConfig]):
     NAME = "pytorch"
 
+    assistant_model: Optional[PreTrainedModel] = None
+
     def __init__(self, config: PyTorchConfig):
         super().__init__(config)
 
@@ -194,6 +197,37 @@ class PyTorchBackend(Backend[PyTorchConfig]):
             else:
                 raise ValueError(f"Target {self.config.torch_compile_target} not supported")
 
+        # Assisted generation
+        if self.config.assistant_model is not None:
+            self.logger.info("\t+ Loading assistant model for assisted generation")
+            self.load_transformers_assistant_model()
+
+    def load_transformers_assistant_model(self) -> None:
+        # the assistant model is always loaded with its pretrained weights,
+        # random weights would make the acceptance rate meaningless
+        kwargs = {}
+
+        if self.config.torch_dtype is not None:
+            kwargs["torch_dtype"] = getattr(torch, self.config.torch_dtype)
+
+        if self.config.attn_implementation is not None:
+            kwargs["attn_implementation"] = self.config.attn_implementation
+
+        if self.config.device_map is not None:
+            kwargs["device_map"] = self.config.device_map
+
+        self.assistant_model = self.automodel_loader.from_pretrained(
+            pretrained_model_name_or_path=self.config.assistant_model, **self.config.assistant_model_kwargs, **kwargs
+        )
+
+        if self.config.device_map is None and self.config.device != "cpu":
+            self.logger.info(f"\t+ Moving assistant model to device: {self.config.device}")
+            self.assistant_model = self.assistant_model.to(self.config.device)
+
+        if self.config.eval_mode:
+            self.logger.info("\t+ Enabling eval mode for assistant model")
+            self.assistant_model.eval()
+
     def load_diffusers_pipeline_from_pretrained(self) -> None:
         self.pretrained_model = self.automodel_loader.from_pretrained(
             self.config.model,
@@ -408,6 +442,13 @@ class PyTorchBackend(Backend[PyTorchConfig]):
 
         return kwargs
 
+    @property
+    def assistant_kwargs(self) -> Dict[str, Any]:
+        if self.assistant_model is None:
+            return {}
+
+        return {"assistant_model": self.assistant_model}
+
     @property
     def split_between_processes(self) -> bool:
         return (
@@ -439,11 +480,11 @@ class PyTorchBackend(Backend[PyTorchConfig]):
         assert (
             kwargs.get("max_new_tokens") == kwargs.get("min_new_tokens") == 1
         ), "For prefilling, max_new_tokens and min_new_tokens must be equal to 1"
-        return self.pretrained_model.generate(**inputs, **kwargs)
+        return self.pretrained_model.generate(**inputs, **kwargs, **self.assistant_kwargs)
 
     @torch.inference_mode()
     def generate(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> OrderedDict:
-        return self.pretrained_model.generate(**inputs, **kwargs)
+        return self.pretrained_model.generate(**inputs, **kwargs, **self.assistant_kwargs)
 
     @torch.inference_mode()
     def call(self, inputs: Dict[str, Any], kwargs: Dict[str, Any]) -> OrderedDict:
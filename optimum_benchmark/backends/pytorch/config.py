@@ -51,6 +51,10 @@ class PyTorchConfig(BackendConfig):
     peft_type: Optional[str] = None
     peft_config: Dict[str, Any] = field(default_factory=dict)
 
+    # assisted generation options
+    assistant_model: Optional[str] = None
+    assistant_model_kwargs: Dict[str, Any] = field(default_factory=dict)
+
     def __post_init__(self):
         super().__post_init__()
 
@@ -66,6 +70,11 @@ class PyTorchConfig(BackendConfig):
         if self.torch_dtype is not None and self.torch_dtype not in TORCH_DTYPES:
             raise ValueError(f"`torch_dtype` must be one of {TORCH_DTYPES}. Got {self.torch_dtype} instead.")
 
+        if self.assistant_model is not None and self.library != "transformers":
+            raise ValueError(
+                f"`assistant_model` is only supported for Transformers models. Got {self.library} instead."
+            )
+
         if self.autocast_dtype is not None and self.autocast_dtype not in AMP_DTYPES:
             raise ValueError(f"`autocast_dtype` must be one of {AMP_DTYPES}. Got {self.autocast_dtype} instead.")
 
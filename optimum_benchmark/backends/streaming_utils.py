@@ -0,0 +1,81 @@
+import asyncio
+import time
+from typing import AsyncIterator, Callable, List, Optional
+
+
+class BatchStepCounter:
+    """
+    Calls a logits processor once per generation step of a batch of generations streamed by an inference server
+    (one request per input), like a local model's `generate` would, i.e. when every unfinished generation of the
+    batch has received its token of the step. Each streamed chunk is counted as a token. The steps are only those of
+    a batch when all of its requests are in flight at once, the counter isn't meant for a batch served in waves.
+    """
+
+    def __init__(self, batch_size: int, callback: Optional[Callable] = None):
+        self.callback = callback
+        self.num_steps = 0
+        # None once the generation is finished
+        self.num_tokens: List[Optional[int]] = [0] * batch_size
+
+    def add_token(self, index: int) -> None:
+        self.num_tokens[index] += 1
+        self.update()
+
+    def finish(self, index: int) -> None:
+        self.num_tokens[index] = None
+        self.update()
+
+    def update(self) -> None:
+        unfinished = [num_tokens for num_tokens in self.num_tokens if num_tokens is not None]
+
+        while unfinished and min(unfinished) > self.num_steps:
+            self.num_steps += 1
+
+            if self.callback is not None:
+                self.callback(None, None)
+
+
+async def stream_batch(
+    prompts: List[str],
+    stream_prompt: Callable[[str], AsyncIterator[str]],
+    max_in_flight_requests: Optional[int] = None,
+    logits_processor: Optional[Callable] = None,
+    request_latency_tracker: Optional[Callable] = None,
+) -> List[List[str]]:
+    """
+    Streams a batch of generations from an inference server, one request per prompt with at most
+    `max_in_flight_requests` of them in flight (defaults to the batch size), and returns the streamed chunks of each.
+    `stream_prompt` is the request itself, an async generator yielding the chunks of one prompt's generation.
+    The logits processor is called once per step of the batch and the request latency tracker once per request.
+    """
+
+    max_in_flight_requests = max_in_flight_requests or len(prompts)
+    semaphore = asyncio.Semaphore(max_in_flight_requests)
+    # the requests of a batch served in waves share no generation steps, so the per-token tracker isn't called
+    # and the scenario relies on the per-request records instead
+    is_served_in_waves = max_in_flight_requests < len(prompts)
+    step_counter = BatchStepCounter(len(prompts), callback=None if is_served_in_waves else logits_processor)
+
+    async def stream_request(index: int, prompt: str) -> List[str]:
+        chunks, first_token = [], None
+        async with semaphore:
+            # the time spent waiting for the semaphore is not part of the request
+            start = time.perf_counter()
+
+            async for chunk in stream_prompt(prompt):
+                if first_token is None:
+                    first_token = time.perf_counter()
+
+                chunks.append(chunk)
+                step_counter.add_token(index)
+
+            end = time.perf_counter()
+
+        step_counter.finish(index)
+
+        if request_latency_tracker is not None and first_token is not None:
+            request_latency_tracker(start, first_token, end, len(chunks))
+
+        return chunks
+
+    return await asyncio.gather(*(stream_request(index, prompt) for index, prompt in enumerate(prompts)))
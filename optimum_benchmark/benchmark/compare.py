@@ -0,0 +1,362 @@
+import argparse
+import hashlib
+import json
+import math
+import sys
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from huggingface_hub import HfApi
+
+from .base import Benchmark
+from .store import BenchmarkStore
+
+LOGGER = getLogger("compare")
+
+# the parts of the config that define what was benchmarked, the environment (machine, library versions and commits)
+# is left out so that runs of the same benchmark on different commits or days share the same config hash
+CONFIG_HASH_PREFIXES = ("backend.", "scenario.", "launcher.")
+CONFIG_HASH_EXCLUDED_KEYS = ("backend.version",)
+
+# the compared metrics of each measurement and whether a higher value is a regression
+COMPARED_METRICS = {
+    "latency": {"p50": True},
+    "throughput": {"value": False},
+    "memory": {
+        "max_ram": True,
+        "max_global_vram": True,
+        "max_process_vram": True,
+        "max_reserved": True,
+        "max_allocated": True,
+    },
+    "energy": {"total": True},
+    "efficiency": {"value": False},
+}
+
+Test_Literal = Literal["mann-whitney", "bootstrap"]
+
+
+@dataclass
+class BenchmarkRun:
+    """
+    A benchmark run as it is compared: its flat config and its flat report, in which the raw latency values
+    (e.g. `forward.latency.values`) are missing when the run was loaded from a results store.
+    """
+
+    config: Dict[str, Any]
+    report: Dict[str, Any]
+
+    @classmethod
+    def from_benchmark(cls, benchmark: Benchmark) -> "BenchmarkRun":
+        return cls(config=benchmark.config.to_dict(flat=True), report=benchmark.report.to_dict(flat=True))
+
+    @property
+    def name(self) -> str:
+        return self.config.get("name")
+
+    @property
+    def config_hash(self) -> str:
+        return get_config_hash(self.config)
+
+
+def get_config_hash(flat_config: Dict[str, Any]) -> str:
+    hashed_config = {
+        key: value
+        for key, value in flat_config.items()
+        if key.startswith(CONFIG_HASH_PREFIXES) and key not in CONFIG_HASH_EXCLUDED_KEYS
+    }
+    serialized_config = json.dumps(hashed_config, sort_keys=True, default=str)
+    return hashlib.sha256(serialized_config.encode("utf-8")).hexdigest()[:16]
+
+
+def index_runs(runs: List[BenchmarkRun]) -> Dict[str, BenchmarkRun]:
+    indexed_runs = {}
+
+    for run in runs:
+        if run.config_hash in indexed_runs:
+            LOGGER.warning(f"\t+ Found several runs of {run.name} ({run.config_hash}), keeping the first one")
+            continue
+
+        indexed_runs[run.config_hash] = run
+
+    return indexed_runs
+
+
+# LOADERS
+def load_runs_from_directory(path: Union[str, Path]) -> List[BenchmarkRun]:
+    return [
+        BenchmarkRun.from_benchmark(Benchmark.from_json(file)) for file in sorted(Path(path).rglob("benchmark.json"))
+    ]
+
+
+def load_runs_from_store(path: Union[str, Path], commit: Optional[str] = None) -> List[BenchmarkRun]:
+    store = BenchmarkStore(path)
+    # most recent first, so that only the latest run of each config is kept once indexed
+    benchmarks_df = store.query(commit=commit)
+
+    runs = []
+    for benchmark_id, row in benchmarks_df.iterrows():
+        report = {name: value for name, value in row.items() if "." in name and value == value}
+        runs.append(BenchmarkRun(config=store.get_config(benchmark_id), report=report))
+
+    return runs
+
+
+def load_runs_from_hub(repo_id: str, subfolder: Optional[str] = None, **kwargs) -> List[BenchmarkRun]:
+    repo_type = kwargs.pop("repo_type", "dataset")
+
+    files = HfApi().list_repo_files(repo_id, repo_type=repo_type, token=kwargs.get("token"))
+    files = [file for file in files if subfolder is None or file.startswith(f"{subfolder.rstrip('/')}/")]
+
+    runs = []
+    for file in sorted(files):
+        path = Path(file)
+        if path.name != Benchmark.default_filename:
+            continue
+
+        benchmark = Benchmark.from_pretrained(
+            repo_id, filename=path.name, subfolder=path.parent.as_posix(), repo_type=repo_type, **kwargs
+        )
+        runs.append(BenchmarkRun.from_benchmark(benchmark))
+
+    return runs
+
+
+def load_runs(source: str, commit: Optional[str] = None, **kwargs) -> List[BenchmarkRun]:
+    """
+    Loads the runs of a directory of benchmark results, of a results store (a file, filtered by `commit`),
+    or of a Hugging Face Hub repository (anything else).
+    """
+
+    if Path(source).is_dir():
+        runs = load_runs_from_directory(source)
+    elif Path(source).is_file():
+        runs = load_runs_from_store(source, commit=commit)
+    else:
+        runs = load_runs_from_hub(source, **kwargs)
+
+    if len(runs) == 0:
+        raise ValueError(f"No benchmark results found in {source}")
+
+    LOGGER.info(f"\t+ Loaded {len(runs)} runs from {source}")
+
+    return runs
+
+
+# STATISTICAL TESTS
+def mann_whitney_u_test(baseline: np.ndarray, candidate: np.ndarray) -> float:
+    """
+    Two-sided p-value of the Mann-Whitney U test, using the normal approximation with tie and continuity corrections,
+    which is accurate for the sample sizes of latency measurements (more than ~20 samples per run).
+    """
+
+    n1, n2 = len(baseline), len(candidate)
+    n = n1 + n2
+
+    samples = np.concatenate([baseline, candidate])
+    ranks = pd.Series(samples).rank(method="average").to_numpy()
+    u1 = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+
+    _, tie_counts = np.unique(samples, return_counts=True)
+    tie_term = (tie_counts**3 - tie_counts).sum() / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+
+    if sigma == 0:
+        # all the samples are equal
+        return 1.0
+
+    delta = u1 - n1 * n2 / 2
+    z = (abs(delta) - 0.5) / sigma
+    return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def bootstrap_median_test(
+    baseline: np.ndarray, candidate: np.ndarray, alpha: float, num_resamples: int = 2000, seed: int = 42
+) -> Tuple[float, float, float]:
+    """
+    Bootstrap confidence interval (at level `1 - alpha`) of the difference of medians (candidate - baseline),
+    and the two-sided p-value of a null difference, i.e. twice the share of resampled differences across zero.
+    """
+
+    rng = np.random.default_rng(seed)
+    baseline_medians = np.median(rng.choice(baseline, size=(num_resamples, len(baseline))), axis=1)
+    candidate_medians = np.median(rng.choice(candidate, size=(num_resamples, len(candidate))), axis=1)
+    differences = candidate_medians - baseline_medians
+
+    ci_low, ci_high = np.quantile(differences, [alpha / 2, 1 - alpha / 2])
+    p_value = min(1.0, 2 * min((differences <= 0).mean(), (differences >= 0).mean()))
+
+    return float(ci_low), float(ci_high), float(p_value)
+
+
+# COMPARISON
+def get_targets(report: Dict[str, Any]) -> List[str]:
+    targets = []
+    for key in report:
+        for measurement in COMPARED_METRICS:
+            if f".{measurement}." in key:
+                target = key.split(f".{measurement}.")[0]
+                if target not in targets:
+                    targets.append(target)
+
+    return targets
+
+
+def compare_latencies(
+    baseline: Optional[List[float]], candidate: Optional[List[float]], test: Test_Literal, alpha: float
+) -> Dict[str, Optional[float]]:
+    if not baseline or not candidate:
+        # runs loaded from a results store only have summary metrics
+        return {"p_value": None, "ci_low": None, "ci_high": None}
+
+    baseline, candidate = np.asarray(baseline, dtype=float), np.asarray(candidate, dtype=float)
+
+    if test == "mann-whitney":
+        return {"p_value": mann_whitney_u_test(baseline, candidate), "ci_low": None, "ci_high": None}
+    elif test == "bootstrap":
+        ci_low, ci_high, p_value = bootstrap_median_test(baseline, candidate, alpha)
+        return {"p_value": p_value, "ci_low": ci_low, "ci_high": ci_high}
+    else:
+        raise ValueError(f"Unknown statistical test {test}, expected one of 'mann-whitney' or 'bootstrap'")
+
+
+def compare_runs(
+    baseline: BenchmarkRun, candidate: BenchmarkRun, test: Test_Literal, alpha: float, threshold: float
+) -> List[Dict[str, Any]]:
+    rows = []
+
+    for target in get_targets(baseline.report):
+        latency_test = compare_latencies(
+            baseline.report.get(f"{target}.latency.values"),
+            candidate.report.get(f"{target}.latency.values"),
+            test=test,
+            alpha=alpha,
+        )
+
+        for measurement, metrics in COMPARED_METRICS.items():
+            for metric, higher_is_worse in metrics.items():
+                key = f"{target}.{measurement}.{metric}"
+                baseline_value, candidate_value = baseline.report.get(key), candidate.report.get(key)
+
+                if baseline_value is None or candidate_value is None:
+                    continue
+
+                change = (candidate_value - baseline_value) / baseline_value if baseline_value != 0 else 0.0
+                worse_change = change if higher_is_worse else -change
+
+                # throughput is derived from the latency samples, so it shares their test
+                statistics = latency_test if measurement in ("latency", "throughput") else {}
+                p_value = statistics.get("p_value")
+                significant = p_value is None or p_value < alpha
+
+                rows.append(
+                    {
+                        "config_hash": baseline.config_hash,
+                        "name": baseline.name,
+                        "target": target,
+                        "metric": f"{measurement}.{metric}",
+                        "baseline": baseline_value,
+                        "candidate": candidate_value,
+                        "change": change,
+                        "p_value": p_value,
+                        "ci_low": statistics.get("ci_low"),
+                        "ci_high": statistics.get("ci_high"),
+                        "regression": significant and worse_change > threshold,
+                        "improvement": significant and worse_change < -threshold,
+                    }
+                )
+
+    return rows
+
+
+def compare_benchmarks(
+    baseline: List[Union[Benchmark, BenchmarkRun]],
+    candidate: List[Union[Benchmark, BenchmarkRun]],
+    test: Test_Literal = "mann-whitney",
+    alpha: float = 0.01,
+    threshold: float = 0.05,
+) -> pd.DataFrame:
+    """
+    Matches the baseline and candidate runs by config hash and compares their latency, throughput, memory, energy
+    and efficiency metrics. A metric is flagged as a regression (or an improvement) when its relative change is worse
+    (or better) than `threshold` and, for latency and throughput, when the difference of the raw latency samples is
+    significant at level `alpha` (Mann-Whitney U test, or bootstrap confidence interval of the median difference).
+    """
+
+    if not 0 < alpha < 1:
+        raise ValueError(f"alpha must be between 0 and 1, got {alpha}")
+
+    if threshold < 0:
+        raise ValueError(f"threshold must be non-negative, got {threshold}")
+
+    baseline_runs = index_runs([to_run(run) for run in baseline])
+    candidate_runs = index_runs([to_run(run) for run in candidate])
+
+    unmatched = set(baseline_runs).symmetric_difference(candidate_runs)
+    if unmatched:
+        LOGGER.warning(f"\t+ {len(unmatched)} runs have no counterpart to be compared with, skipping them")
+
+    rows = []
+    for config_hash, baseline_run in baseline_runs.items():
+        if config_hash in candidate_runs:
+            rows.extend(compare_runs(baseline_run, candidate_runs[config_hash], test, alpha, threshold))
+
+    columns = [
+        "config_hash",
+        "name",
+        "target",
+        "metric",
+        "baseline",
+        "candidate",
+        "change",
+        "p_value",
+        "ci_low",
+        "ci_high",
+        "regression",
+        "improvement",
+    ]
+
+    return pd.DataFrame(rows, columns=columns)
+
+
+def to_run(run: Union[Benchmark, BenchmarkRun]) -> BenchmarkRun:
+    return BenchmarkRun.from_benchmark(run) if isinstance(run, Benchmark) else run
+
+
+# CLI
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Compares two sets of benchmark results (directories, results stores or hub repositories) "
+        "and exits with a non-zero status if any regression is found."
+    )
+    parser.add_argument("baseline", help="Directory, results store or hub repository of the baseline results")
+    parser.add_argument("candidate", help="Directory, results store or hub repository of the candidate results")
+    parser.add_argument("--baseline-commit", default=None, help="Commit of the baseline runs in a results store")
+    parser.add_argument("--candidate-commit", default=None, help="Commit of the candidate runs in a results store")
+    parser.add_argument("--test", default="mann-whitney", choices=["mann-whitney", "bootstrap"])
+    parser.add_argument("--alpha", type=float, default=0.01, help="Significance level of the statistical test")
+    parser.add_argument("--threshold", type=float, default=0.05, help="Minimum relative change to be flagged")
+    parser.add_argument("--output", default=None, help="Path of a csv file to save the full comparison to")
+    parsed_args = parser.parse_args(args)
+
+    comparison_df = compare_benchmarks(
+        load_runs(parsed_args.baseline, commit=parsed_args.baseline_commit),
+        load_runs(parsed_args.candidate, commit=parsed_args.candidate_commit),
+        test=parsed_args.test,
+        alpha=parsed_args.alpha,
+        threshold=parsed_args.threshold,
+    )
+
+    if parsed_args.output is not None:
+        comparison_df.to_csv(parsed_args.output, index=False)
+
+    regressions_df = comparison_df[comparison_df["regression"]]
+    if len(regressions_df) > 0:
+        print(regressions_df.to_string(index=False))
+        sys.exit(1)
+
+    print(f"No regressions found across {comparison_df['config_hash'].nunique()} matched runs")
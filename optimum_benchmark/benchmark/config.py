@@ -22,6 +22,8 @@ class BenchmarkConfig(PushToHubMixin):
 
     print_report: bool = False
     log_report: bool = True
+    # stores the raw per-sample arrays of the saved reports in parquet sidecar files instead of inline in the json
+    raw_samples_sidecar: bool = False
 
     @classproperty
     def default_filename(cls) -> str:
@@ -6,9 +6,15 @@ from rich.console import Console
 from rich.markdown import Markdown
 
 from ..hub_utils import PushToHubMixin, classproperty
+from ..trackers.allocation import Allocation
+from ..trackers.cpu_usage import CPUUsage
 from ..trackers.energy import Efficiency, Energy
 from ..trackers.latency import Latency, Throughput
 from ..trackers.memory import Memory
+from ..trackers.padding import Padding
+from ..trackers.perf_counters import PerfCounters
+from ..trackers.profile import Profile
+from ..trackers.speculation import Speculation
 
 CONSOLE = Console()
 LOGGER = getLogger("report")
@@ -21,6 +27,12 @@ class TargetMeasurements:
     throughput: Optional[Throughput] = None
     energy: Optional[Energy] = None
     efficiency: Optional[Efficiency] = None
+    speculation: Optional[Speculation] = None
+    padding: Optional[Padding] = None
+    profile: Optional[Profile] = None
+    cpu_usage: Optional[CPUUsage] = None
+    perf_counters: Optional[PerfCounters] = None
+    allocation: Optional[Allocation] = None
 
     def __post_init__(self):
         if self.memory is not None and isinstance(self.memory, dict):
@@ -33,6 +45,18 @@ class TargetMeasurements:
             self.energy = Energy(**self.energy)
         if self.efficiency is not None and isinstance(self.efficiency, dict):
             self.efficiency = Efficiency(**self.efficiency)
+        if self.speculation is not None and isinstance(self.speculation, dict):
+            self.speculation = Speculation(**self.speculation)
+        if self.padding is not None and isinstance(self.padding, dict):
+            self.padding = Padding(**self.padding)
+        if self.profile is not None and isinstance(self.profile, dict):
+            self.profile = Profile(**self.profile)
+        if self.cpu_usage is not None and isinstance(self.cpu_usage, dict):
+            self.cpu_usage = CPUUsage(**self.cpu_usage)
+        if self.perf_counters is not None and isinstance(self.perf_counters, dict):
+            self.perf_counters = PerfCounters(**self.perf_counters)
+        if self.allocation is not None and isinstance(self.allocation, dict):
+            self.allocation = Allocation(**self.allocation)
 
     @staticmethod
     def aggregate_across_processes(measurements: List["TargetMeasurements"]) -> "TargetMeasurements":
@@ -55,15 +79,63 @@ class TargetMeasurements:
             if m0.efficiency is not None
             else None
         )
+        speculation = (
+            Speculation.aggregate_across_processes([m.speculation for m in measurements])
+            if m0.speculation is not None
+            else None
+        )
+        padding = (
+            Padding.aggregate_across_processes([m.padding for m in measurements]) if m0.padding is not None else None
+        )
+        profile = (
+            Profile.aggregate_across_processes([m.profile for m in measurements]) if m0.profile is not None else None
+        )
+        cpu_usage = (
+            CPUUsage.aggregate_across_processes([m.cpu_usage for m in measurements])
+            if m0.cpu_usage is not None
+            else None
+        )
+        perf_counters = (
+            PerfCounters.aggregate_across_processes([m.perf_counters for m in measurements])
+            if m0.perf_counters is not None
+            else None
+        )
+        allocation = (
+            Allocation.aggregate_across_processes([m.allocation for m in measurements])
+            if m0.allocation is not None
+            else None
+        )
 
         return TargetMeasurements(
-            memory=memory, latency=latency, throughput=throughput, energy=energy, efficiency=efficiency
+            memory=memory,
+            latency=latency,
+            throughput=throughput,
+            energy=energy,
+            efficiency=efficiency,
+            speculation=speculation,
+            padding=padding,
+            profile=profile,
+            cpu_usage=cpu_usage,
+            perf_counters=perf_counters,
+            allocation=allocation,
         )
 
     def to_plain_text(self) -> str:
         plain_text = ""
 
-        for key in ["memory", "latency", "throughput", "energy", "efficiency"]:
+        for key in [
+            "memory",
+            "latency",
+            "throughput",
+            "energy",
+            "efficiency",
+            "speculation",
+            "padding",
+            "profile",
+            "cpu_usage",
+            "perf_counters",
+            "allocation",
+        ]:
             measurement = getattr(self, key)
             if measurement is not None:
                 plain_text += f"\t+ {key}:\n"
@@ -79,7 +151,19 @@ class TargetMeasurements:
     def to_markdown_text(self) -> str:
         markdown_text = ""
 
-        for key in ["memory", "latency", "throughput", "energy", "efficiency"]:
+        for key in [
+            "memory",
+            "latency",
+            "throughput",
+            "energy",
+            "efficiency",
+            "speculation",
+            "padding",
+            "profile",
+            "cpu_usage",
+            "perf_counters",
+            "allocation",
+        ]:
             measurement = getattr(self, key)
             if measurement is not None:
                 markdown_text += f"## {key}:\n\n"
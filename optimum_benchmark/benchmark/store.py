@@ -0,0 +1,177 @@
+import json
+import sqlite3
+import time
+from contextlib import closing
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+
+from .base import Benchmark
+
+LOGGER = getLogger("store")
+
+# the columns by which benchmarks are looked up, extracted from their flat config
+INDEXED_COLUMNS = {
+    "model": "backend.model",
+    "backend": "backend.name",
+    "device": "backend.device",
+    "scenario": "scenario.name",
+    "task": "backend.task",
+    "commit": "environment.optimum_benchmark_commit",
+}
+# quoted because `commit` is an SQL keyword
+QUOTED_COLUMNS = ", ".join(f'"{column}"' for column in INDEXED_COLUMNS)
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS benchmarks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp REAL NOT NULL,
+        name TEXT,
+        model TEXT,
+        backend TEXT,
+        device TEXT,
+        scenario TEXT,
+        task TEXT,
+        "commit" TEXT,
+        config TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS metrics (
+        benchmark_id INTEGER NOT NULL REFERENCES benchmarks (id),
+        name TEXT NOT NULL,
+        value REAL,
+        PRIMARY KEY (benchmark_id, name)
+    ) WITHOUT ROWID
+    """,
+    *[f'CREATE INDEX IF NOT EXISTS benchmarks_{column} ON benchmarks ("{column}")' for column in INDEXED_COLUMNS],
+    "CREATE INDEX IF NOT EXISTS benchmarks_timestamp ON benchmarks (timestamp)",
+    "CREATE INDEX IF NOT EXISTS metrics_name ON metrics (name, benchmark_id)",
+]
+
+
+class BenchmarkStore:
+    """
+    A local SQLite store of benchmark runs, each one recorded with its flat config and its summary metrics
+    (e.g. `forward.latency.mean`), and indexed by model, backend, device, scenario, task and commit.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with closing(self.connect()) as connection, connection:
+            # write-ahead logging lets concurrent runs append while dashboards are reading
+            connection.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                connection.execute(statement)
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=60)
+
+    def append(self, benchmark: Benchmark) -> int:
+        config = benchmark.config.to_dict(flat=True)
+        metrics = get_summary_metrics(benchmark.report.to_dict(flat=True))
+
+        with closing(self.connect()) as connection, connection:
+            cursor = connection.execute(
+                f"INSERT INTO benchmarks (timestamp, name, {QUOTED_COLUMNS}, config) "
+                f"VALUES ({', '.join(['?'] * (len(INDEXED_COLUMNS) + 3))})",
+                [
+                    time.time(),
+                    config.get("name"),
+                    *[to_text(config.get(key)) for key in INDEXED_COLUMNS.values()],
+                    json.dumps(config, default=str),
+                ],
+            )
+            benchmark_id = cursor.lastrowid
+            connection.executemany(
+                "INSERT INTO metrics (benchmark_id, name, value) VALUES (?, ?, ?)",
+                [(benchmark_id, name, value) for name, value in metrics.items()],
+            )
+
+        LOGGER.info(f"\t+ Appended benchmark {benchmark_id} to {self.path}")
+
+        return benchmark_id
+
+    def query(
+        self,
+        model: Optional[str] = None,
+        backend: Optional[str] = None,
+        device: Optional[str] = None,
+        scenario: Optional[str] = None,
+        task: Optional[str] = None,
+        commit: Optional[str] = None,
+        since: Optional[float] = None,
+        metrics: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Returns one row per matching benchmark (most recent first), with its indexed columns and one column per
+        summary metric (all of them, or only the requested `metrics`). `since` is a unix timestamp.
+        """
+
+        filters = {
+            "model": model,
+            "backend": backend,
+            "device": device,
+            "scenario": scenario,
+            "task": task,
+            "commit": commit,
+        }
+
+        conditions = [f'"{column}" = ?' for column, value in filters.items() if value is not None]
+        parameters: List[Any] = [value for value in filters.values() if value is not None]
+
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            parameters.append(since)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        limit_clause = f"LIMIT {int(limit)}" if limit is not None else ""
+        benchmarks_query = (
+            f"SELECT id, timestamp, name, {QUOTED_COLUMNS} "
+            f"FROM benchmarks {where} ORDER BY timestamp DESC {limit_clause}"
+        )
+
+        metrics_query = (
+            f"SELECT benchmark_id, name, value FROM metrics WHERE benchmark_id IN (SELECT id FROM ({benchmarks_query}))"
+        )
+        metrics_parameters = list(parameters)
+        if metrics is not None:
+            metrics_query += f" AND name IN ({', '.join(['?'] * len(metrics))})"
+            metrics_parameters += metrics
+
+        with closing(self.connect()) as connection:
+            benchmarks_df = pd.read_sql_query(benchmarks_query, connection, params=parameters)
+            metrics_df = pd.read_sql_query(metrics_query, connection, params=metrics_parameters)
+
+        metrics_df = metrics_df.pivot(index="benchmark_id", columns="name", values="value")
+        metrics_df.columns.name = None
+
+        return benchmarks_df.join(metrics_df, on="id").set_index("id")
+
+    def get_config(self, benchmark_id: int) -> Dict[str, Any]:
+        with closing(self.connect()) as connection:
+            row = connection.execute("SELECT config FROM benchmarks WHERE id = ?", (benchmark_id,)).fetchone()
+
+        if row is None:
+            raise ValueError(f"No benchmark with id {benchmark_id} in {self.path}")
+
+        return json.loads(row[0])
+
+
+def get_summary_metrics(flat_report: Dict[str, Any]) -> Dict[str, float]:
+    # raw per-sample lists and units are left out, only the scalar statistics are stored
+    return {
+        name: float(value)
+        for name, value in flat_report.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+def to_text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
@@ -4,19 +4,27 @@ from logging import getLogger
 
 import hydra
 from hydra.core.config_store import ConfigStore
+from hydra.utils import to_absolute_path
 from omegaconf import DictConfig, OmegaConf
 
 from . import (
     Benchmark,
     BenchmarkConfig,
+    BenchmarkStore,
+    EchoConfig,
     EnergyStarConfig,
     InferenceConfig,
     InlineConfig,
     IPEXConfig,
     LlamaCppConfig,
+    LongContextConfig,
+    OpenAIConfig,
     ORTConfig,
     OVConfig,
+    PipelineConfig,
     ProcessConfig,
+    ProcessorConfig,
+    ProfilingConfig,
     PyTorchConfig,
     PyTXIConfig,
     TorchORTConfig,
@@ -44,10 +52,16 @@ cs.store(group="backend", name=TRTLLMConfig.name, node=TRTLLMConfig)
 cs.store(group="backend", name=PyTXIConfig.name, node=PyTXIConfig)
 cs.store(group="backend", name=VLLMConfig.name, node=VLLMConfig)
 cs.store(group="backend", name=LlamaCppConfig.name, node=LlamaCppConfig)
+cs.store(group="backend", name=EchoConfig.name, node=EchoConfig)
+cs.store(group="backend", name=OpenAIConfig.name, node=OpenAIConfig)
 # scenarios configurations
 cs.store(group="scenario", name=TrainingConfig.name, node=TrainingConfig)
 cs.store(group="scenario", name=InferenceConfig.name, node=InferenceConfig)
 cs.store(group="scenario", name=EnergyStarConfig.name, node=EnergyStarConfig)
+cs.store(group="scenario", name=LongContextConfig.name, node=LongContextConfig)
+cs.store(group="scenario", name=ProcessorConfig.name, node=ProcessorConfig)
+cs.store(group="scenario", name=PipelineConfig.name, node=PipelineConfig)
+cs.store(group="scenario", name=ProfilingConfig.name, node=ProfilingConfig)
 # launchers configurations
 cs.store(group="launcher", name=InlineConfig.name, node=InlineConfig)
 cs.store(group="launcher", name=ProcessConfig.name, node=ProcessConfig)
@@ -60,6 +74,7 @@ def main(config: DictConfig) -> None:
     log_level = os.environ.get("LOG_LEVEL", "INFO")
     log_to_file = os.environ.get("LOG_TO_FILE", "1") == "1"
     override_benchmarks = os.environ.get("OVERRIDE_BENCHMARKS", "0") == "1"
+    benchmark_store = os.environ.get("BENCHMARK_STORE", None)
     setup_logging(level=log_level, to_file=log_to_file, prefix="MAIN-PROCESS")
 
     if glob.glob("benchmark_report.json") and not override_benchmarks:
@@ -75,8 +90,12 @@ def main(config: DictConfig) -> None:
 
     benchmark_report = Benchmark.launch(benchmark_config)
     benchmark_report.save_markdown("benchmark_report.md")
-    benchmark_report.save_json("benchmark_report.json")
+    benchmark_report.save_json("benchmark_report.json", sidecar=benchmark_config.raw_samples_sidecar)
     benchmark_report.save_text("benchmark_report.txt")
 
     benchmark = Benchmark(config=benchmark_config, report=benchmark_report)
-    benchmark.save_json("benchmark.json")
+    benchmark.save_json("benchmark.json", sidecar=benchmark_config.raw_samples_sidecar)
+
+    if benchmark_store is not None:
+        # relative paths are resolved from the directory the cli was launched in, not the hydra run directory
+        BenchmarkStore(to_absolute_path(benchmark_store)).append(benchmark)
@@ -1,5 +1,4 @@
 import logging
-import random
 import string
 from abc import ABC
 from typing import Dict, List, Tuple
@@ -41,12 +40,25 @@ class BaseGenerator(ABC):
     def generate_ranges(start: int, stop: int, shape: Tuple[int]):
         return torch.arange(start, stop).repeat(shape[0], 1)
 
+    @staticmethod
+    def generate_padding_mask(lengths: torch.Tensor, width: int, padding_side: str):
+        positions = torch.arange(width).unsqueeze(0)
+
+        if padding_side == "left":
+            return (positions >= width - lengths.unsqueeze(1)).to(torch.int64)
+        else:
+            return (positions < lengths.unsqueeze(1)).to(torch.int64)
+
     @staticmethod
     def generate_random_strings(num_seq: int) -> List[str]:
-        return [
-            "".join(random.choice(string.ascii_letters + string.digits) for _ in range(random.randint(10, 100)))
-            for _ in range(num_seq)
-        ]
+        # all the characters are sampled at once and the resulting text is then sliced into sequences
+        characters = torch.tensor(list((string.ascii_letters + string.digits).encode()), dtype=torch.uint8)
+        lengths = torch.randint(10, 101, (num_seq,))
+        indices = torch.randint(0, len(characters), (int(lengths.sum()),))
+        text = characters[indices].numpy().tobytes().decode("ascii")
+        ends = lengths.cumsum(dim=0).tolist()
+
+        return [text[end - length : end] for end, length in zip(ends, lengths.tolist())]
 
     def __call__(self):
         raise NotImplementedError("Generator must implement __call__ method")
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import torch
+
+from .input_generator import InputGenerator
+
+LOGGER = logging.getLogger("generators")
+
+DEFAULT_INPUT_POOL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "optimum-benchmark", "input_pools")
+
+
+class InputPoolGenerator:
+    """
+    Generates a pool of distinct input batches, each one built with the vectorized task generators.
+    Pools of more than one batch are cached on disk, keyed by the task, model type, shapes, seed and pool size.
+    """
+
+    def __init__(
+        self,
+        task: str,
+        input_shapes: Dict[str, int],
+        model_shapes: Dict[str, int],
+        model_type: Optional[str] = None,
+        pool_size: int = 1,
+        seed: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+    ) -> None:
+        self.task = task
+        self.input_shapes = input_shapes
+        self.model_shapes = model_shapes
+        self.model_type = model_type
+        self.pool_size = pool_size
+        self.seed = seed
+        self.cache_dir = cache_dir or DEFAULT_INPUT_POOL_CACHE_DIR
+
+    def __call__(self) -> List[Dict[str, Any]]:
+        if self.pool_size == 1:
+            return [self.generate_inputs()]
+
+        if os.path.exists(self.cache_path):
+            LOGGER.info(f"\t+ Loading input pool of {self.pool_size} batches from {self.cache_path}")
+            return torch.load(self.cache_path, weights_only=True)
+
+        LOGGER.info(f"\t+ Generating input pool of {self.pool_size} batches")
+        input_pool = [self.generate_inputs() for _ in range(self.pool_size)]
+
+        LOGGER.info(f"\t+ Caching input pool to {self.cache_path}")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # writing to a temporary file first so that concurrent processes never read a partial pool
+        torch.save(input_pool, f"{self.cache_path}.{os.getpid()}.tmp")
+        os.replace(f"{self.cache_path}.{os.getpid()}.tmp", self.cache_path)
+
+        return input_pool
+
+    def generate_inputs(self) -> Dict[str, Any]:
+        # a new input generator for each batch, so that sampled shapes (e.g. ragged lengths) differ between batches
+        return InputGenerator(
+            task=self.task,
+            input_shapes=self.input_shapes,
+            model_shapes=self.model_shapes,
+            model_type=self.model_type,
+        )()
+
+    @property
+    def cache_path(self) -> str:
+        key = json.dumps(
+            {
+                "task": self.task,
+                "model_type": self.model_type,
+                "shapes": {**self.model_shapes, **self.input_shapes},
+                "pool_size": self.pool_size,
+                "seed": self.seed,
+            },
+            sort_keys=True,
+            default=str,
+        )
+
+        return os.path.join(self.cache_dir, f"{hashlib.sha256(key.encode()).hexdigest()[:16]}.pt")
@@ -1,4 +1,10 @@
+import json
 import logging
+import math
+from collections import Counter
+from typing import Dict, Tuple
+
+import torch
 
 from .base import BaseGenerator
 
@@ -7,21 +13,48 @@ LOGGER = logging.getLogger("generators")
 DEFAULT_NUM_LABELS = 2
 DEFAULT_VOCAB_SIZE = 2
 DEFAULT_TYPE_VOCAB_SIZE = 2
+DEFAULT_PAD_TOKEN_ID = 0
+DEFAULT_MIN_SEQUENCE_LENGTH = 1
+DEFAULT_SEQUENCE_LENGTH_SIGMA = 0.5
+DEFAULT_NUM_LENGTH_BUCKETS = 1
+
+SEQUENCE_LENGTH_DISTRIBUTIONS = ["uniform", "lognormal", "histogram"]
+PADDING_SIDES = ["left", "right"]
 
 
 class TextGenerator(BaseGenerator):
+    # decoder-only generation continues from the end of the sequence, so its generators pad on the left
+    PADDING_SIDE = "right"
+
+    def __init__(self, shapes: Dict[str, int], with_labels: bool):
+        super().__init__(shapes, with_labels)
+
+        self.ragged_sequence_lengths = None
+
     def input_ids(self):
         self.assert_not_missing_shapes(["batch_size", "sequence_length"])
 
-        return self.generate_random_integers(
+        input_ids = self.generate_random_integers(
             min_value=0,
             max_value=self.shapes.get("vocab_size", DEFAULT_VOCAB_SIZE),
-            shape=(self.shapes["batch_size"], self.shapes["sequence_length"]),
+            shape=(self.shapes["batch_size"], self.padded_sequence_length()),
         )
 
+        if self.is_ragged():
+            input_ids = input_ids.masked_fill(
+                self.attention_mask() == 0, self.shapes.get("pad_token_id", DEFAULT_PAD_TOKEN_ID)
+            )
+
+        return input_ids
+
     def attention_mask(self):
         self.assert_not_missing_shapes(["batch_size", "sequence_length"])
 
+        if self.is_ragged():
+            return self.generate_padding_mask(
+                lengths=self.sequence_lengths(), width=self.padded_sequence_length(), padding_side=self.padding_side()
+            )
+
         return self.generate_constant_integers(
             value=1,  # no sparsity
             shape=(self.shapes["batch_size"], self.shapes["sequence_length"]),
@@ -30,15 +63,24 @@ class TextGenerator(BaseGenerator):
     def token_type_ids(self):
         self.assert_not_missing_shapes(["batch_size", "sequence_length"])
 
-        return self.generate_random_integers(
+        token_type_ids = self.generate_random_integers(
             min_value=0,
             max_value=self.shapes.get("type_vocab_size", DEFAULT_TYPE_VOCAB_SIZE),
-            shape=(self.shapes["batch_size"], self.shapes["sequence_length"]),
+            shape=(self.shapes["batch_size"], self.padded_sequence_length()),
         )
 
+        if self.is_ragged():
+            token_type_ids = token_type_ids * self.attention_mask()
+
+        return token_type_ids
+
     def position_ids(self):
         self.assert_not_missing_shapes(["batch_size", "sequence_length"])
 
+        if self.is_ragged():
+            # positions start at the first non-padding token of each row
+            return (self.attention_mask().cumsum(dim=-1) - 1).clamp(min=0)
+
         return self.generate_ranges(
             start=0,
             stop=self.shapes["sequence_length"],
@@ -53,6 +95,95 @@ class TextGenerator(BaseGenerator):
             self.shapes.get("max_position_embeddings", None) is not None and self.shapes["max_position_embeddings"] > 1
         )
 
+    def is_ragged(self) -> bool:
+        return self.shapes.get("sequence_length_distribution", None) is not None
+
+    def padding_side(self) -> str:
+        padding_side = self.shapes.get("padding_side", self.PADDING_SIDE)
+
+        if padding_side not in PADDING_SIDES:
+            raise ValueError(f"`padding_side` must be one of {PADDING_SIDES}. Got {padding_side} instead.")
+
+        return padding_side
+
+    def padded_sequence_length(self) -> int:
+        if self.is_ragged() and self.shapes.get("num_length_buckets", DEFAULT_NUM_LENGTH_BUCKETS) > 1:
+            # a length-bucketed batch is only padded up to its longest row
+            return int(self.sequence_lengths().max())
+
+        return self.shapes["sequence_length"]
+
+    def sequence_lengths(self) -> torch.Tensor:
+        # lengths are sampled once per generator so that all the inputs of a batch share the same padding
+        if self.ragged_sequence_lengths is None:
+            self.ragged_sequence_lengths = self.sample_sequence_lengths()
+
+            num_tokens = int(self.ragged_sequence_lengths.sum())
+            num_padded_tokens = self.shapes["batch_size"] * self.padded_sequence_length()
+            LOGGER.info(
+                f"\t+ Sampled {self.shapes['sequence_length_distribution']} sequence lengths "
+                f"(min={int(self.ragged_sequence_lengths.min())}, max={int(self.ragged_sequence_lengths.max())}), "
+                f"{num_tokens}/{num_padded_tokens} tokens are not padding ({1 - num_tokens / num_padded_tokens:.1%} waste)"
+            )
+
+        return self.ragged_sequence_lengths
+
+    def sample_sequence_lengths(self) -> torch.Tensor:
+        self.assert_not_missing_shapes(["batch_size", "sequence_length"])
+
+        distribution = self.shapes["sequence_length_distribution"]
+        min_length = self.shapes.get("min_sequence_length", DEFAULT_MIN_SEQUENCE_LENGTH)
+        max_length = self.shapes["sequence_length"]
+
+        # length-sorted batching is emulated by sampling a pool of rows, sorting them by length,
+        # splitting them into buckets of batch_size consecutive rows and picking one of the buckets
+        num_buckets = self.shapes.get("num_length_buckets", DEFAULT_NUM_LENGTH_BUCKETS)
+        num_rows = self.shapes["batch_size"] * num_buckets
+
+        if distribution == "uniform":
+            lengths = torch.randint(min_length, max_length + 1, (num_rows,))
+        elif distribution == "lognormal":
+            median = self.shapes.get("sequence_length_median", max_length / 2)
+            sigma = self.shapes.get("sequence_length_sigma", DEFAULT_SEQUENCE_LENGTH_SIGMA)
+            lengths = torch.empty(num_rows).log_normal_(mean=math.log(median), std=sigma).round().long()
+        elif distribution == "histogram":
+            self.assert_not_missing_shapes(["sequence_length_histogram"])
+            values, counts = load_sequence_length_histogram(self.shapes["sequence_length_histogram"])
+            lengths = values[torch.multinomial(counts, num_rows, replacement=True)]
+        else:
+            raise ValueError(
+                f"`sequence_length_distribution` must be one of {SEQUENCE_LENGTH_DISTRIBUTIONS}. "
+                f"Got {distribution} instead."
+            )
+
+        lengths = lengths.clamp(min=min_length, max=max_length)
+
+        if num_buckets > 1:
+            bucket = torch.randint(0, num_buckets, (1,)).item()
+            lengths = lengths.sort(descending=True).values.view(num_buckets, -1)[bucket]
+
+        return lengths
+
+
+def load_sequence_length_histogram(path: str) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Loads a sequence length histogram from a JSON file, either a mapping of lengths to counts
+    (e.g. {"128": 10, "512": 3}) or a list of observed lengths (e.g. [128, 128, 512]).
+    """
+
+    with open(path, "r") as f:
+        histogram = json.load(f)
+
+    if isinstance(histogram, list):
+        histogram = Counter(histogram)
+    elif not isinstance(histogram, dict):
+        raise ValueError(f"Sequence length histogram must be a mapping or a list, got {type(histogram)}")
+
+    lengths = torch.tensor([int(length) for length in histogram.keys()], dtype=torch.int64)
+    counts = torch.tensor([float(count) for count in histogram.values()], dtype=torch.float64)
+
+    return lengths, counts
+
 
 class ImageGenerator(BaseGenerator):
     def pixel_values(self):
@@ -154,6 +285,8 @@ class TokenClassificationGenerator(TextGenerator):
 
 
 class TextGenerationGenerator(TextGenerator):
+    PADDING_SIDE = "left"
+
     def __call__(self):
         dummy = {}
         dummy["input_ids"] = self.input_ids()
@@ -183,7 +316,7 @@ class QuestionAnsweringGenerator(TextGenerator):
 
         return self.generate_random_integers(
             min_value=0,
-            max_value=self.shapes["sequence_length"],
+            max_value=self.padded_sequence_length(),
             shape=(self.shapes["batch_size"],),
         )
 
@@ -192,7 +325,7 @@ class QuestionAnsweringGenerator(TextGenerator):
 
         return self.generate_random_integers(
             min_value=0,
-            max_value=self.shapes["sequence_length"],
+            max_value=self.padded_sequence_length(),
             shape=(self.shapes["batch_size"],),
         )
 
@@ -416,6 +549,8 @@ class FeatureExtractionGenerator(TextGenerator, ImageGenerator):
 
 
 class ImageTextToTextGenerator(TextGenerator, ImageGenerator):
+    PADDING_SIDE = "left"
+
     def __call__(self):
         dummy = {}
 
@@ -1,19 +1,125 @@
+import ast
+import os
+import random
 import time
 from dataclasses import asdict, dataclass
-from json import dump, load
+from json import JSONDecodeError, dump, dumps, load, loads
 from logging import getLogger
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Any, Dict, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, Union
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
 from flatten_dict import flatten, unflatten
-from huggingface_hub import create_repo, hf_hub_download, upload_file
+from huggingface_hub import CommitInfo, CommitOperationAdd, HfApi, create_repo, hf_hub_download, upload_file
 from huggingface_hub.utils import HfHubHTTPError
 from typing_extensions import Self
 
 LOGGER = getLogger("hub_utils")
 
+# the json key referencing the sidecar file, and the keys of the raw per-sample arrays that are moved to it
+RAW_SAMPLES_SIDECAR_KEY = "raw_samples_sidecar"
+RAW_SAMPLES_KEYS = ["values"]
+
+# the hub responses worth retrying (rate limiting and transient server errors), with exponential backoff
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+DEFAULT_MAX_RETRIES = 8
+DEFAULT_INITIAL_BACKOFF = 2.0
+DEFAULT_MAX_BACKOFF = 120.0
+
+T = TypeVar("T")
+
+
+def get_raw_samples_sidecar_path(path: Union[str, Path]) -> Path:
+    return Path(path).with_suffix(".raw_samples.parquet")
+
+
+def load_raw_samples(path: Union[str, Path]) -> Dict[str, list]:
+    """
+    Loads the raw per-sample arrays of a sidecar file, keyed by their dot-separated path in the json report.
+    """
+
+    table = pq.read_table(path)
+    return {key: table.column(key)[0].as_py() for key in table.column_names}
+
+
+def pop_raw_samples(data: Dict[str, Any], prefix: Tuple[str, ...] = ()) -> Dict[str, list]:
+    raw_samples = {}
+
+    for key, value in data.items():
+        if isinstance(value, dict):
+            raw_samples.update(pop_raw_samples(value, prefix + (key,)))
+        elif (
+            key.split(".")[-1] in RAW_SAMPLES_KEYS
+            and isinstance(value, list)
+            and all(isinstance(sample, (int, float)) for sample in value)
+        ):
+            raw_samples[".".join(prefix + (key,))] = [float(sample) for sample in value]
+            data[key] = None
+
+    return raw_samples
+
+
+def set_raw_samples(data: Dict[str, Any], key: str, values: list) -> None:
+    if key in data:
+        # flat json reports are keyed by the full path
+        data[key] = values
+        return
+
+    *parents, leaf = key.split(".")
+    for parent in parents:
+        data = data[parent]
+    data[leaf] = values
+
+
+def get_retry_delay(error: Exception) -> Optional[float]:
+    """
+    Returns the delay before retrying a failed hub request (the `Retry-After` header of rate-limited responses
+    if any, else 0), or None if the error is not transient.
+    """
+
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return 0.0
+
+    if isinstance(error, HfHubHTTPError) and error.response is not None:
+        if error.response.status_code in RETRYABLE_STATUS_CODES:
+            try:
+                return float(error.response.headers.get("Retry-After", 0))
+            except ValueError:
+                return 0.0
+
+    return None
+
+
+def call_with_backoff(
+    function: Callable[..., T],
+    *args,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+    max_backoff: float = DEFAULT_MAX_BACKOFF,
+    **kwargs,
+) -> T:
+    """
+    Calls a hub function, retrying it on rate limiting and transient errors with a jittered exponential backoff.
+    """
+
+    for attempt in range(max_retries + 1):
+        try:
+            return function(*args, **kwargs)
+        except Exception as error:
+            retry_delay = get_retry_delay(error)
+
+            if retry_delay is None or attempt == max_retries:
+                raise
+
+            backoff = min(max_backoff, initial_backoff * 2**attempt) * random.uniform(0.5, 1.0)
+            delay = max(retry_delay, backoff)
+            LOGGER.warning(f"Hub request failed ({error}), retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+
 
 class classproperty:
     def __init__(self, fget):
@@ -42,14 +148,29 @@ class PushToHubMixin:
     def from_dict(cls, data: Dict[str, Any]) -> "PushToHubMixin":
         return cls(**data)
 
-    def save_json(self, path: Union[str, Path], flat: bool = False) -> None:
+    def save_json(self, path: Union[str, Path], flat: bool = False, sidecar: bool = False) -> None:
+        data = self.to_dict(flat=flat)
+
+        if sidecar:
+            # raw per-sample arrays are stored in a columnar parquet file next to the json, which only references it
+            sidecar_path = get_raw_samples_sidecar_path(path)
+            raw_samples = pop_raw_samples(data)
+            pq.write_table(pa.table({key: [values] for key, values in raw_samples.items()}), sidecar_path)
+            data[RAW_SAMPLES_SIDECAR_KEY] = sidecar_path.name
+
         with open(path, "w") as f:
-            dump(self.to_dict(flat=flat), f, indent=4)
+            dump(data, f, indent=4)
 
     @classmethod
     def from_json(cls, path: Union[str, Path]) -> Self:
         with open(path, "r") as f:
             data = load(f)
+
+        if RAW_SAMPLES_SIDECAR_KEY in data:
+            sidecar_path = Path(path).parent / data.pop(RAW_SAMPLES_SIDECAR_KEY)
+            for key, values in load_raw_samples(sidecar_path).items():
+                set_raw_samples(data, key, values)
+
         return cls.from_dict(data)
 
     # DATAFRAME/CSV API
@@ -63,8 +184,12 @@ class PushToHubMixin:
 
         for k, v in data.items():
             if isinstance(v, str) and v.startswith("[") and v.endswith("]"):
-                # we correct lists that were converted to strings
-                data[k] = eval(v)
+                # we correct lists that were converted to strings, which are json-encoded by `save_csv`
+                # (older csv files hold their python representation, which is only parsed as a literal)
+                try:
+                    data[k] = loads(v)
+                except JSONDecodeError:
+                    data[k] = ast.literal_eval(v)
 
             if v != v:
                 # we correct nan to None
@@ -74,7 +199,9 @@ class PushToHubMixin:
         return cls.from_dict(data)
 
     def save_csv(self, path: Union[str, Path]) -> None:
-        self.to_dataframe().to_csv(path, index=False)
+        df = self.to_dataframe()
+        df = df.apply(lambda column: column.map(lambda v: dumps(v) if isinstance(v, list) else v))
+        df.to_csv(path, index=False)
 
     @classmethod
     def from_csv(cls, path: Union[str, Path]) -> Self:
@@ -92,37 +219,22 @@ class PushToHubMixin:
         exist_ok = kwargs.pop("exist_ok", True)
         repo_type = kwargs.pop("repo_type", "dataset")
 
-        create_repo(repo_id, token=token, private=private, exist_ok=exist_ok, repo_type=repo_type)
+        call_with_backoff(create_repo, repo_id, token=token, private=private, exist_ok=exist_ok, repo_type=repo_type)
 
         with TemporaryDirectory() as tmpdir:
             path_in_repo = (Path(subfolder) / filename).as_posix()
             path_or_fileobj = Path(tmpdir) / filename
             self.save_json(path_or_fileobj)
 
-            try:
-                upload_file(
-                    repo_id=repo_id,
-                    path_in_repo=path_in_repo,
-                    path_or_fileobj=path_or_fileobj,
-                    repo_type=repo_type,
-                    token=token,
-                    **kwargs,
-                )
-            except HfHubHTTPError as e:
-                LOGGER.warning("Error while uploading to Hugging Face Hub")
-                if "Client Error: Too Many Requests for url" in str(e):
-                    LOGGER.warning("Client Error: Too Many Requests for url. Retrying in 15 seconds.")
-                    time.sleep(15)
-                    upload_file(
-                        repo_id=repo_id,
-                        path_in_repo=path_in_repo,
-                        path_or_fileobj=path_or_fileobj,
-                        repo_type=repo_type,
-                        token=token,
-                        **kwargs,
-                    )
-                else:
-                    raise e
+            call_with_backoff(
+                upload_file,
+                repo_id=repo_id,
+                path_in_repo=path_in_repo,
+                path_or_fileobj=path_or_fileobj,
+                repo_type=repo_type,
+                token=token,
+                **kwargs,
+            )
 
     @classmethod
     def from_pretrained(
@@ -133,20 +245,24 @@ class PushToHubMixin:
 
         repo_type = kwargs.pop("repo_type", "dataset")
 
-        try:
-            resolved_file = hf_hub_download(
-                repo_id=repo_id, filename=filename, subfolder=subfolder, repo_type=repo_type, **kwargs
+        resolved_file = call_with_backoff(
+            hf_hub_download, repo_id=repo_id, filename=filename, subfolder=subfolder, repo_type=repo_type, **kwargs
+        )
+
+        with open(resolved_file, "r") as f:
+            sidecar_filename = load(f).get(RAW_SAMPLES_SIDECAR_KEY, None)
+
+        if sidecar_filename is not None:
+            # downloaded next to the json in the local snapshot, where `from_json` looks for it
+            call_with_backoff(
+                hf_hub_download,
+                repo_id=repo_id,
+                filename=sidecar_filename,
+                subfolder=subfolder,
+                repo_type=repo_type,
+                **kwargs,
             )
-        except HfHubHTTPError as e:
-            LOGGER.warning("Error while downloading from Hugging Face Hub")
-            if "Client Error: Too Many Requests for url" in str(e):
-                LOGGER.warning("Client Error: Too Many Requests for url. Retrying in 15 seconds.")
-                time.sleep(15)
-                resolved_file = hf_hub_download(
-                    repo_id=repo_id, filename=filename, subfolder=subfolder, repo_type=repo_type, **kwargs
-                )
-            else:
-                raise e
+
         config_dict = cls.from_json(resolved_file)
 
         return config_dict
@@ -158,3 +274,125 @@ class PushToHubMixin:
     @classproperty
     def default_subfolder(self) -> str:
         return "benchmarks"
+
+
+class HubOutbox:
+    """
+    A local outbox of artifacts to push to a Hugging Face Hub repository, in which artifacts are saved as they are
+    added (mirroring their path in the repository) and pushed in bulk, with as few commits as possible.
+    Files are only removed from the outbox once committed, so an interrupted push can be resumed by pushing again.
+    """
+
+    def __init__(
+        self,
+        repo_id: str,
+        path: Union[str, Path],
+        repo_type: str = "dataset",
+        private: bool = False,
+        token: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        max_files_per_commit: int = 500,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+    ) -> None:
+        self.repo_id = repo_id
+        self.path = Path(path)
+        self.repo_type = repo_type
+        self.private = private
+        self.max_files_per_commit = max_files_per_commit
+        self.backoff_kwargs = {
+            "max_retries": max_retries,
+            "initial_backoff": initial_backoff,
+            "max_backoff": max_backoff,
+        }
+
+        self.api = HfApi(endpoint=endpoint, token=token)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def add(
+        self,
+        artifact: "PushToHubMixin",
+        filename: Optional[str] = None,
+        subfolder: Optional[str] = None,
+        sidecar: bool = False,
+    ) -> None:
+        filename = str(filename or artifact.default_filename)
+        subfolder = str(subfolder or artifact.default_subfolder)
+
+        # artifacts are saved aside then moved into the outbox, so that it never contains partially written files
+        with TemporaryDirectory(dir=self.path.parent) as tmpdir:
+            artifact.save_json(Path(tmpdir) / filename, sidecar=sidecar)
+
+            files = list(Path(tmpdir).iterdir())
+
+            # an artifact already in the outbox at the same path hasn't been pushed yet, it's never overwritten
+            for file in files:
+                destination = self.path / subfolder / file.name
+                if destination.exists():
+                    raise FileExistsError(
+                        f"The outbox already holds a pending artifact at {destination.relative_to(self.path)}, "
+                        "use a different filename or subfolder, or push the outbox first"
+                    )
+
+            for file in files:
+                destination = self.path / subfolder / file.name
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(file, destination)
+
+    def get_pending_files(self) -> List[Path]:
+        return sorted(file for file in self.path.rglob("*") if file.is_file())
+
+    def get_pending_batches(self) -> List[List[Path]]:
+        # the files of an artifact (its json and sidecar) share a stem and are always pushed in the same commit
+        artifacts: Dict[Tuple[Path, str], List[Path]] = {}
+        for file in self.get_pending_files():
+            artifacts.setdefault((file.parent, file.name.split(".")[0]), []).append(file)
+
+        batches: List[List[Path]] = [[]]
+        for files in artifacts.values():
+            if batches[-1] and len(batches[-1]) + len(files) > self.max_files_per_commit:
+                batches.append([])
+            batches[-1].extend(files)
+
+        return [batch for batch in batches if batch]
+
+    def push(self, commit_message: str = "Upload benchmarks") -> List[CommitInfo]:
+        batches = self.get_pending_batches()
+
+        if len(batches) == 0:
+            LOGGER.info("\t+ No pending artifacts to push")
+            return []
+
+        call_with_backoff(
+            self.api.create_repo,
+            self.repo_id,
+            repo_type=self.repo_type,
+            private=self.private,
+            exist_ok=True,
+            **self.backoff_kwargs,
+        )
+
+        commits = []
+        for i, batch in enumerate(batches):
+            LOGGER.info(f"\t+ Pushing {len(batch)} files to {self.repo_id} ({i + 1}/{len(batches)})")
+            commits.append(call_with_backoff(self.commit, batch, commit_message, **self.backoff_kwargs))
+
+            for file in batch:
+                file.unlink()
+
+        return commits
+
+    def commit(self, files: List[Path], commit_message: str) -> CommitInfo:
+        # operations can't be reused across attempts, so they are recreated for each one
+        operations = [
+            CommitOperationAdd(path_in_repo=file.relative_to(self.path).as_posix(), path_or_fileobj=file)
+            for file in files
+        ]
+
+        return self.api.create_commit(
+            repo_id=self.repo_id,
+            repo_type=self.repo_type,
+            operations=operations,
+            commit_message=commit_message,
+        )
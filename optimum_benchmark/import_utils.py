@@ -34,6 +34,7 @@ _llm_swarm_available = importlib.util.find_spec("llm_swarm") is not None
 _zentorch_available = importlib.util.find_spec("zentorch") is not None
 _vllm_available = importlib.util.find_spec("vllm") is not None
 _llama_cpp_available = importlib.util.find_spec("llama-cpp-python") is not None
+_aiohttp_available = importlib.util.find_spec("aiohttp") is not None
 
 
 def is_vllm_available():
@@ -60,6 +61,10 @@ def is_py_txi_available():
     return _py_txi_available
 
 
+def is_aiohttp_available():
+    return _aiohttp_available
+
+
 def is_psutil_available():
     return _psutil_available
 
@@ -239,6 +244,11 @@ def llama_cpp_version():
         return importlib.metadata.version("llama_cpp")
 
 
+def aiohttp_version():
+    if _aiohttp_available:
+        return importlib.metadata.version("aiohttp")
+
+
 def get_git_revision_hash(package_name: str) -> Optional[str]:
     """
     Returns the git commit SHA of a package installed from a git repository.
@@ -1,7 +1,9 @@
-from typing import Dict, List
+import os
+from typing import Any, Callable, Dict, List, Union
 
 import numpy as np
-from datasets import Dataset
+from datasets import Dataset, IterableDataset, Value
+from datasets.fingerprint import Hasher
 from PIL.Image import Image
 from transformers import PretrainedConfig
 
@@ -9,6 +11,68 @@ from ..backends.transformers_utils import PretrainedProcessor
 from ..scenarios import EnergyStarConfig
 
 
+def select_samples(dataset: Union[Dataset, IterableDataset], num_samples: int) -> Union[Dataset, IterableDataset]:
+    if isinstance(dataset, IterableDataset):
+        return dataset.take(num_samples)
+
+    return dataset.select(range(num_samples))
+
+
+def map_dataset(
+    dataset: Union[Dataset, IterableDataset],
+    function: Callable[[Dict[str, List]], Dict[str, List]],
+    desc: str,
+    scenario_config: EnergyStarConfig,
+    pretrained_processor: PretrainedProcessor,
+    function_kwargs: Dict[str, Any],
+) -> Union[Dataset, IterableDataset]:
+    if isinstance(dataset, IterableDataset):
+        # streamed samples are processed lazily, one scenario batch at a time, so that each of them is padded
+        # on its own (a processor batch spanning two scenario batches would give them mismatched widths)
+        return dataset.map(
+            function=function,
+            remove_columns=dataset.column_names,
+            batch_size=scenario_config.input_shapes["batch_size"],
+            batched=True,
+        )
+
+    if scenario_config.preprocessing_num_proc == -1:
+        num_proc = os.cpu_count()
+    else:
+        num_proc = scenario_config.preprocessing_num_proc
+
+    new_fingerprint = None
+    if scenario_config.preprocessing_cache:
+        # the default fingerprint of a map hashes the closure of the function, which isn't reproducible across runs,
+        # so the cache is keyed explicitly by the dataset (and its previous transforms), the preprocessing function,
+        # the processor and the values the function reads (`function_kwargs`), as well as the batching of the map,
+        # which decides how the samples are padded together
+        new_fingerprint = Hasher.hash(
+            [
+                dataset._fingerprint,
+                function.__qualname__,
+                function.__code__.co_code,
+                function.__code__.co_consts,
+                pretrained_processor,
+                function_kwargs,
+                scenario_config.preprocessing_batch_size,
+                num_proc,
+            ]
+        )
+
+    return dataset.map(
+        function=function,
+        desc=desc,
+        remove_columns=dataset.features,
+        batch_size=scenario_config.preprocessing_batch_size,
+        num_proc=num_proc if num_proc > 1 else None,
+        load_from_cache_file=scenario_config.preprocessing_cache,
+        new_fingerprint=new_fingerprint,
+        writer_batch_size=50,
+        batched=True,
+    )
+
+
 def feature_extraction_preprocessing(
     dataset: Dataset,
     pretrained_processor: PretrainedProcessor,
@@ -20,7 +84,7 @@ def feature_extraction_preprocessing(
         dataset = dataset.filter(lambda example: example[scenario_config.text_column_name] != "")
 
     if scenario_config.num_samples != -1:
-        dataset = dataset.select(range(scenario_config.num_samples))
+        dataset = select_samples(dataset, scenario_config.num_samples)
 
     if getattr(pretrained_processor, "pad_token", None) is None:
         # Add a pad token if the tokenizer doesn't have one
@@ -37,12 +101,19 @@ def feature_extraction_preprocessing(
             padding=padding,
         )
 
-    dataset = dataset.map(
+    dataset = map_dataset(
+        dataset,
         function=tokenize_function,
         desc="Running tokenizer on dataset",
-        remove_columns=dataset.features,
-        writer_batch_size=50,
-        batched=True,
+        scenario_config=scenario_config,
+        pretrained_processor=pretrained_processor,
+        function_kwargs={
+            "model_type": pretrained_config.model_type,
+            "text_column_name": scenario_config.text_column_name,
+            "truncation": scenario_config.truncation,
+            "max_length": max_length,
+            "padding": padding,
+        },
     ).with_format("torch")
 
     return dataset
@@ -59,7 +130,7 @@ def summarization_preprocessing(
         dataset = dataset.filter(lambda example: example[scenario_config.text_column_name] != "")
 
     if scenario_config.num_samples != -1:
-        dataset = dataset.select(range(scenario_config.num_samples))
+        dataset = select_samples(dataset, scenario_config.num_samples)
 
     if getattr(pretrained_processor, "pad_token", None) is None:
         # Add a pad token if the tokenizer doesn't have one
@@ -76,12 +147,19 @@ def summarization_preprocessing(
             padding=padding,
         )
 
-    dataset = dataset.map(
+    dataset = map_dataset(
+        dataset,
         function=tokenize_function,
         desc="Running tokenizer on dataset",
-        remove_columns=dataset.features,
-        writer_batch_size=50,
-        batched=True,
+        scenario_config=scenario_config,
+        pretrained_processor=pretrained_processor,
+        function_kwargs={
+            "model_type": pretrained_config.model_type,
+            "text_column_name": scenario_config.text_column_name,
+            "truncation": scenario_config.truncation,
+            "max_length": max_length,
+            "padding": padding,
+        },
     ).with_format("torch")
 
     return dataset
@@ -98,7 +176,7 @@ def text_classification_preprocessing(
         dataset = dataset.filter(lambda example: example[scenario_config.text_column_name] != "")
 
     if scenario_config.num_samples != -1:
-        dataset = dataset.select(range(scenario_config.num_samples))
+        dataset = select_samples(dataset, scenario_config.num_samples)
 
     if getattr(pretrained_processor, "pad_token", None) is None:
         # Add a pad token if the tokenizer doesn't have one
@@ -115,12 +193,19 @@ def text_classification_preprocessing(
             padding=padding,
         )
 
-    dataset = dataset.map(
+    dataset = map_dataset(
+        dataset,
         function=tokenize_function,
         desc="Running tokenizer on dataset",
-        remove_columns=dataset.features,
-        writer_batch_size=50,
-        batched=True,
+        scenario_config=scenario_config,
+        pretrained_processor=pretrained_processor,
+        function_kwargs={
+            "model_type": pretrained_config.model_type,
+            "text_column_name": scenario_config.text_column_name,
+            "truncation": scenario_config.truncation,
+            "max_length": max_length,
+            "padding": padding,
+        },
     ).with_format("torch")
 
     return dataset
@@ -142,7 +227,7 @@ def question_answering_preprocessing(
         )
 
     if scenario_config.num_samples != -1:
-        dataset = dataset.select(range(scenario_config.num_samples))
+        dataset = select_samples(dataset, scenario_config.num_samples)
 
     if getattr(pretrained_processor, "pad_token", None) is None:
         # Add a pad token if the tokenizer doesn't have one
@@ -160,12 +245,20 @@ def question_answering_preprocessing(
             padding=padding,
         )
 
-    dataset = dataset.map(
+    dataset = map_dataset(
+        dataset,
         function=tokenize_function,
         desc="Running tokenizer on dataset",
-        remove_columns=dataset.features,
-        writer_batch_size=50,
-        batched=True,
+        scenario_config=scenario_config,
+        pretrained_processor=pretrained_processor,
+        function_kwargs={
+            "model_type": pretrained_config.model_type,
+            "question_column_name": scenario_config.question_column_name,
+            "context_column_name": scenario_config.context_column_name,
+            "truncation": scenario_config.truncation,
+            "max_length": max_length,
+            "padding": padding,
+        },
     ).with_format("torch")
 
     return dataset
@@ -179,7 +272,7 @@ def text2text_generation_preprocessing(
 ) -> Dataset:
     if scenario_config.num_samples != -1:
         # Remove empty samples when batch_size is 1 because empty inputs will make the model fail
-        dataset = dataset.select(range(scenario_config.num_samples))
+        dataset = select_samples(dataset, scenario_config.num_samples)
 
     if getattr(pretrained_processor, "pad_token", None) is None:
         pretrained_processor.pad_token = pretrained_processor.eos_token
@@ -232,33 +325,56 @@ def text2text_generation_preprocessing(
             padding=padding,
         )
 
+    function_kwargs = {
+        "model_type": pretrained_config.model_type,
+        "text_column_name": scenario_config.text_column_name,
+        "question_column_name": scenario_config.question_column_name,
+        "context_column_name": scenario_config.context_column_name,
+        "dataset_prefix1": scenario_config.dataset_prefix1,
+        "dataset_prefix2": scenario_config.dataset_prefix2,
+        "truncation": scenario_config.truncation,
+        "max_length": max_length,
+        "len_prefix1": len_prefix1,
+        "len_prefix2": len_prefix2,
+        "new_tokens": new_tokens,
+        "padding": padding,
+    }
+
+    # the prefix maps are given the features of their outputs, as a streamed dataset mapped without them loses
+    # its column names, which are needed to remove the text columns once tokenized
+    prefixed_features = dataset.features.copy()
+    prefixed_features[scenario_config.text_column_name] = Value("string")
+
     if scenario_config.t5_task in ["question_answering"]:
-        dataset = dataset.map(add_qa_prefix)
-        dataset = dataset.map(
+        dataset = dataset.map(add_qa_prefix, features=prefixed_features)
+        dataset = map_dataset(
+            dataset,
             function=tokenize_function_qa,
             desc="Running tokenizer on dataset",
-            remove_columns=dataset.features,
-            writer_batch_size=50,
-            batched=True,
+            scenario_config=scenario_config,
+            pretrained_processor=pretrained_processor,
+            function_kwargs=function_kwargs,
         ).with_format("torch")
 
     elif scenario_config.t5_task in ["text_generation"]:
-        dataset = dataset.map(
+        dataset = map_dataset(
+            dataset,
             function=tokenize_function_generation,
             desc="Running tokenizer on dataset",
-            remove_columns=dataset.features,
-            writer_batch_size=50,
-            batched=True,
+            scenario_config=scenario_config,
+            pretrained_processor=pretrained_processor,
+            function_kwargs=function_kwargs,
         ).with_format("torch")
 
     elif scenario_config.t5_task in ["text_classification", "summarization"]:
-        dataset = dataset.map(add_single_prefix)
-        dataset = dataset.map(
+        dataset = dataset.map(add_single_prefix, features=prefixed_features)
+        dataset = map_dataset(
+            dataset,
             function=tokenize_function_single,
             desc="Running tokenizer on dataset",
-            remove_columns=dataset.features,
-            writer_batch_size=50,
-            batched=True,
+            scenario_config=scenario_config,
+            pretrained_processor=pretrained_processor,
+            function_kwargs=function_kwargs,
         ).with_format("torch")
 
     else:
@@ -278,7 +394,7 @@ def text_generation_preprocessing(
         dataset = dataset.filter(lambda example: example[scenario_config.text_column_name] != "")
 
     if scenario_config.num_samples != -1:
-        dataset = dataset.select(range(scenario_config.num_samples))
+        dataset = select_samples(dataset, scenario_config.num_samples)
 
     if getattr(pretrained_processor, "pad_token", None) is None:
         # Add a pad token if the tokenizer doesn't have one
@@ -297,12 +413,19 @@ def text_generation_preprocessing(
             padding=padding,
         )
 
-    dataset = dataset.map(
+    dataset = map_dataset(
+        dataset,
         function=tokenize_function,
         desc="Running tokenizer on dataset",
-        remove_columns=dataset.features,
-        writer_batch_size=50,
-        batched=True,
+        scenario_config=scenario_config,
+        pretrained_processor=pretrained_processor,
+        function_kwargs={
+            "model_type": pretrained_config.model_type,
+            "text_column_name": scenario_config.text_column_name,
+            "truncation": scenario_config.truncation,
+            "max_length": max_length - new_tokens,
+            "padding": padding,
+        },
     ).with_format("torch")
 
     return dataset
@@ -320,17 +443,18 @@ def image_preprocessing(
 
     if scenario_config.num_samples != -1:
         # Add a pad token if the tokenizer doesn't have one
-        dataset = dataset.select(range(scenario_config.num_samples))
+        dataset = select_samples(dataset, scenario_config.num_samples)
 
     def preprocess_function(examples: Dict[str, List[Image]]):
         return pretrained_processor([image.convert("RGB") for image in examples[scenario_config.image_column_name]])
 
-    dataset = dataset.map(
+    dataset = map_dataset(
+        dataset,
         function=preprocess_function,
         desc="Running processor on dataset",
-        remove_columns=dataset.features,
-        writer_batch_size=50,
-        batched=True,
+        scenario_config=scenario_config,
+        pretrained_processor=pretrained_processor,
+        function_kwargs={"image_column_name": scenario_config.image_column_name},
     ).with_format("torch")
 
     return dataset
@@ -347,7 +471,7 @@ def image_to_text_preprocessing(
         dataset = dataset.filter(lambda example: example[scenario_config.image_column_name] != "")
 
     if scenario_config.num_samples != -1:
-        dataset = dataset.select(range(scenario_config.num_samples))
+        dataset = select_samples(dataset, scenario_config.num_samples)
 
     if getattr(pretrained_processor.tokenizer, "pad_token", None) is None:
         # Add a pad token if the tokenizer doesn't have one
@@ -360,12 +484,13 @@ def image_to_text_preprocessing(
     def preprocess_function(examples):
         return pretrained_processor(images=examples[scenario_config.image_column_name])
 
-    dataset = dataset.map(
+    dataset = map_dataset(
+        dataset,
         function=preprocess_function,
         desc="Running processor on dataset",
-        remove_columns=dataset.features,
-        writer_batch_size=50,
-        batched=True,
+        scenario_config=scenario_config,
+        pretrained_processor=pretrained_processor,
+        function_kwargs={"image_column_name": scenario_config.image_column_name},
     ).with_format("torch")
 
     return dataset
@@ -382,7 +507,7 @@ def automatic_speech_recognition_preprocessing(
         dataset = dataset.filter(lambda example: example[scenario_config.audio_column_name] != "")
 
     if scenario_config.num_samples != -1:
-        dataset = dataset.select(range(scenario_config.num_samples))
+        dataset = select_samples(dataset, scenario_config.num_samples)
 
     if getattr(pretrained_processor.tokenizer, "pad_token", None) is None:
         # Add a pad token if the tokenizer doesn't have one
@@ -406,12 +531,16 @@ def automatic_speech_recognition_preprocessing(
 
         return outputs
 
-    dataset = dataset.map(
-        preprocess_function,
+    dataset = map_dataset(
+        dataset,
+        function=preprocess_function,
         desc="Running processor on dataset",
-        remove_columns=dataset.features,
-        writer_batch_size=50,
-        batched=True,
+        scenario_config=scenario_config,
+        pretrained_processor=pretrained_processor,
+        function_kwargs={
+            "model_type": pretrained_config.model_type,
+            "audio_column_name": scenario_config.audio_column_name,
+        },
     ).with_format("torch")
 
     return dataset
@@ -431,7 +560,7 @@ def sentence_similarity_preprocessing(
         )
 
     if scenario_config.num_samples != -1:
-        dataset = dataset.select(range(scenario_config.num_samples))
+        dataset = select_samples(dataset, scenario_config.num_samples)
 
     if getattr(pretrained_processor, "pad_token", None) is None:
         # Add a pad token if the tokenizer doesn't have one
@@ -449,12 +578,20 @@ def sentence_similarity_preprocessing(
             padding=padding,
         )
 
-    dataset = dataset.map(
+    dataset = map_dataset(
+        dataset,
         function=tokenize_function,
         desc="Running tokenizer on dataset",
-        remove_columns=dataset.features,
-        writer_batch_size=50,
-        batched=True,
+        scenario_config=scenario_config,
+        pretrained_processor=pretrained_processor,
+        function_kwargs={
+            "model_type": pretrained_config.model_type,
+            "sentence1_column_name": scenario_config.sentence1_column_name,
+            "sentence2_column_name": scenario_config.sentence2_column_name,
+            "truncation": scenario_config.truncation,
+            "max_length": max_length,
+            "padding": padding,
+        },
     ).with_format("torch")
 
     return dataset
@@ -470,7 +607,7 @@ def text_to_image_preprocessing(
         dataset = dataset.filter(lambda example: example[scenario_config.text_column_name] != "")
 
     if scenario_config.num_samples != -1:
-        dataset = dataset.select(range(scenario_config.num_samples))
+        dataset = select_samples(dataset, scenario_config.num_samples)
 
     return dataset
 
@@ -489,3 +626,23 @@ TASKS_TO_PREPROCESSORS = {
     "image-classification": image_preprocessing,
     "object-detection": image_preprocessing,
 }
+
+
+def sort_dataset_by_length(dataset: Dataset) -> Dataset:
+    if isinstance(dataset, IterableDataset):
+        raise ValueError("Sorting by length is not supported for streamed datasets")
+
+    if "attention_mask" not in dataset.column_names:
+        raise ValueError("Sorting by length is only supported for tokenized datasets with an attention_mask column")
+
+    dataset = dataset.map(
+        function=lambda examples: {"num_tokens": [int(sum(mask)) for mask in examples["attention_mask"]]},
+        desc="Counting tokens in dataset",
+        writer_batch_size=50,
+        batched=True,
+    )
+
+    # longest samples first, so that a batch that doesn't fit in memory fails early
+    dataset = dataset.sort("num_tokens", reverse=True).remove_columns("num_tokens").flatten_indices()
+
+    return dataset
@@ -0,0 +1,49 @@
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import torch
+from transformers import PreTrainedTokenizerBase
+from transformers.feature_extraction_sequence_utils import SequenceFeatureExtractor
+from transformers.image_processing_utils import BaseImageProcessor
+
+
+def get_processor_kind(processor: Any) -> str:
+    if isinstance(processor, PreTrainedTokenizerBase):
+        return "tokenizer"
+    elif isinstance(processor, BaseImageProcessor):
+        return "image_processor"
+    elif isinstance(processor, SequenceFeatureExtractor):
+        return "feature_extractor"
+    else:
+        return type(processor).__name__
+
+
+def generate_raw_inputs(processor: Any, input_shapes: Dict[str, Any]) -> List[Any]:
+    batch_size = input_shapes["batch_size"]
+
+    if isinstance(processor, PreTrainedTokenizerBase):
+        # decoding random token ids gives texts that are (roughly) `sequence_length` tokens long once re-encoded
+        token_ids = torch.randint(0, len(processor), (batch_size, input_shapes["sequence_length"]))
+        return processor.batch_decode(token_ids, skip_special_tokens=True)
+    elif isinstance(processor, BaseImageProcessor):
+        shape = (input_shapes["height"], input_shapes["width"], 3)
+        return [np.random.randint(0, 256, shape, dtype=np.uint8) for _ in range(batch_size)]
+    elif isinstance(processor, SequenceFeatureExtractor):
+        length = input_shapes["audio_sequence_length"]
+        return [np.random.randn(length).astype(np.float32) for _ in range(batch_size)]
+    else:
+        raise NotImplementedError(f"Raw inputs generation is not supported for {type(processor).__name__}")
+
+
+def get_processor_function(processor: Any, processor_kwargs: Dict[str, Any]) -> Callable[[List[Any]], Any]:
+    if isinstance(processor, PreTrainedTokenizerBase):
+        kwargs = {"padding": True, "truncation": True, "return_tensors": "pt", **processor_kwargs}
+        return lambda inputs: processor(inputs, **kwargs)
+    elif isinstance(processor, BaseImageProcessor):
+        kwargs = {"return_tensors": "pt", **processor_kwargs}
+        return lambda inputs: processor(images=inputs, **kwargs)
+    elif isinstance(processor, SequenceFeatureExtractor):
+        kwargs = {"sampling_rate": processor.sampling_rate, "return_tensors": "pt", **processor_kwargs}
+        return lambda inputs: processor(inputs, **kwargs)
+    else:
+        raise NotImplementedError(f"Processing raw inputs is not supported for {type(processor).__name__}")
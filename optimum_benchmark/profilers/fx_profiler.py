@@ -9,38 +9,79 @@ from torch.fx.node import Node
 
 LOGGER = getLogger("fx_profiler")
 
+PROFILED_NODE_OPS = ["call_function", "call_method", "call_module"]
+
 
 class FXProfilingWrapper(Interpreter):
     def __init__(self, module: GraphModule):
         super().__init__(module)
+        self.device = next(module.parameters(), torch.empty(0)).device
+        self.input_names = [node.target for node in module.graph.nodes if node.op == "placeholder"]
         self.profiling_records: List[Tuple[str, str, float]] = []
 
+        # on cuda, nodes are timed with events that are only resolved once the whole graph has run,
+        # so that the profiled run isn't serialized by a device synchronization after every node
+        self.pending_events: List[Tuple[str, str, torch.cuda.Event, torch.cuda.Event]] = []
+
     def run(self, *args) -> Any:
-        return super().run(*args)
+        return_val = super().run(*args)
+
+        if self.pending_events:
+            torch.cuda.synchronize()
+            for node_name, node_op, start, end in self.pending_events:
+                self.profiling_records.append((node_name, node_op, start.elapsed_time(end) / 1e3))
+            self.pending_events.clear()
+
+        return return_val
 
     def run_node(self, node: Node) -> Any:
-        if self.module.device.type == "cuda":
+        if node.op not in PROFILED_NODE_OPS:
+            return super().run_node(node)
+
+        if self.device.type == "cuda":
             start = torch.cuda.Event(enable_timing=True)
             end = torch.cuda.Event(enable_timing=True)
             start.record(stream=torch.cuda.current_stream())
             return_val = super().run_node(node)
             end.record(stream=torch.cuda.current_stream())
-            torch.cuda.synchronize()
-            node_runtime = start.elapsed_time(end) / 1e3
+            self.pending_events.append((node.name, self.get_node_op(node), start, end))
         else:
             start = time.perf_counter_ns()
             return_val = super().run_node(node)
             end = time.perf_counter_ns()
             node_runtime = (end - start) / 1e9
 
-        LOGGER.debug(f"Node {node.name} took {node_runtime:.2e} seconds")
-        self.profiling_records.append((node.name, node.op, node_runtime))
+            LOGGER.debug(f"Node {node.name} took {node_runtime:.2e} seconds")
+            self.profiling_records.append((node.name, self.get_node_op(node), node_runtime))
 
         return return_val
 
+    def get_node_op(self, node: Node) -> str:
+        # the operator type of a node: the class of a called module, or the name of a called function or method
+        if node.op == "call_module":
+            return type(self.module.get_submodule(node.target)).__name__
+        elif node.op == "call_function":
+            return getattr(node.target, "__name__", str(node.target))
+        else:
+            return str(node.target)
+
     def __call__(self, **kwargs) -> Any:
-        args = kwargs.values()
-        return super().run(*args)
+        if all(input_name in kwargs for input_name in self.input_names):
+            args = [kwargs[input_name] for input_name in self.input_names]
+        elif len(kwargs) <= len(self.input_names):
+            # graphs traced with torch.fx name their inputs after the forward arguments (e.g. `x` for timm models),
+            # which don't match the names of the generated inputs (e.g. `pixel_values`), so they're passed in order
+            args = list(kwargs.values())
+        else:
+            raise ValueError(
+                f"The traced model takes the inputs {self.input_names}, but got {list(kwargs.keys())} which can't "
+                "be mapped to them by name or by position"
+            )
+
+        return self.run(*args)
+
+    def reset(self) -> None:
+        self.profiling_records = []
 
     def get_profiling_records(self) -> List[Tuple[str, str, float]]:
         return self.profiling_records
@@ -1,8 +1,7 @@
 import json
 from logging import getLogger
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-import pandas as pd
 from optimum.onnxruntime import ORTModel
 
 LOGGER = getLogger("ort_profiler")
@@ -16,15 +15,22 @@ class ORTProfilingWrapper:
     def __call__(self, *args, **kwargs):
         return self.module(*args, **kwargs)
 
-    def get_profiling_records(self) -> List[Tuple[str, str, float]]:
+    def get_profiling_records(self, last_runs: Optional[int] = None) -> List[Tuple[str, str, float]]:
+        """
+        Ends the profiling of the session and returns its records, only those of its `last_runs` runs if specified
+        (the session is profiled from its creation, which includes the warmup runs).
+        """
+
         profiling_json = self.module.model.end_profiling()  # type: ignore
         with open(profiling_json) as file_obj:
             profiling_data = json.load(file_obj)
             if isinstance(profiling_data, dict):
                 profiling_data = profiling_data["traceEvents"]
 
-        profiling_records = extract_last_run_records(profiling_data)
-        return normalize_records(profiling_records)
+        if last_runs is not None:
+            profiling_data = extract_last_runs_records(profiling_data, last_runs)
+
+        return normalize_records(profiling_data)
 
 
 def normalize_records(data) -> List[Tuple[str, str, float]]:
@@ -53,12 +59,11 @@ def normalize_records(data) -> List[Tuple[str, str, float]]:
     return records
 
 
-def extract_last_run_records(data):
-    # Here we assume that the traces are properly ordered, so we can simplify the splitting logic.
-    return (
-        pd.DataFrame(data)[["name", "cat", "dur", "args"]]
-        .groupby("name")
-        .last()  # not sure if this is the right way to do it
-        .reset_index()
-        .to_dict(orient="records")
-    )
+def extract_last_runs_records(data: List[Dict[str, Any]], last_runs: int) -> List[Dict[str, Any]]:
+    # each run of the session is traced as a `model_run` event, spanning the events of its nodes
+    runs_starts = sorted(item["ts"] for item in data if item.get("cat") == "Session" and item["name"] == "model_run")
+
+    if len(runs_starts) < last_runs:
+        return data
+
+    return [item for item in data if item.get("ts", 0) >= runs_starts[-last_runs]]
@@ -0,0 +1,109 @@
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from logging import getLogger
+from types import FrameType
+from typing import Generator, Optional
+
+from ..import_utils import is_torch_distributed_available
+
+if is_torch_distributed_available():
+    import torch.distributed
+
+LOGGER = getLogger("stack_profiler")
+
+STACK_PROFILER_INTERVAL = 0.005
+
+
+class StackSamplingProfiler:
+    """
+    Samples the Python stacks of all the threads of the process on a wall-clock signal timer, and saves them as
+    collapsed stacks (`frame;frame;...;frame count` lines, rooted at the thread name) which can be rendered by any
+    flamegraph tool (flamegraph.pl, speedscope, inferno). The timer interrupts the main thread, so it must be
+    used from it, and it uses SIGALRM, which must not be used by the profiled code.
+    """
+
+    def __init__(self, name: str, output_dir: str, interval: float = STACK_PROFILER_INTERVAL):
+        self.name = name
+        self.interval = interval
+        self.output_dir = output_dir
+
+        if is_torch_distributed_available() and torch.distributed.is_initialized():
+            self.prefix = f"{self.name}_rank_{torch.distributed.get_rank()}"
+        else:
+            self.prefix = self.name
+
+        self.samples: Counter = Counter()
+        self.last_sample_time: Optional[float] = None
+
+    @property
+    def is_supported(self) -> bool:
+        return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+    @contextmanager
+    def profile(self) -> Generator[None, None, None]:
+        if not self.is_supported:
+            LOGGER.warning("\t+ Stack sampling requires signal timers and the main thread, skipping it")
+            yield
+            return
+
+        self.samples.clear()
+        self.last_sample_time = time.perf_counter()
+
+        LOGGER.info(f"\t+ Sampling Python stacks every {self.interval * 1e3:.1f}ms")
+        previous_handler = signal.signal(signal.SIGALRM, self.sample)
+        signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+        self.save_collapsed_stacks()
+
+    def sample(self, signum: int, frame: Optional[FrameType]) -> None:
+        now = time.perf_counter()
+        # signals are only handled between bytecodes, so the timer expirations during a long native call (e.g. a
+        # kernel launch or a blocking request) are coalesced into one signal, which is weighted accordingly
+        weight = max(1, round((now - self.last_sample_time) / self.interval))
+        self.last_sample_time = now
+
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        main_thread_id = threading.main_thread().ident
+
+        for thread_id, thread_frame in sys._current_frames().items():
+            if thread_id == main_thread_id:
+                # the frame interrupted by the signal, without the frame of this handler
+                thread_frame = frame
+
+            stack = [format_frame(f) for f in iterate_frames(thread_frame)]
+            stack.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+            self.samples[";".join(reversed(stack))] += weight
+
+    def save_collapsed_stacks(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        collapsed_stacks_path = os.path.join(self.output_dir, f"{self.prefix}.collapsed")
+
+        with open(collapsed_stacks_path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        LOGGER.info(f"\t+ Saved {sum(self.samples.values())} stack samples to {collapsed_stacks_path}")
+
+
+def iterate_frames(frame: Optional[FrameType]) -> Generator[FrameType, None, None]:
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def format_frame(frame: FrameType) -> str:
+    filename = frame.f_code.co_filename
+    # library paths are shortened to their package-relative part
+    filename = filename.split("site-packages" + os.sep)[-1]
+    return f"{frame.f_code.co_name} ({filename}:{frame.f_code.co_firstlineno})".replace(";", ":")
@@ -0,0 +1,111 @@
+import os
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Any, Dict, Generator, Optional
+
+import torch
+from transformers import TrainerCallback
+
+from ..import_utils import is_torch_distributed_available
+
+if is_torch_distributed_available():
+    import torch.distributed
+
+LOGGER = getLogger("torch_profiler")
+
+TORCH_PROFILER_SCHEDULE = {"wait": 1, "warmup": 1, "active": 3, "repeat": 1}
+
+
+class TorchProfiler:
+    """
+    Profiles the steps of a phase with torch.profiler following a wait/warmup/active schedule, exporting a Chrome
+    (Perfetto compatible) trace of each active window and a key averages table of the last one to `output_dir`.
+    """
+
+    def __init__(
+        self,
+        phase: str,
+        device: str,
+        output_dir: str,
+        schedule: Dict[str, int],
+        profiler_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        self.phase = phase
+        self.device = device
+        self.output_dir = output_dir
+        self.schedule = {**TORCH_PROFILER_SCHEDULE, **schedule}
+        self.profiler_kwargs = profiler_kwargs or {}
+
+        if is_torch_distributed_available() and torch.distributed.is_initialized():
+            self.prefix = f"{self.phase}_rank_{torch.distributed.get_rank()}"
+        else:
+            self.prefix = self.phase
+
+        self.activities = [torch.profiler.ProfilerActivity.CPU]
+        if self.device == "cuda":
+            # also covers rocm devices, which are exposed as cuda devices by pytorch
+            self.activities.append(torch.profiler.ProfilerActivity.CUDA)
+
+    @property
+    def num_steps(self) -> int:
+        return (self.schedule["wait"] + self.schedule["warmup"] + self.schedule["active"]) * self.schedule["repeat"]
+
+    @contextmanager
+    def profile(self) -> Generator[torch.profiler.profile, None, None]:
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        LOGGER.info(f"\t+ Profiling {self.num_steps} {self.phase} steps with torch.profiler")
+        with torch.profiler.profile(
+            activities=self.activities,
+            schedule=torch.profiler.schedule(**self.schedule),
+            on_trace_ready=self.export_trace,
+            **self.profiler_kwargs,
+        ) as profiler:
+            yield profiler
+
+        self.save_key_averages(profiler)
+
+    def export_trace(self, profiler: torch.profiler.profile) -> None:
+        trace_path = os.path.join(self.output_dir, f"{self.prefix}_trace_step_{profiler.step_num}.json")
+        LOGGER.info(f"\t+ Exporting {self.phase} trace to {trace_path}")
+        profiler.export_chrome_trace(trace_path)
+
+    def save_key_averages(self, profiler: torch.profiler.profile) -> None:
+        sort_by = "self_cuda_time_total" if self.device == "cuda" else "self_cpu_time_total"
+        key_averages_path = os.path.join(self.output_dir, f"{self.prefix}_key_averages.txt")
+        LOGGER.info(f"\t+ Saving {self.phase} key averages to {key_averages_path}")
+        with open(key_averages_path, "w") as f:
+            f.write(profiler.key_averages().table(sort_by=sort_by, row_limit=50))
+
+
+class TorchProfilerTrainerCallback(TrainerCallback):
+    """
+    Profiles the first training steps of a trainer with a `TorchProfiler`, stepping it at the end of each step
+    and stopping it once its schedule is complete.
+    """
+
+    def __init__(self, torch_profiler: TorchProfiler):
+        self.torch_profiler = torch_profiler
+        self.context = None
+        self.profiler = None
+
+    def on_train_begin(self, *args, **kwargs):
+        self.context = self.torch_profiler.profile()
+        self.profiler = self.context.__enter__()
+
+    def on_step_end(self, *args, **kwargs):
+        if self.profiler is None:
+            return
+
+        self.profiler.step()
+
+        if self.profiler.step_num >= self.torch_profiler.num_steps:
+            self.stop()
+
+    def on_train_end(self, *args, **kwargs):
+        if self.profiler is not None:
+            self.stop()
+
+    def stop(self):
+        self.context.__exit__(None, None, None)
+        self.context, self.profiler = None, None
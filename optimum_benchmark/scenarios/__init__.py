@@ -1,11 +1,19 @@
 from .config import ScenarioConfig  # noqa: F401
 from .energy_star.config import EnergyStarConfig  # noqa: F401
 from .inference.config import InferenceConfig  # noqa: F401
+from .long_context.config import LongContextConfig  # noqa: F401
+from .pipeline.config import PipelineConfig  # noqa: F401
+from .processor.config import ProcessorConfig  # noqa: F401
+from .profiling.config import ProfilingConfig  # noqa: F401
 from .training.config import TrainingConfig  # noqa: F401
 
 __all__ = [
     "EnergyStarConfig",
     "InferenceConfig",
+    "LongContextConfig",
+    "PipelineConfig",
+    "ProcessorConfig",
+    "ProfilingConfig",
     "TrainingConfig",
     "ScenarioConfig",
 ]
@@ -20,11 +20,37 @@ class EnergyStarConfig(ScenarioConfig):
     dataset_config: str = field(default="", metadata={"help": "Name of the config of the dataset."})
     dataset_split: str = field(default="train", metadata={"help": "Dataset split to use."})
     num_samples: int = field(default=-1, metadata={"help": "Number of samples to select in the dataset. -1 means all."})
+    streaming: bool = field(
+        default=False,
+        metadata={
+            "help": "Stream the dataset instead of loading the whole split. Samples are then preprocessed lazily, "
+            "one batch at a time, while iterating over them (preprocessing_* options don't apply). Every loop streams "
+            "and preprocesses the samples again: that cost is measured once by `preprocess_dataset`, which iterates "
+            "over them, and is subtracted from the loops' energy, while the time the loops wait for the samples "
+            "(`*_data` targets) is subtracted from their latency."
+        },
+    )
     input_shapes: Dict[str, Any] = field(
         default_factory=dict,
         metadata={"help": "Input shapes for the model. Missing keys will be filled with default values."},
     )
 
+    # preprocessing options
+    preprocessing_num_proc: int = field(
+        default=1,
+        metadata={"help": "Number of processes used to preprocess the dataset. -1 means all the CPU cores."},
+    )
+    preprocessing_batch_size: int = field(
+        default=1000, metadata={"help": "Number of samples passed at once to the preprocessing functions."}
+    )
+    preprocessing_cache: bool = field(
+        default=True,
+        metadata={
+            "help": "Reuse the preprocessed dataset from the datasets cache when the dataset, "
+            "the processor and the preprocessing options are the same as in a previous run."
+        },
+    )
+
     # text dataset options
     text_column_name: str = field(default="text", metadata={"help": "Name of the column with the text input."})
     truncation: Union[bool, str] = field(default=True, metadata={"help": "To truncate the inputs."})
@@ -35,6 +61,14 @@ class EnergyStarConfig(ScenarioConfig):
     dataset_prefix2: str = field(default="", metadata={"help": "Prefix to add to text2textgeneration input."})
     t5_task: str = field(default="", metadata={"help": "Task for categorizing text2textgeneration tasks."})
 
+    sort_by_length: bool = field(
+        default=False,
+        metadata={
+            "help": "Sort the samples by number of tokens and pad each batch only up to its longest sample, "
+            "instead of batching them in dataset order."
+        },
+    )
+
     # image dataset options
     image_column_name: str = field(default="image", metadata={"help": "Name of the column with the image input."})
     resize: Union[bool, str] = field(default=False, metadata={"help": "To resize the input images."})
@@ -60,6 +94,13 @@ class EnergyStarConfig(ScenarioConfig):
     latency: bool = field(default=False, metadata={"help": "Whether to measure latency."})
 
     warmup_runs: int = field(default=10, metadata={"help": "Number of warmup runs to perform before scenarioing"})
+    prefetch_batches: int = field(
+        default=0,
+        metadata={
+            "help": "Number of batches loaded and prepared in a background thread while the current one runs. "
+            "0 means batches are prepared synchronously in the measured loop."
+        },
+    )
 
     # methods kwargs
     forward_kwargs: Dict[str, Any] = field(
@@ -100,5 +141,24 @@ class EnergyStarConfig(ScenarioConfig):
             )
             self.generate_kwargs["max_new_tokens"] = self.generate_kwargs["min_new_tokens"]
 
+        if self.preprocessing_num_proc == 0 or self.preprocessing_num_proc < -1:
+            raise ValueError(
+                f"`preprocessing_num_proc` must be -1 or greater than 0, but got {self.preprocessing_num_proc}."
+            )
+
+        if self.preprocessing_batch_size < 1:
+            raise ValueError(
+                f"`preprocessing_batch_size` must be greater than 0, but got {self.preprocessing_batch_size}."
+            )
+
+        if self.streaming and self.num_samples == -1:
+            raise ValueError("Streaming requires `num_samples` to be set to the number of samples to stream.")
+
+        if self.streaming and self.sort_by_length:
+            raise ValueError("Sorting by length requires the whole dataset and is not supported with streaming.")
+
+        if self.prefetch_batches < 0:
+            raise ValueError(f"`prefetch_batches` must be greater than or equal to 0, but got {self.prefetch_batches}.")
+
         if is_rocm_system():
             raise ValueError("Energy measurement through codecarbon is not yet available on ROCm-powered devices.")
@@ -0,0 +1,84 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from ...trackers.latency import LATENCY_UNIT, Latency
+
+
+class BatchPrefetcher:
+    """
+    Iterates over the inputs of a dataset loop, loading and preparing the next `num_prefetch_batches` batches
+    in a background thread while the current one is being consumed (0 means batches are prepared synchronously).
+    The time spent waiting for each batch (data-bound) and the time spent consuming it (compute-bound) are recorded.
+    """
+
+    def __init__(
+        self,
+        batches: Iterable[Dict[str, Any]],
+        prepare_inputs: Callable[[Dict[str, Any]], Dict[str, Any]],
+        num_prefetch_batches: int = 0,
+    ):
+        self.batches = iter(batches)
+        self.prepare_inputs = prepare_inputs
+        self.num_prefetch_batches = num_prefetch_batches
+
+        self.data_times: List[float] = []
+        self.compute_times: List[float] = []
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        inputs_iterator = self.prefetch() if self.num_prefetch_batches > 0 else self.load()
+
+        try:
+            while True:
+                data_start = time.perf_counter()
+                inputs = next(inputs_iterator, None)
+                data_end = time.perf_counter()
+
+                if inputs is None:
+                    return
+
+                self.data_times.append(data_end - data_start)
+                yield inputs
+                self.compute_times.append(time.perf_counter() - data_end)
+        finally:
+            # stops the background thread when the loop ends early (break or exception)
+            inputs_iterator.close()
+
+    def load(self) -> Iterator[Dict[str, Any]]:
+        while (inputs := self.load_next_inputs()) is not None:
+            yield inputs
+
+    def prefetch(self) -> Iterator[Dict[str, Any]]:
+        # a single worker runs the loading tasks in submission order, so batches are yielded in the dataset order
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-prefetcher") as executor:
+            futures = deque(executor.submit(self.load_next_inputs) for _ in range(self.num_prefetch_batches))
+
+            try:
+                # errors raised while loading a batch are raised here, when the batch is consumed
+                while (inputs := futures.popleft().result()) is not None:
+                    futures.append(executor.submit(self.load_next_inputs))
+                    yield inputs
+            finally:
+                # the batches that are not loaded yet are not needed anymore, the executor waits for the others
+                for future in futures:
+                    future.cancel()
+
+    def load_next_inputs(self) -> Optional[Dict[str, Any]]:
+        batch = next(self.batches, None)
+
+        if batch is None:
+            return None
+
+        return self.prepare_inputs(batch)
+
+    def get_data_latency(self) -> Latency:
+        return Latency.from_values(self.data_times, unit=LATENCY_UNIT)
+
+    def get_compute_latency(self) -> Latency:
+        return Latency.from_values(self.compute_times, unit=LATENCY_UNIT)
+
+    @property
+    def data_bound_ratio(self) -> float:
+        total_time = sum(self.data_times) + sum(self.compute_times)
+        return sum(self.data_times) / total_time if total_time > 0 else 0.0
@@ -1,17 +1,21 @@
 from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 
-from datasets import load_dataset
+import torch
+from datasets import IterableDataset, load_dataset
 from tqdm import tqdm
 
 from ...backends.base import Backend, BackendConfigT
 from ...benchmark.report import BenchmarkReport
-from ...preprocessors.dataset_preprocessor import TASKS_TO_PREPROCESSORS
+from ...preprocessors.dataset_preprocessor import TASKS_TO_PREPROCESSORS, sort_dataset_by_length
 from ...task_utils import IMAGE_DIFFUSION_TASKS, TEXT_GENERATION_TASKS
-from ...trackers.energy import Efficiency, EnergyTracker
-from ...trackers.latency import LatencyTracker, Throughput
+from ...trackers.energy import Efficiency, Energy, EnergyTracker
+from ...trackers.latency import Latency, LatencyTracker, Throughput
 from ...trackers.memory import MemoryTracker
+from ...trackers.padding import PaddingTracker
 from ..base import Scenario
 from .config import EnergyStarConfig
+from .prefetcher import BatchPrefetcher
 
 TEXT_GENERATION_DEFAULT_KWARGS = {
     "num_return_sequences": 1,
@@ -39,18 +43,31 @@ IMAGE_DIFFUSION_WARMUP_OVERRIDES = {
     "num_inference_steps": 2,
 }
 
+# tasks whose preprocessed datasets are padded token sequences
+TOKENIZED_TEXT_TASKS = [
+    "text2text-generation",
+    "sentence-similarity",
+    "text-classification",
+    "question-answering",
+    "feature-extraction",
+    "text-generation",
+    "summarization",
+]
+
 
 PREPROCESS_EFFICIENCY_UNIT = "samples/kWh"
 FORWARD_EFFICIENCY_UNIT = "samples/kWh"
 PREFILL_EFFICIENCY_UNIT = "samples/kWh"
 DECODE_EFFICIENCY_UNIT = "tokens/kWh"
 CALL_EFFICIENCY_UNIT = "images/kWh"
+TOKENS_EFFICIENCY_UNIT = "tokens/kWh"
 
 PREPROCESS_THROUGHPUT_UNIT = "samples/s"
 FORWARD_THROUGHPUT_UNIT = "samples/s"
 PREFILL_THROUGHPUT_UNIT = "samples/s"
 DECODE_THROUGHPUT_UNIT = "tokens/s"
 CALL_THROUGHPUT_UNIT = "images/s"
+TOKENS_THROUGHPUT_UNIT = "tokens/s"
 
 
 class EnergyStarScenario(Scenario[EnergyStarConfig]):
@@ -68,18 +85,22 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
             self.logger.info("\t+ Initializing Text Generation report")
             self.report = BenchmarkReport.from_list(
                 targets=["load_dataset", "preprocess_dataset", "load_model", "prefill", "decode"]
+                + self.get_data_targets(["prefill", "generate"])
+                + self.get_tokens_targets(["prefill"])
             )
         elif self.backend.config.task in IMAGE_DIFFUSION_TASKS:
             self.logger.info("\t+ Updating Image Diffusion kwargs with default values")
             self.config.call_kwargs = {**IMAGE_DIFFUSION_DEFAULT_KWARGS, **self.config.call_kwargs}
             self.logger.info("\t+ Initializing Image Diffusion report")
             self.report = BenchmarkReport.from_list(
-                targets=["load_dataset", "preprocess_dataset", "load_model", "call"]
+                targets=["load_dataset", "preprocess_dataset", "load_model", "call"] + self.get_data_targets(["call"])
             )
         else:
             self.logger.info("\t+ Initializing Inference report")
             self.report = BenchmarkReport.from_list(
                 targets=["load_dataset", "preprocess_dataset", "load_model", "forward"]
+                + self.get_data_targets(["forward"])
+                + self.get_tokens_targets(["forward"])
             )
 
         if self.config.latency:
@@ -110,7 +131,7 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
 
         if self.config.warmup_runs > 0:
             self.logger.info("\t+ Preparing sample inputs for warmup")
-            self.sample_inputs = self.dataset[: self.config.input_shapes["batch_size"]]
+            self.sample_inputs = next(self.iterate_batches())
             self.sample_inputs = self.backend.prepare_inputs(self.sample_inputs)
 
             if self.backend.config.task in TEXT_GENERATION_TASKS:
@@ -140,6 +161,48 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
                 context_stack.enter_context(self.latency_tracker.track())
             yield
 
+    def get_data_targets(self, loops: List[str]) -> List[str]:
+        if not self.config.latency:
+            return []
+
+        return [f"{loop}_{kind}" for loop in loops for kind in ["data", "compute"]]
+
+    def get_tokens_targets(self, loops: List[str]) -> List[str]:
+        if self.backend.config.task not in TOKENIZED_TEXT_TASKS:
+            return []
+
+        return [f"{loop}_tokens" for loop in loops]
+
+    def prepare_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        if isinstance(batch.get("attention_mask", None), torch.Tensor):
+            if self.config.sort_by_length:
+                batch = trim_padding(batch)
+
+            self.padding_tracker.track(batch["attention_mask"])
+
+        return self.backend.prepare_inputs(batch)
+
+    def iterate_batches(self) -> Iterator[Dict[str, Any]]:
+        batch_size = self.config.input_shapes["batch_size"]
+
+        if isinstance(self.dataset, IterableDataset):
+            # streamed samples are loaded and preprocessed on the fly, batch by batch
+            return self.dataset.iter(batch_size=batch_size)
+
+        return (self.dataset[i : i + batch_size] for i in range(0, self.config.num_samples, batch_size))
+
+    def iterate_inputs(self, loop: str) -> Iterator[Dict[str, Any]]:
+        num_batches = len(range(0, self.config.num_samples, self.config.input_shapes["batch_size"]))
+        self.padding_tracker = PaddingTracker()
+        prefetcher = BatchPrefetcher(self.iterate_batches(), self.prepare_batch, self.config.prefetch_batches)
+
+        yield from tqdm(prefetcher, total=num_batches)
+
+        if self.config.latency:
+            getattr(self.report, f"{loop}_data").latency = prefetcher.get_data_latency()
+            getattr(self.report, f"{loop}_compute").latency = prefetcher.get_compute_latency()
+            self.logger.info(f"\t+ {loop} loop was {prefetcher.data_bound_ratio:.1%} data-bound")
+
     # Dataset loading tracking
     def run_dataset_loading_tracking(self):
         self.logger.info("\t+ Running dataset loading tracking")
@@ -149,6 +212,7 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
                 self.config.dataset_name,
                 self.config.dataset_config,
                 split=self.config.dataset_split,
+                streaming=self.config.streaming,
             )
 
         if self.config.energy:
@@ -170,6 +234,15 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
                 pretrained_processor=self.backend.pretrained_processor,
             )
 
+            if self.config.sort_by_length:
+                self.dataset = sort_dataset_by_length(self.dataset)
+
+            if self.config.streaming:
+                # streamed samples are only loaded and preprocessed when iterated over, so this pass measures that
+                # cost, which every loop pays again and which is subtracted from their measurements
+                for _ in self.iterate_batches():
+                    pass
+
         if self.config.energy:
             preprocess_energy = self.energy_tracker.get_energy()
 
@@ -230,19 +303,18 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
         prefill_kwargs = {**self.config.generate_kwargs, **TEXT_GENERATION_PREFILL_OVERRIDES}
 
         with self.track(task_name="prefill"):
-            for i in tqdm(range(0, self.config.num_samples, self.config.input_shapes["batch_size"])):
-                inputs = self.backend.prepare_inputs(self.dataset[i : i + self.config.input_shapes["batch_size"]])
+            for inputs in self.iterate_inputs("prefill"):
                 self.backend.prefill(inputs, prefill_kwargs)
 
         if self.config.energy:
-            prefill_energy = self.energy_tracker.get_energy()
+            prefill_energy = self.get_loop_energy()
 
             self.report.prefill.energy = prefill_energy
             self.report.prefill.efficiency = Efficiency.from_energy(
                 prefill_energy, self.dataset_prefill_volume, unit=PREFILL_EFFICIENCY_UNIT
             )
         if self.config.latency:
-            prefill_latency = self.latency_tracker.get_latency()
+            prefill_latency = self.get_loop_latency("prefill")
 
             self.report.prefill.latency = prefill_latency
             self.report.prefill.throughput = Throughput.from_latency(
@@ -250,14 +322,15 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
             )
         if self.config.memory:
             self.report.prefill.memory = self.memory_tracker.get_max_memory()
+        if self.backend.config.task in TOKENIZED_TEXT_TASKS:
+            self.run_tokens_tracking("prefill", self.report.prefill.energy, self.report.prefill.latency)
 
         with self.track(task_name="generate"):
-            for i in tqdm(range(0, self.config.num_samples, self.config.input_shapes["batch_size"])):
-                inputs = self.backend.prepare_inputs(self.dataset[i : i + self.config.input_shapes["batch_size"]])
+            for inputs in self.iterate_inputs("generate"):
                 self.backend.generate(inputs, self.config.generate_kwargs)
 
         if self.config.energy:
-            generate_energy = self.energy_tracker.get_energy()
+            generate_energy = self.get_loop_energy()
             decode_energy = generate_energy - prefill_energy
 
             self.report.decode.energy = decode_energy
@@ -265,7 +338,7 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
                 decode_energy, self.dataset_decode_volume, unit=DECODE_EFFICIENCY_UNIT
             )
         if self.config.latency:
-            generate_latency = self.latency_tracker.get_latency()
+            generate_latency = self.get_loop_latency("generate")
             decode_latency = generate_latency - prefill_latency
 
             self.report.decode.latency = decode_latency
@@ -280,17 +353,16 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
         self.logger.info("\t+ Running Image Diffusion tracking")
 
         with self.track(task_name="call"):
-            for i in tqdm(range(0, self.config.num_samples, self.config.input_shapes["batch_size"])):
-                inputs = self.backend.prepare_inputs(self.dataset[i : i + self.config.input_shapes["batch_size"]])
+            for inputs in self.iterate_inputs("call"):
                 self.backend.call(inputs, self.config.call_kwargs)
 
         if self.config.energy:
-            call_energy = self.energy_tracker.get_energy()
+            call_energy = self.get_loop_energy()
             call_volume = self.dataset_call_volume
             self.report.call.energy = call_energy
             self.report.call.efficiency = Efficiency.from_energy(call_energy, call_volume, unit=CALL_EFFICIENCY_UNIT)
         if self.config.latency:
-            call_latency = self.latency_tracker.get_latency()
+            call_latency = self.get_loop_latency("call")
             call_volume = self.dataset_call_volume
             self.report.call.latency = call_latency
             self.report.call.throughput = Throughput.from_latency(call_latency, call_volume, unit=CALL_THROUGHPUT_UNIT)
@@ -302,19 +374,18 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
         self.logger.info("\t+ Running Inference tracking")
 
         with self.track(task_name="forward"):
-            for i in tqdm(range(0, self.config.num_samples, self.config.input_shapes["batch_size"])):
-                inputs = self.backend.prepare_inputs(self.dataset[i : i + self.config.input_shapes["batch_size"]])
+            for inputs in self.iterate_inputs("forward"):
                 self.backend.forward(inputs, self.config.forward_kwargs)
 
         if self.config.energy:
-            forward_energy = self.energy_tracker.get_energy()
+            forward_energy = self.get_loop_energy()
             forward_volume = self.dataset_forward_volume
             self.report.forward.energy = forward_energy
             self.report.forward.efficiency = Efficiency.from_energy(
                 forward_energy, forward_volume, unit=FORWARD_EFFICIENCY_UNIT
             )
         if self.config.latency:
-            forward_latency = self.latency_tracker.get_latency()
+            forward_latency = self.get_loop_latency("forward")
             forward_volume = self.dataset_forward_volume
             self.report.forward.latency = forward_latency
             self.report.forward.throughput = Throughput.from_latency(
@@ -322,6 +393,44 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
             )
         if self.config.memory:
             self.report.forward.memory = self.memory_tracker.get_max_memory()
+        if self.backend.config.task in TOKENIZED_TEXT_TASKS:
+            self.run_tokens_tracking("forward", self.report.forward.energy, self.report.forward.latency)
+
+    def get_loop_energy(self) -> Energy:
+        loop_energy = self.energy_tracker.get_energy()
+
+        if self.config.streaming:
+            # the energy spent streaming and preprocessing the samples, measured by the preprocessing pass
+            loop_energy = loop_energy - self.report.preprocess_dataset.energy
+
+        return loop_energy
+
+    def get_loop_latency(self, loop: str) -> Latency:
+        loop_latency = self.latency_tracker.get_latency()
+
+        if self.config.streaming:
+            # the time the loop spent waiting for the streamed samples to be loaded and preprocessed
+            data_time = sum(getattr(self.report, f"{loop}_data").latency.values)
+            loop_latency = Latency.from_values([max(loop_latency.mean - data_time, 0.0)], unit=loop_latency.unit)
+
+        return loop_latency
+
+    # Tokens tracking
+    def run_tokens_tracking(self, loop: str, energy: Optional[Energy], latency: Optional[Latency]):
+        padding = self.padding_tracker.get_padding()
+        self.logger.info(f"\t+ {loop} loop spent {padding.padding_ratio:.1%} of its tokens on padding")
+
+        tokens_target = getattr(self.report, f"{loop}_tokens")
+        tokens_target.padding = padding
+
+        if energy is not None:
+            tokens_target.efficiency = Efficiency.from_energy(
+                energy, padding.useful_tokens, unit=TOKENS_EFFICIENCY_UNIT
+            )
+        if latency is not None:
+            tokens_target.throughput = Throughput.from_latency(
+                latency, padding.useful_tokens, unit=TOKENS_THROUGHPUT_UNIT
+            )
 
     @property
     def dataset_preprocess_volume(self) -> int:  # in terms of processed samples
@@ -349,3 +458,17 @@ class EnergyStarScenario(Scenario[EnergyStarConfig]):
             return self.config.num_samples * self.config.call_kwargs["num_images_per_prompt"]
         else:
             return self.config.num_samples
+
+
+def trim_padding(batch: Dict[str, Any]) -> Dict[str, Any]:
+    # drops the token positions that are padding for every sample of the batch (on either side),
+    # so that the batch is only as wide as its longest sample instead of the longest one of the dataset
+    attention_mask = batch["attention_mask"]
+    positions = attention_mask.any(dim=0)
+
+    return {
+        key: value[:, positions]
+        if isinstance(value, torch.Tensor) and value.dim() == 2 and value.shape == attention_mask.shape
+        else value
+        for key, value in batch.items()
+    }
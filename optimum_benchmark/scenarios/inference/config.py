@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from logging import getLogger
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from ...system_utils import is_rocm_system
 from ..config import ScenarioConfig
@@ -11,6 +11,8 @@ INPUT_SHAPES = {
     "batch_size": 2,
 }
 
+TORCH_PROFILER_PHASES = ["forward", "prefill", "decode", "call"]
+
 
 @dataclass
 class InferenceConfig(ScenarioConfig):
@@ -48,11 +50,51 @@ class InferenceConfig(ScenarioConfig):
         default=None,
         metadata={"help": "If set, `max_new_tokens` and `min_new_tokens` will be set to this value."},
     )
+    input_pool_size: int = field(
+        default=1,
+        metadata={
+            "help": "Number of distinct input batches generated up front and cycled through during measurements. "
+            "Prevents backends with input-dependent caching from hitting the same batch at every iteration."
+        },
+    )
+    input_pool_cache_dir: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": "Directory where input pools are cached, keyed by task, shapes and seed. "
+            "Defaults to `~/.cache/optimum-benchmark/input_pools`."
+        },
+    )
 
     # tracking options
     memory: bool = field(default=False, metadata={"help": "Measure max memory usage"})
     latency: bool = field(default=True, metadata={"help": "Measure latencies and throughputs"})
     energy: bool = field(default=False, metadata={"help": "Measure energy usage and efficiency"})
+    cpu_usage: bool = field(
+        default=False,
+        metadata={"help": "Measure cpu utilization of the process and its cores, context switches and threads (Linux)"},
+    )
+    perf_counters: bool = field(
+        default=False,
+        metadata={
+            "help": "Count hardware events (cycles, instructions, LLC and branch misses) with perf_event_open (Linux), "
+            "reported per iteration with IPC and misses per kilo-instruction. Skipped when the events can't be opened."
+        },
+    )
+    allocation: bool = field(
+        default=False,
+        metadata={
+            "help": "Measure garbage collections, their pauses and allocations of the interpreter per iteration, "
+            "in a dedicated loop. With per-token latency tracking, the collections of the measured generations are "
+            "also attributed to the token intervals they fall in (`per_token` allocation)."
+        },
+    )
+    trace_allocations: bool = field(
+        default=False,
+        metadata={
+            "help": "Trace the allocated memory with tracemalloc during allocation tracking. tracemalloc hooks every "
+            "allocation, so it slows down the host code and shifts the garbage collections of the dedicated loop."
+        },
+    )
 
     # methods kwargs
     forward_kwargs: Dict[str, Any] = field(
@@ -65,6 +107,83 @@ class InferenceConfig(ScenarioConfig):
         default_factory=dict, metadata={"help": "Keyword arguments to pass to the call method of the backend."}
     )
 
+    # multi-turn options
+    num_turns: int = field(
+        default=1,
+        metadata={
+            "help": "Number of conversation turns to benchmark for text generation. "
+            "At each turn, the previous turn's output and `turn_length` new tokens are appended to the context. "
+            "The per-turn prefill throughput counts the prefilled tokens, i.e. the ones not already in a reused cache."
+        },
+    )
+    turn_length: Optional[int] = field(
+        default=None,
+        metadata={"help": "Number of new tokens appended at each turn. Defaults to `input_shapes.sequence_length`."},
+    )
+    reuse_cache: Optional[bool] = field(
+        default=None,
+        metadata={
+            "help": "Reuse the previous turn's KV-cache instead of re-prefilling the whole conversation history. "
+            "Only supported by the pytorch backend, and requires a growable cache implementation (e.g. dynamic). "
+            "Defaults to true for the backends that support it and false for the others."
+        },
+    )
+
+    # profiling options
+    torch_profiler_phases: List[str] = field(
+        default_factory=list,
+        metadata={
+            "help": "Phases to profile with torch.profiler once tracking is done, among `forward`, `prefill`, "
+            "`decode` (a whole generation) and `call`. Chrome traces and key averages tables are exported to "
+            "`torch_profiler_dir`, the profiled runs use the same model and inputs but don't affect the measurements."
+        },
+    )
+    torch_profiler_schedule: Dict[str, int] = field(
+        default_factory=dict,
+        metadata={"help": "The `wait`, `warmup`, `active` and `repeat` steps of the torch.profiler schedule."},
+    )
+    torch_profiler_kwargs: Dict[str, Any] = field(
+        default_factory=dict,
+        metadata={"help": "Keyword arguments to pass to torch.profiler.profile (e.g. `record_shapes`, `with_stack`)."},
+    )
+    torch_profiler_dir: str = field(
+        default="torch_profiler",
+        metadata={"help": "Directory where torch.profiler traces and tables are saved, next to the report."},
+    )
+    stack_profiler: bool = field(
+        default=False,
+        metadata={
+            "help": "Sample the Python stacks of the process on a wall-clock signal timer, in a dedicated pass over "
+            "the tracked calls (prefill and decode, call or forward) after the measurements, so that it doesn't "
+            "inflate them. The stacks of each call are saved as collapsed stacks (flamegraph input) to "
+            "`stack_profiler_dir`. Useful to attribute the host-side time of Python-heavy backends (llama_cpp, vllm, "
+            "py-txi) to framework and glue code."
+        },
+    )
+    stack_profiler_interval: float = field(
+        default=0.005,
+        metadata={"help": "Interval between two stack samples, in seconds."},
+    )
+    stack_profiler_dir: str = field(
+        default="stack_profiler",
+        metadata={"help": "Directory where the collapsed stacks are saved, next to the report."},
+    )
+    calibrate_overhead: bool = field(
+        default=False,
+        metadata={
+            "help": "Measure the overhead of the harness after latency tracking (an empty tracked region, a loop "
+            "iteration, inputs preparation and, with per-token tracking, a logits processor call) and report it in "
+            "`overhead_*` targets. Benchmarking the `echo` backend measures the whole harness on its own."
+        },
+    )
+    subtract_overhead: bool = field(
+        default=False,
+        metadata={
+            "help": "Subtract the mean calibrated overhead from the tracked latencies and recompute throughputs "
+            "(requires `calibrate_overhead`)."
+        },
+    )
+
     def __post_init__(self):
         super().__post_init__()
 
@@ -101,5 +220,55 @@ class InferenceConfig(ScenarioConfig):
             )
             self.generate_kwargs["max_new_tokens"] = self.generate_kwargs["min_new_tokens"]
 
+        if self.input_pool_size < 1:
+            raise ValueError(f"`input_pool_size` must be greater than or equal to 1, but got {self.input_pool_size}.")
+
+        if self.num_turns < 1:
+            raise ValueError(f"`num_turns` must be greater than or equal to 1, but got {self.num_turns}.")
+
+        if self.num_turns > 1:
+            if self.turn_length is None:
+                self.turn_length = self.input_shapes.get("sequence_length", None)
+
+            if self.turn_length is None:
+                raise ValueError(
+                    "`turn_length` or `input_shapes.sequence_length` must be specified when `num_turns` > 1."
+                )
+
+            if self.energy:
+                raise ValueError("Energy tracking is not supported for multi-turn text generation (`num_turns` > 1).")
+            if self.cpu_usage:
+                raise ValueError(
+                    "CPU usage tracking is not supported for multi-turn text generation (`num_turns` > 1)."
+                )
+            if self.perf_counters:
+                raise ValueError(
+                    "Perf counters tracking is not supported for multi-turn text generation (`num_turns` > 1)."
+                )
+            if self.allocation:
+                raise ValueError(
+                    "Allocation tracking is not supported for multi-turn text generation (`num_turns` > 1)."
+                )
+            if self.calibrate_overhead:
+                raise ValueError(
+                    "Overhead calibration is not supported for multi-turn text generation (`num_turns` > 1)."
+                )
+
+        for phase in self.torch_profiler_phases:
+            if phase not in TORCH_PROFILER_PHASES:
+                raise ValueError(f"`torch_profiler_phases` must be among {TORCH_PROFILER_PHASES}, but got {phase}.")
+
+        if self.stack_profiler:
+            if self.stack_profiler_interval <= 0:
+                raise ValueError(
+                    f"`stack_profiler_interval` must be greater than 0, but got {self.stack_profiler_interval}."
+                )
+
+        if self.calibrate_overhead and not self.latency:
+            raise ValueError("Overhead calibration happens after latency tracking, `latency` must be enabled.")
+
+        if self.subtract_overhead and not self.calibrate_overhead:
+            raise ValueError("`subtract_overhead` requires `calibrate_overhead` to be enabled.")
+
         if self.energy and is_rocm_system():
             raise ValueError("Energy measurement through codecarbon is not yet available on ROCm-powered devices.")
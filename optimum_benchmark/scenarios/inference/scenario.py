@@ -1,24 +1,42 @@
+import copy
 import time
 from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import torch
 from transformers import LogitsProcessorList
 
 from ...backends.base import Backend, BackendConfigT
 from ...benchmark.report import BenchmarkReport
 from ...generators.input_generator import InputGenerator
+from ...generators.input_pool_generator import InputPoolGenerator
+from ...profilers.stack_profiler import StackSamplingProfiler
+from ...profilers.torch_profiler import TorchProfiler
 from ...task_utils import IMAGE_DIFFUSION_TASKS, TEXT_GENERATION_TASKS
+from ...trackers.allocation import AllocationSessionTracker
+from ...trackers.cpu_usage import CPUUsageTracker
 from ...trackers.energy import Efficiency, EnergyTracker
 from ...trackers.latency import (
+    LATENCY_UNIT,
+    Latency,
     LatencySessionTracker,
+    PerRequestLatencySessionTracker,
     PerStepLatencySessionTrackerPipelineCallback,
     PerTokenLatencySessionTrackerLogitsProcessor,
     Throughput,
 )
 from ...trackers.memory import MemoryTracker
+from ...trackers.perf_counters import PerfCountersTracker
+from ...trackers.speculation import SpeculativeDecodingSessionTracker
 from ..base import Scenario
 from .config import InferenceConfig
 
-PER_TOKEN_BACKENDS = ["pytorch", "onnxruntime", "openvino", "neural-compressor", "ipex"]
+PER_TOKEN_BACKENDS = ["pytorch", "onnxruntime", "openvino", "neural-compressor", "ipex", "echo", "openai", "py-txi"]
+# backends sending the inputs of a batch as concurrent requests, which report the latency and ttft of each request
+PER_REQUEST_BACKENDS = ["openai", "py-txi"]
+MULTI_TURN_BACKENDS = ["pytorch", "onnxruntime", "openvino", "neural-compressor", "ipex"]
+CACHE_REUSE_BACKENDS = ["pytorch"]
+SPECULATIVE_BACKENDS = ["pytorch"]
 
 TEXT_GENERATION_DEFAULT_KWARGS = {
     "num_return_sequences": 1,
@@ -45,10 +63,13 @@ IMAGE_DIFFUSION_WARMUP_OVERRIDES = {
     "num_inference_steps": 2,
 }
 
+OVERHEAD_CALIBRATION_ITERATIONS = 1000
+
 
 FORWARD_THROUGHPUT_UNIT = "samples/s"
 PREFILL_THROUGHPUT_UNIT = "samples/s"
 DECODE_THROUGHPUT_UNIT = "tokens/s"
+TURN_PREFILL_THROUGHPUT_UNIT = "tokens/s"
 CALL_THROUGHPUT_UNIT = "images/s"
 
 
@@ -71,7 +92,33 @@ class InferenceScenario(Scenario[InferenceConfig]):
             self.logger.info("\t+ Updating Text Generation kwargs with default values")
             self.config.generate_kwargs = {**TEXT_GENERATION_DEFAULT_KWARGS, **self.config.generate_kwargs}
             self.logger.info("\t+ Initializing Text Generation report")
-            if self.backend.config.name in PER_TOKEN_BACKENDS:
+            if self.is_multi_turn:
+                if self.backend.config.name not in MULTI_TURN_BACKENDS:
+                    raise ValueError(f"Multi-turn text generation is not supported by {self.backend.config.name}")
+                if self.config.reuse_cache is None:
+                    self.config.reuse_cache = self.backend.config.name in CACHE_REUSE_BACKENDS
+                elif self.config.reuse_cache and self.backend.config.name not in CACHE_REUSE_BACKENDS:
+                    raise ValueError(f"KV-cache reuse is not supported by {self.backend.config.name}")
+
+                self.report = BenchmarkReport.from_list(
+                    targets=["load_model"] + [f"prefill_turn_{turn}" for turn in range(self.config.num_turns)]
+                )
+            elif self.is_speculative:
+                if self.backend.config.name not in SPECULATIVE_BACKENDS:
+                    raise ValueError(f"Speculative decoding is not supported by {self.backend.config.name}")
+                if self.config.input_shapes["batch_size"] != 1:
+                    raise ValueError("Speculative decoding only supports a batch size of 1")
+                if self.config.generate_kwargs["num_beams"] != 1:
+                    raise ValueError("Speculative decoding only supports greedy search and sampling (num_beams=1)")
+
+                self.report = BenchmarkReport.from_list(
+                    targets=["load_model", "prefill", "decode", "draft_step", "verify_step"]
+                )
+            elif self.backend.config.name in PER_REQUEST_BACKENDS:
+                self.report = BenchmarkReport.from_list(
+                    targets=["load_model", "prefill", "decode", "per_token", "per_request", "time_to_first_token"]
+                )
+            elif self.backend.config.name in PER_TOKEN_BACKENDS:
                 self.report = BenchmarkReport.from_list(targets=["load_model", "prefill", "decode", "per_token"])
             else:
                 self.report = BenchmarkReport.from_list(targets=["load_model", "prefill", "decode"])
@@ -84,17 +131,66 @@ class InferenceScenario(Scenario[InferenceConfig]):
             self.logger.info("\t+ Initializing Inference report")
             self.report = BenchmarkReport.from_list(targets=["load_model", "forward"])
 
+        if self.config.calibrate_overhead:
+            overhead_targets = ["overhead_track", "overhead_loop", "overhead_prepare_inputs"]
+            if "per_token" in self.report.to_dict() and not self.is_served_in_waves:
+                overhead_targets.append("overhead_logits_processor")
+
+            self.report = BenchmarkReport.from_list(targets=list(self.report.to_dict()) + overhead_targets)
+
+        if self.concurrency_levels:
+            if not self.config.latency:
+                raise ValueError("Concurrency levels are swept during latency tracking, `latency` must be enabled.")
+
+            concurrency_targets = []
+            for level in self.concurrency_levels:
+                concurrency_targets += [f"concurrency_{level}", f"concurrency_{level}_time_to_first_token"]
+
+            self.report = BenchmarkReport.from_list(targets=list(self.report.to_dict()) + concurrency_targets)
+
+        if self.config.torch_profiler_phases:
+            if self.is_multi_turn:
+                raise ValueError("torch.profiler profiling is not supported for multi-turn text generation")
+
+            for phase in self.config.torch_profiler_phases:
+                if phase not in self.profiled_phases:
+                    raise ValueError(
+                        f"Phase {phase} can't be profiled for task {self.backend.config.task}, "
+                        f"expected one of {list(self.profiled_phases)}"
+                    )
+
+        if self.config.stack_profiler and self.is_multi_turn:
+            raise ValueError("Stack sampling is not supported for multi-turn text generation")
+
         if self.config.latency:
             self.logger.info("\t+ Initializing Latency tracker")
             self.latency_tracker = LatencySessionTracker(
                 device=self.backend.config.device, backend=self.backend.config.name
             )
-            if self.backend.config.task in TEXT_GENERATION_TASKS and self.backend.config.name in PER_TOKEN_BACKENDS:
+            if self.is_speculative:
+                self.logger.info("\t+ Initializing Speculative Decoding tracker")
+                self.speculative_decoding_tracker = SpeculativeDecodingSessionTracker(
+                    device=self.backend.config.device, backend=self.backend.config.name
+                )
+            elif (
+                self.backend.config.task in TEXT_GENERATION_TASKS
+                and self.backend.config.name in PER_TOKEN_BACKENDS
+                and not self.is_multi_turn
+            ):
                 self.logger.info("\t+ Initializing Per-Token Latency tracker")
                 self.per_token_latency_tracker = PerTokenLatencySessionTrackerLogitsProcessor(
-                    device=self.backend.config.device, backend=self.backend.config.name
+                    device=self.backend.config.device,
+                    backend=self.backend.config.name,
+                    track_gc=self.config.allocation,
                 )
                 self.config.generate_kwargs["logits_processor"] = LogitsProcessorList([self.per_token_latency_tracker])
+
+                if self.backend.config.name in PER_REQUEST_BACKENDS:
+                    self.logger.info("\t+ Initializing Per-Request Latency tracker")
+                    self.per_request_latency_tracker = PerRequestLatencySessionTracker(
+                        device=self.backend.config.device, backend=self.backend.config.name
+                    )
+                    self.config.generate_kwargs["request_latency_tracker"] = self.per_request_latency_tracker
             elif self.backend.config.task in IMAGE_DIFFUSION_TASKS:
                 self.logger.info("\t+ Initializing Diffusion Step Latency tracker")
                 self.per_step_latency_tracker = PerStepLatencySessionTrackerPipelineCallback(
@@ -118,18 +214,47 @@ class InferenceScenario(Scenario[InferenceConfig]):
                 device_ids=self.backend.config.device_ids,
             )
 
+        if self.config.cpu_usage:
+            self.logger.info("\t+ Initializing CPU Usage tracker")
+            self.cpu_usage_tracker = CPUUsageTracker(
+                device=self.backend.config.device, backend=self.backend.config.name
+            )
+
+        if self.config.perf_counters:
+            self.logger.info("\t+ Initializing Perf Counters tracker")
+            self.perf_counters_tracker = PerfCountersTracker(
+                device=self.backend.config.device, backend=self.backend.config.name
+            )
+
+        if self.config.allocation:
+            self.logger.info("\t+ Initializing Allocation tracker")
+            self.allocation_tracker = AllocationSessionTracker(
+                device=self.backend.config.device,
+                backend=self.backend.config.name,
+                trace_allocations=self.config.trace_allocations,
+            )
+
         self.logger.info(f"\t+ Generating inputs for task {self.backend.config.task}")
-        self.inputs = InputGenerator(
+        self.input_pool = InputPoolGenerator(
             task=self.backend.config.task,
             model_shapes=self.backend.model_shapes,
             model_type=self.backend.config.model_type,
             input_shapes=self.config.input_shapes,
+            pool_size=self.config.input_pool_size,
+            seed=self.backend.config.seed,
+            cache_dir=self.config.input_pool_cache_dir,
         )()
 
         self.run_model_loading_tracking()
 
         self.logger.info(f"\t+ Preparing inputs for backend {self.backend.config.name}")
-        self.inputs = self.backend.prepare_inputs(inputs=self.inputs)
+        prepared_input_pool, self.prepare_inputs_latencies = [], []
+        for inputs in self.input_pool:
+            start = time.perf_counter()
+            prepared_input_pool.append(self.backend.prepare_inputs(inputs=inputs))
+            self.prepare_inputs_latencies.append(time.perf_counter() - start)
+        self.input_pool = prepared_input_pool
+        self.inputs, self.input_index = self.input_pool[0], -1
 
         if self.config.warmup_runs > 0:
             if self.backend.config.task in TEXT_GENERATION_TASKS:
@@ -139,9 +264,15 @@ class InferenceScenario(Scenario[InferenceConfig]):
             else:
                 self.warmup_inference()
 
+        if self.is_multi_turn:
+            self.run_multi_turn_text_generation_tracking()
+            return self.report
+
         if self.config.latency:
             if self.backend.config.task in TEXT_GENERATION_TASKS:
-                if self.backend.config.name in PER_TOKEN_BACKENDS:
+                if self.is_speculative:
+                    self.run_speculative_text_generation_latency_tracking()
+                elif self.backend.config.name in PER_TOKEN_BACKENDS:
                     self.run_per_token_text_generation_latency_tracking()
                 else:
                     self.run_text_generation_latency_tracking()
@@ -150,6 +281,12 @@ class InferenceScenario(Scenario[InferenceConfig]):
             else:
                 self.run_inference_latency_tracking()
 
+            if self.config.calibrate_overhead:
+                self.run_overhead_calibration()
+
+            if self.concurrency_levels:
+                self.run_concurrency_levels_latency_tracking()
+
         if self.config.memory:
             if self.backend.config.task in TEXT_GENERATION_TASKS:
                 self.run_text_generation_memory_tracking()
@@ -166,6 +303,36 @@ class InferenceScenario(Scenario[InferenceConfig]):
             else:
                 self.run_inference_energy_tracking()
 
+        if self.config.cpu_usage:
+            if self.backend.config.task in TEXT_GENERATION_TASKS:
+                self.run_text_generation_cpu_usage_tracking()
+            elif self.backend.config.task in IMAGE_DIFFUSION_TASKS:
+                self.run_image_diffusion_cpu_usage_tracking()
+            else:
+                self.run_inference_cpu_usage_tracking()
+
+        if self.config.perf_counters:
+            if self.backend.config.task in TEXT_GENERATION_TASKS:
+                self.run_text_generation_perf_counters_tracking()
+            elif self.backend.config.task in IMAGE_DIFFUSION_TASKS:
+                self.run_image_diffusion_perf_counters_tracking()
+            else:
+                self.run_inference_perf_counters_tracking()
+
+        if self.config.allocation:
+            if self.backend.config.task in TEXT_GENERATION_TASKS:
+                self.run_text_generation_allocation_tracking()
+            elif self.backend.config.task in IMAGE_DIFFUSION_TASKS:
+                self.run_image_diffusion_allocation_tracking()
+            else:
+                self.run_inference_allocation_tracking()
+
+        if self.config.torch_profiler_phases:
+            self.run_torch_profiling()
+
+        if self.config.stack_profiler:
+            self.run_stack_profiling()
+
         return self.report
 
     # Model loading tracking
@@ -177,6 +344,8 @@ class InferenceScenario(Scenario[InferenceConfig]):
                 context_stack.enter_context(self.energy_tracker.track(task_name="load_model"))
             if self.config.memory:
                 context_stack.enter_context(self.memory_tracker.track())
+            if self.config.cpu_usage:
+                context_stack.enter_context(self.cpu_usage_tracker.track())
             if self.config.latency:
                 context_stack.enter_context(self.latency_tracker.session())
                 context_stack.enter_context(self.latency_tracker.track())
@@ -189,24 +358,28 @@ class InferenceScenario(Scenario[InferenceConfig]):
             self.report.load_model.memory = self.memory_tracker.get_max_memory()
         if self.config.energy:
             self.report.load_model.energy = self.energy_tracker.get_energy()
+        if self.config.cpu_usage:
+            self.report.load_model.cpu_usage = self.cpu_usage_tracker.get_cpu_usage()
 
     # Warmup
     def warmup_text_generation(self):
         self.logger.info("\t+ Warming up backend for Text Generation")
-        self.backend.generate(self.inputs, self.config.generate_kwargs)
+        self.backend.generate(self.next_inputs(), self.config.generate_kwargs)
         for _ in range(self.config.warmup_runs):
-            self.backend.generate(self.inputs, {**self.config.generate_kwargs, **TEXT_GENERATION_WARMUP_OVERRIDES})
+            self.backend.generate(
+                self.next_inputs(), {**self.config.generate_kwargs, **TEXT_GENERATION_WARMUP_OVERRIDES}
+            )
 
     def warmup_image_diffusion(self):
         self.logger.info("\t+ Warming up backend for Image Diffusion")
-        self.backend.call(self.inputs, self.config.call_kwargs)
+        self.backend.call(self.next_inputs(), self.config.call_kwargs)
         for _ in range(self.config.warmup_runs):
-            self.backend.call(self.inputs, {**self.config.call_kwargs, **IMAGE_DIFFUSION_WARMUP_OVERRIDES})
+            self.backend.call(self.next_inputs(), {**self.config.call_kwargs, **IMAGE_DIFFUSION_WARMUP_OVERRIDES})
 
     def warmup_inference(self):
         self.logger.info("\t+ Warming up backend for Inference")
         for _ in range(self.config.warmup_runs):
-            self.backend.forward(self.inputs, self.config.forward_kwargs)
+            self.backend.forward(self.next_inputs(), self.config.forward_kwargs)
 
     ## Text Generation memory tracking
     def run_text_generation_memory_tracking(self):
@@ -214,13 +387,15 @@ class InferenceScenario(Scenario[InferenceConfig]):
 
         self.logger.info("\t+ Running Text Generation memory tracking")
 
+        inputs = self.next_inputs()
         with self.memory_tracker.track():
-            self.backend.prefill(self.inputs, prefill_kwargs)
+            self.backend.prefill(inputs, prefill_kwargs)
 
         self.report.prefill.memory = self.memory_tracker.get_max_memory()
 
+        inputs = self.next_inputs()
         with self.memory_tracker.track():
-            self.backend.generate(self.inputs, self.config.generate_kwargs)
+            self.backend.generate(inputs, self.config.generate_kwargs)
 
         self.report.decode.memory = self.memory_tracker.get_max_memory()
 
@@ -228,8 +403,9 @@ class InferenceScenario(Scenario[InferenceConfig]):
     def run_image_diffusion_memory_tracking(self):
         self.logger.info("\t+ Running Image Diffusion memory tracking")
 
+        inputs = self.next_inputs()
         with self.memory_tracker.track():
-            self.backend.call(self.inputs, self.config.call_kwargs)
+            self.backend.call(inputs, self.config.call_kwargs)
 
         self.report.call.memory = self.memory_tracker.get_max_memory()
 
@@ -237,22 +413,49 @@ class InferenceScenario(Scenario[InferenceConfig]):
     def run_inference_memory_tracking(self):
         self.logger.info("\t+ Running Inference memory tracking")
 
+        inputs = self.next_inputs()
         with self.memory_tracker.track():
-            self.backend.forward(self.inputs, self.config.forward_kwargs)
+            self.backend.forward(inputs, self.config.forward_kwargs)
 
         self.report.forward.memory = self.memory_tracker.get_max_memory()
 
     ## Per-Token Text Generation latency tracking
     def run_per_token_text_generation_latency_tracking(self):
         self.logger.info("\t+ Running Per-Token Text Generation latency tracking")
+        is_per_request = self.backend.config.name in PER_REQUEST_BACKENDS
+
+        with ExitStack() as context_stack:
+            context_stack.enter_context(self.per_token_latency_tracker.session())
+            if is_per_request:
+                context_stack.enter_context(self.per_request_latency_tracker.session())
 
-        with self.per_token_latency_tracker.session():
             while (
                 self.per_token_latency_tracker.elapsed() < self.config.duration
                 or self.per_token_latency_tracker.count() < self.config.iterations
             ):
+                inputs = self.next_inputs()
                 with self.per_token_latency_tracker.track():
-                    self.backend.generate(self.inputs, self.config.generate_kwargs)
+                    self.backend.generate(inputs, self.config.generate_kwargs)
+
+        if is_per_request:
+            self.report.per_request.latency = self.per_request_latency_tracker.get_request_latency()
+            self.report.time_to_first_token.latency = self.per_request_latency_tracker.get_time_to_first_token_latency()
+
+        if self.is_served_in_waves:
+            # the requests of a batch served in waves share no prefill or generation steps, so the latencies are the
+            # per-request ones and the decode throughput is the number of generated tokens over the batches' duration
+            self.logger.info("\t+ Batches are served in waves of requests, reporting per-request latencies")
+            generate_latency = self.per_token_latency_tracker.get_generate_latency()
+
+            self.report.per_token.latency = self.per_request_latency_tracker.get_per_token_latency()
+            self.report.prefill.latency = self.report.time_to_first_token.latency
+            self.report.decode.latency = self.per_request_latency_tracker.get_decode_latency()
+            self.report.decode.throughput = Throughput.from_latency(
+                generate_latency,
+                self.per_request_latency_tracker.get_num_tokens() / generate_latency.count,
+                unit=DECODE_THROUGHPUT_UNIT,
+            )
+            return
 
         per_token_latency = self.per_token_latency_tracker.get_per_token_latency()
         prefill_latency = self.per_token_latency_tracker.get_prefill_latency()
@@ -272,6 +475,39 @@ class InferenceScenario(Scenario[InferenceConfig]):
             decode_latency, self.atomic_decode_volume, unit=DECODE_THROUGHPUT_UNIT
         )
 
+        if self.per_token_latency_tracker.track_gc:
+            # the garbage collections of the measured generations, attributed to the token intervals they fell in
+            self.report.per_token.allocation = self.per_token_latency_tracker.get_per_token_allocation()
+
+    ## Concurrency levels latency tracking
+    def run_concurrency_levels_latency_tracking(self):
+        for level in self.concurrency_levels:
+            self.logger.info(f"\t+ Running Text Generation latency tracking with {level} requests in flight")
+            # the same server is swept by only changing the client-side limit of the requests in flight
+            generate_kwargs = {**self.config.generate_kwargs, "max_in_flight_requests": level}
+
+            with self.per_token_latency_tracker.session(), self.per_request_latency_tracker.session():
+                while (
+                    self.per_token_latency_tracker.elapsed() < self.config.duration
+                    or self.per_token_latency_tracker.count() < self.config.iterations
+                ):
+                    inputs = self.next_inputs()
+                    with self.per_token_latency_tracker.track():
+                        self.backend.generate(inputs, generate_kwargs)
+
+            generate_latency = self.per_token_latency_tracker.get_generate_latency()
+            level_target = getattr(self.report, f"concurrency_{level}")
+            time_to_first_token_target = getattr(self.report, f"concurrency_{level}_time_to_first_token")
+
+            # the per-request latencies, and the generated tokens of the batches over their duration
+            level_target.latency = self.per_request_latency_tracker.get_request_latency()
+            level_target.throughput = Throughput.from_latency(
+                generate_latency,
+                self.per_request_latency_tracker.get_num_tokens() / generate_latency.count,
+                unit=DECODE_THROUGHPUT_UNIT,
+            )
+            time_to_first_token_target.latency = self.per_request_latency_tracker.get_time_to_first_token_latency()
+
     ## Text Generation latency tracking
     def run_text_generation_latency_tracking(self):
         self.logger.info("\t+ Running Text Generation latency tracking")
@@ -283,8 +519,9 @@ class InferenceScenario(Scenario[InferenceConfig]):
                 self.latency_tracker.elapsed() < self.config.duration
                 or self.latency_tracker.count() < self.config.iterations
             ):
+                inputs = self.next_inputs()
                 with self.latency_tracker.track():
-                    self.backend.prefill(self.inputs, prefill_kwargs)
+                    self.backend.prefill(inputs, prefill_kwargs)
 
         prefill_latency = self.latency_tracker.get_latency()
 
@@ -298,8 +535,9 @@ class InferenceScenario(Scenario[InferenceConfig]):
                 self.latency_tracker.elapsed() < self.config.duration
                 or self.latency_tracker.count() < self.config.iterations
             ):
+                inputs = self.next_inputs()
                 with self.latency_tracker.track():
-                    self.backend.generate(self.inputs, self.config.generate_kwargs)
+                    self.backend.generate(inputs, self.config.generate_kwargs)
 
         generate_latency = self.latency_tracker.get_latency()
         decode_latency = generate_latency - prefill_latency
@@ -309,6 +547,148 @@ class InferenceScenario(Scenario[InferenceConfig]):
             decode_latency, self.atomic_decode_volume, unit=DECODE_THROUGHPUT_UNIT
         )
 
+    ## Speculative Text Generation latency tracking
+    def run_speculative_text_generation_latency_tracking(self):
+        self.logger.info("\t+ Running Speculative Text Generation latency tracking")
+
+        prefill_kwargs = {**self.config.generate_kwargs, **TEXT_GENERATION_PREFILL_OVERRIDES}
+
+        with self.latency_tracker.session():
+            while (
+                self.latency_tracker.elapsed() < self.config.duration
+                or self.latency_tracker.count() < self.config.iterations
+            ):
+                inputs = self.next_inputs()
+                with self.latency_tracker.track():
+                    self.backend.prefill(inputs, prefill_kwargs)
+
+        prefill_latency = self.latency_tracker.get_latency()
+
+        self.report.prefill.latency = prefill_latency
+        self.report.prefill.throughput = Throughput.from_latency(
+            prefill_latency, self.atomic_prefill_volume, unit=PREFILL_THROUGHPUT_UNIT
+        )
+
+        with self.speculative_decoding_tracker.session(
+            target_model=self.backend.pretrained_model, draft_model=self.backend.assistant_model
+        ):
+            while (
+                self.speculative_decoding_tracker.elapsed() < self.config.duration
+                or self.speculative_decoding_tracker.count() < self.config.iterations
+            ):
+                inputs = self.next_inputs()
+                with self.speculative_decoding_tracker.track():
+                    self.backend.generate(inputs, self.config.generate_kwargs)
+
+        generate_latency = self.speculative_decoding_tracker.get_generate_latency()
+        decode_latency = generate_latency - prefill_latency
+
+        self.report.decode.latency = decode_latency
+        self.report.decode.throughput = Throughput.from_latency(
+            decode_latency, self.atomic_decode_volume, unit=DECODE_THROUGHPUT_UNIT
+        )
+        self.report.decode.speculation = self.speculative_decoding_tracker.get_speculation(
+            new_tokens=self.config.generate_kwargs["max_new_tokens"]
+        )
+
+        self.report.draft_step.latency = self.speculative_decoding_tracker.get_draft_step_latency()
+        self.report.verify_step.latency = self.speculative_decoding_tracker.get_verify_step_latency()
+
+    ## Multi-Turn Text Generation tracking
+    def run_multi_turn_text_generation_tracking(self):
+        self.logger.info("\t+ Running Multi-Turn Text Generation tracking")
+
+        prefill_kwargs = {**self.config.generate_kwargs, **TEXT_GENERATION_PREFILL_OVERRIDES}
+        turn_inputs, past_key_values = self.inputs, None
+
+        for turn in range(self.config.num_turns):
+            self.logger.info(f"\t+ Tracking turn {turn} with a context of {turn_inputs['input_ids'].shape[1]} tokens")
+            turn_target = getattr(self.report, f"prefill_turn_{turn}")
+
+            if self.config.latency:
+                with self.latency_tracker.session():
+                    while (
+                        self.latency_tracker.elapsed() < self.config.duration
+                        or self.latency_tracker.count() < self.config.iterations
+                    ):
+                        turn_prefill_kwargs = self.get_turn_kwargs(prefill_kwargs, past_key_values)
+                        with self.latency_tracker.track():
+                            self.backend.prefill(turn_inputs, turn_prefill_kwargs)
+
+                prefill_latency = self.latency_tracker.get_latency()
+
+                # later turns only prefill the tokens that aren't in the reused cache, so the throughput is in tokens
+                turn_target.latency = prefill_latency
+                turn_target.throughput = Throughput.from_latency(
+                    prefill_latency,
+                    self.get_turn_prefill_volume(turn_inputs, past_key_values),
+                    unit=TURN_PREFILL_THROUGHPUT_UNIT,
+                )
+
+            if self.config.memory:
+                turn_prefill_kwargs = self.get_turn_kwargs(prefill_kwargs, past_key_values)
+                with self.memory_tracker.track():
+                    self.backend.prefill(turn_inputs, turn_prefill_kwargs)
+
+                turn_target.memory = self.memory_tracker.get_max_memory()
+
+            if turn < self.config.num_turns - 1:
+                turn_inputs, past_key_values = self.get_next_turn(turn_inputs, past_key_values)
+
+    def get_turn_kwargs(self, kwargs: Dict[str, Any], past_key_values: Optional[Any]) -> Dict[str, Any]:
+        if past_key_values is None:
+            return kwargs
+
+        # the cache is updated in place during generation, so every call gets its own copy of the previous turn's cache.
+        # transformers doesn't allow passing both a cache and a cache implementation, the latter was already
+        # used to create the cache on the first turn.
+        return {**kwargs, "past_key_values": copy.deepcopy(past_key_values), "cache_implementation": None}
+
+    def get_turn_prefill_volume(self, turn_inputs: Dict[str, Any], past_key_values: Optional[Any]) -> int:
+        batch_size, context_length = turn_inputs["input_ids"].shape
+
+        if past_key_values is None:
+            return batch_size * context_length
+        elif hasattr(past_key_values, "get_seq_length"):
+            return batch_size * (context_length - past_key_values.get_seq_length())
+        else:  # legacy cache format, a tuple of (key, value) per layer
+            return batch_size * (context_length - past_key_values[0][0].shape[-2])
+
+    def get_next_turn(
+        self, turn_inputs: Dict[str, Any], past_key_values: Optional[Any]
+    ) -> Tuple[Dict[str, Any], Optional[Any]]:
+        turn_kwargs = self.get_turn_kwargs(self.config.generate_kwargs, past_key_values)
+
+        if self.config.reuse_cache:
+            outputs = self.backend.generate(turn_inputs, {**turn_kwargs, "return_dict_in_generate": True})
+            sequences, past_key_values = outputs.sequences, outputs.past_key_values
+        else:
+            sequences = self.backend.generate(turn_inputs, turn_kwargs)
+
+        new_inputs = InputGenerator(
+            task=self.backend.config.task,
+            model_shapes=self.backend.model_shapes,
+            model_type=self.backend.config.model_type,
+            input_shapes={**self.config.input_shapes, "sequence_length": self.config.turn_length},
+        )()
+        new_inputs = self.backend.prepare_inputs(inputs=new_inputs)
+
+        input_ids = torch.cat([sequences, new_inputs["input_ids"].to(sequences.device)], dim=1)
+
+        # the previous turns' mask is carried forward so that their padding stays masked in ragged batches
+        new_attention_mask = new_inputs.get("attention_mask", torch.ones_like(new_inputs["input_ids"]))
+        generated_attention_mask = torch.ones_like(sequences[:, turn_inputs["input_ids"].shape[1] :])
+        attention_mask = torch.cat(
+            [
+                turn_inputs.get("attention_mask", torch.ones_like(turn_inputs["input_ids"])),
+                generated_attention_mask,
+                new_attention_mask.to(sequences.device),
+            ],
+            dim=1,
+        )
+
+        return {"input_ids": input_ids, "attention_mask": attention_mask}, past_key_values
+
     def run_image_diffusion_latency_tracking(self):
         self.logger.info("\t+ Running Image Diffusion latency tracking")
 
@@ -317,8 +697,9 @@ class InferenceScenario(Scenario[InferenceConfig]):
                 self.per_step_latency_tracker.elapsed() < self.config.duration
                 or self.per_step_latency_tracker.count() < self.config.iterations
             ):
+                inputs = self.next_inputs()
                 with self.per_step_latency_tracker.track():
-                    self.backend.call(self.inputs, self.config.call_kwargs)
+                    self.backend.call(inputs, self.config.call_kwargs)
 
         call_latency = self.per_step_latency_tracker.get_call_latency()
         per_step_latency = self.per_step_latency_tracker.get_step_latency()
@@ -338,8 +719,9 @@ class InferenceScenario(Scenario[InferenceConfig]):
                 self.latency_tracker.elapsed() < self.config.duration
                 or self.latency_tracker.count() < self.config.iterations
             ):
+                inputs = self.next_inputs()
                 with self.latency_tracker.track():
-                    self.backend.forward(self.inputs, self.config.forward_kwargs)
+                    self.backend.forward(inputs, self.config.forward_kwargs)
 
         forward_latency = self.latency_tracker.get_latency()
 
@@ -348,6 +730,83 @@ class InferenceScenario(Scenario[InferenceConfig]):
             forward_latency, self.atomic_forward_volume, unit=FORWARD_THROUGHPUT_UNIT
         )
 
+    ## Harness overhead calibration
+    def run_overhead_calibration(self):
+        self.logger.info("\t+ Running harness overhead calibration")
+
+        # the same tracker and loop as latency tracking, around an empty region
+        tracker = LatencySessionTracker(device=self.backend.config.device, backend=self.backend.config.name)
+        loop_latencies = []
+
+        with tracker.session():
+            loop_start = time.perf_counter()
+            while tracker.count() < max(self.config.iterations, OVERHEAD_CALIBRATION_ITERATIONS):
+                _ = self.next_inputs()
+                with tracker.track():
+                    pass
+                loop_end = time.perf_counter()
+                loop_latencies.append(loop_end - loop_start)
+                loop_start = loop_end
+
+        self.report.overhead_track.latency = tracker.get_latency()
+        self.report.overhead_loop.latency = Latency.from_values(loop_latencies, unit=LATENCY_UNIT)
+        self.report.overhead_prepare_inputs.latency = Latency.from_values(
+            self.prepare_inputs_latencies, unit=LATENCY_UNIT
+        )
+
+        if "overhead_logits_processor" in self.report.to_dict():
+            # logits processors are called once per token, so their calls are timed in chunks
+            logits_processor = self.config.generate_kwargs["logits_processor"]
+            input_ids, chunk_size, chunk_latencies = self.inputs["input_ids"], 100, []
+
+            with self.per_token_latency_tracker.session():
+                with self.per_token_latency_tracker.track():
+                    for _ in range(OVERHEAD_CALIBRATION_ITERATIONS // chunk_size):
+                        start = time.perf_counter()
+                        for _ in range(chunk_size):
+                            logits_processor(input_ids, None)
+                        chunk_latencies.append((time.perf_counter() - start) / chunk_size)
+
+            self.report.overhead_logits_processor.latency = Latency.from_values(chunk_latencies, unit=LATENCY_UNIT)
+
+        if self.config.subtract_overhead:
+            self.subtract_overhead()
+
+    def subtract_overhead(self):
+        self.logger.info("\t+ Subtracting the harness overhead from the tracked latencies")
+
+        track_overhead = self.report.overhead_track.latency.mean
+
+        # only the targets timed by the latency tracker include its overhead,
+        # in per-token mode the prefill is timed by the per-token tracker instead
+        latency_tracked_targets = [
+            ("forward", "atomic_forward_volume", FORWARD_THROUGHPUT_UNIT),
+            ("call", "atomic_call_volume", CALL_THROUGHPUT_UNIT),
+        ]
+        if "per_token" not in self.report.to_dict():
+            latency_tracked_targets.append(("prefill", "atomic_prefill_volume", PREFILL_THROUGHPUT_UNIT))
+
+        for target, volume, unit in latency_tracked_targets:
+            measurements = getattr(self.report, target, None)
+            if measurements is not None and measurements.latency is not None:
+                measurements.latency = subtract_latency_overhead(measurements.latency, track_overhead)
+                measurements.throughput = Throughput.from_latency(
+                    measurements.latency, getattr(self, volume), unit=unit
+                )
+
+        if "overhead_logits_processor" in self.report.to_dict():
+            logits_processor_overhead = self.report.overhead_logits_processor.latency.mean
+            # the decode of a generation includes a logits processor call per token after the first one
+            decode_overhead = logits_processor_overhead * (self.config.generate_kwargs["max_new_tokens"] - 1)
+
+            self.report.per_token.latency = subtract_latency_overhead(
+                self.report.per_token.latency, logits_processor_overhead
+            )
+            self.report.decode.latency = subtract_latency_overhead(self.report.decode.latency, decode_overhead)
+            self.report.decode.throughput = Throughput.from_latency(
+                self.report.decode.latency, self.atomic_decode_volume, unit=DECODE_THROUGHPUT_UNIT
+            )
+
     ## Energy tracking
     def run_text_generation_energy_tracking(self):
         self.logger.info("\t+ Running Text Generation energy tracking")
@@ -359,7 +818,7 @@ class InferenceScenario(Scenario[InferenceConfig]):
 
         with self.energy_tracker.track(task_name="prefill"):
             while elapsed < self.config.duration or count < self.config.iterations:
-                self.backend.prefill(self.inputs, prefill_kwargs)
+                self.backend.prefill(self.next_inputs(), prefill_kwargs)
                 elapsed = time.perf_counter() - start_time
                 count += 1
 
@@ -376,7 +835,7 @@ class InferenceScenario(Scenario[InferenceConfig]):
 
         with self.energy_tracker.track(task_name="generate"):
             while elapsed < self.config.duration or count < self.config.iterations:
-                self.backend.generate(self.inputs, self.config.generate_kwargs)
+                self.backend.generate(self.next_inputs(), self.config.generate_kwargs)
                 elapsed = time.perf_counter() - start_time
                 count += 1
 
@@ -397,7 +856,7 @@ class InferenceScenario(Scenario[InferenceConfig]):
 
         with self.energy_tracker.track(task_name="call"):
             while elapsed < self.config.duration or count < self.config.iterations:
-                self.backend.call(self.inputs, self.config.call_kwargs)
+                self.backend.call(self.next_inputs(), self.config.call_kwargs)
                 elapsed = time.perf_counter() - start_time
                 count += 1
 
@@ -417,7 +876,7 @@ class InferenceScenario(Scenario[InferenceConfig]):
 
         with self.energy_tracker.track(task_name="forward"):
             while elapsed < self.config.duration or count < self.config.iterations:
-                self.backend.forward(self.inputs, self.config.forward_kwargs)
+                self.backend.forward(self.next_inputs(), self.config.forward_kwargs)
                 elapsed = time.perf_counter() - start_time
                 count += 1
 
@@ -428,6 +887,265 @@ class InferenceScenario(Scenario[InferenceConfig]):
             forward_energy, self.atomic_forward_volume, unit=FORWARD_EFFICIENCY_UNIT
         )
 
+    ## CPU usage tracking
+    def run_text_generation_cpu_usage_tracking(self):
+        self.logger.info("\t+ Running Text Generation cpu usage tracking")
+        prefill_kwargs = {**self.config.generate_kwargs, **TEXT_GENERATION_PREFILL_OVERRIDES}
+
+        count = 0
+        elapsed = 0
+        start_time = time.perf_counter()
+
+        with self.cpu_usage_tracker.track():
+            while elapsed < self.config.duration or count < self.config.iterations:
+                self.backend.prefill(self.next_inputs(), prefill_kwargs)
+                elapsed = time.perf_counter() - start_time
+                count += 1
+
+        self.report.prefill.cpu_usage = self.cpu_usage_tracker.get_cpu_usage()
+
+        count = 0
+        elapsed = 0
+        start_time = time.perf_counter()
+
+        # utilizations can't be subtracted like latencies, so the decode usage is that of whole generations
+        with self.cpu_usage_tracker.track():
+            while elapsed < self.config.duration or count < self.config.iterations:
+                self.backend.generate(self.next_inputs(), self.config.generate_kwargs)
+                elapsed = time.perf_counter() - start_time
+                count += 1
+
+        self.report.decode.cpu_usage = self.cpu_usage_tracker.get_cpu_usage()
+
+    def run_image_diffusion_cpu_usage_tracking(self):
+        self.logger.info("\t+ Running Image Diffusion cpu usage tracking")
+
+        count = 0
+        elapsed = 0
+        start_time = time.perf_counter()
+
+        with self.cpu_usage_tracker.track():
+            while elapsed < self.config.duration or count < self.config.iterations:
+                self.backend.call(self.next_inputs(), self.config.call_kwargs)
+                elapsed = time.perf_counter() - start_time
+                count += 1
+
+        self.report.call.cpu_usage = self.cpu_usage_tracker.get_cpu_usage()
+
+    def run_inference_cpu_usage_tracking(self):
+        self.logger.info("\t+ Running Inference cpu usage tracking")
+
+        count = 0
+        elapsed = 0
+        start_time = time.perf_counter()
+
+        with self.cpu_usage_tracker.track():
+            while elapsed < self.config.duration or count < self.config.iterations:
+                self.backend.forward(self.next_inputs(), self.config.forward_kwargs)
+                elapsed = time.perf_counter() - start_time
+                count += 1
+
+        self.report.forward.cpu_usage = self.cpu_usage_tracker.get_cpu_usage()
+
+    ## Perf counters tracking
+    def run_text_generation_perf_counters_tracking(self):
+        self.logger.info("\t+ Running Text Generation perf counters tracking")
+        prefill_kwargs = {**self.config.generate_kwargs, **TEXT_GENERATION_PREFILL_OVERRIDES}
+
+        count = 0
+        elapsed = 0
+        start_time = time.perf_counter()
+
+        with self.perf_counters_tracker.track():
+            while elapsed < self.config.duration or count < self.config.iterations:
+                self.backend.prefill(self.next_inputs(), prefill_kwargs)
+                elapsed = time.perf_counter() - start_time
+                count += 1
+
+        self.report.prefill.perf_counters = self.perf_counters_tracker.get_perf_counters(iterations=count)
+
+        count = 0
+        elapsed = 0
+        start_time = time.perf_counter()
+
+        # ratios can't be subtracted like latencies, so the decode counters are those of whole generations
+        with self.perf_counters_tracker.track():
+            while elapsed < self.config.duration or count < self.config.iterations:
+                self.backend.generate(self.next_inputs(), self.config.generate_kwargs)
+                elapsed = time.perf_counter() - start_time
+                count += 1
+
+        self.report.decode.perf_counters = self.perf_counters_tracker.get_perf_counters(iterations=count)
+
+    def run_image_diffusion_perf_counters_tracking(self):
+        self.logger.info("\t+ Running Image Diffusion perf counters tracking")
+
+        count = 0
+        elapsed = 0
+        start_time = time.perf_counter()
+
+        with self.perf_counters_tracker.track():
+            while elapsed < self.config.duration or count < self.config.iterations:
+                self.backend.call(self.next_inputs(), self.config.call_kwargs)
+                elapsed = time.perf_counter() - start_time
+                count += 1
+
+        self.report.call.perf_counters = self.perf_counters_tracker.get_perf_counters(iterations=count)
+
+    def run_inference_perf_counters_tracking(self):
+        self.logger.info("\t+ Running Inference perf counters tracking")
+
+        count = 0
+        elapsed = 0
+        start_time = time.perf_counter()
+
+        with self.perf_counters_tracker.track():
+            while elapsed < self.config.duration or count < self.config.iterations:
+                self.backend.forward(self.next_inputs(), self.config.forward_kwargs)
+                elapsed = time.perf_counter() - start_time
+                count += 1
+
+        self.report.forward.perf_counters = self.perf_counters_tracker.get_perf_counters(iterations=count)
+
+    ## Allocation tracking
+    def run_text_generation_allocation_tracking(self):
+        self.logger.info("\t+ Running Text Generation allocation tracking")
+
+        prefill_kwargs = {**self.config.generate_kwargs, **TEXT_GENERATION_PREFILL_OVERRIDES}
+
+        with self.allocation_tracker.session():
+            while (
+                self.allocation_tracker.elapsed() < self.config.duration
+                or self.allocation_tracker.count() < self.config.iterations
+            ):
+                inputs = self.next_inputs()
+                with self.allocation_tracker.track():
+                    self.backend.prefill(inputs, prefill_kwargs)
+
+        self.report.prefill.allocation = self.allocation_tracker.get_allocation()
+
+        # the generate kwargs include the per-token latency tracker when enabled, so its allocations are counted
+        with self.allocation_tracker.session():
+            while (
+                self.allocation_tracker.elapsed() < self.config.duration
+                or self.allocation_tracker.count() < self.config.iterations
+            ):
+                inputs = self.next_inputs()
+                with self.allocation_tracker.track():
+                    self.backend.generate(inputs, self.config.generate_kwargs)
+
+        self.report.decode.allocation = self.allocation_tracker.get_allocation()
+
+    def run_image_diffusion_allocation_tracking(self):
+        self.logger.info("\t+ Running Image Diffusion allocation tracking")
+
+        with self.allocation_tracker.session():
+            while (
+                self.allocation_tracker.elapsed() < self.config.duration
+                or self.allocation_tracker.count() < self.config.iterations
+            ):
+                inputs = self.next_inputs()
+                with self.allocation_tracker.track():
+                    self.backend.call(inputs, self.config.call_kwargs)
+
+        self.report.call.allocation = self.allocation_tracker.get_allocation()
+
+    def run_inference_allocation_tracking(self):
+        self.logger.info("\t+ Running Inference allocation tracking")
+
+        with self.allocation_tracker.session():
+            while (
+                self.allocation_tracker.elapsed() < self.config.duration
+                or self.allocation_tracker.count() < self.config.iterations
+            ):
+                inputs = self.next_inputs()
+                with self.allocation_tracker.track():
+                    self.backend.forward(inputs, self.config.forward_kwargs)
+
+        self.report.forward.allocation = self.allocation_tracker.get_allocation()
+
+    ## torch.profiler profiling
+    def run_torch_profiling(self):
+        self.logger.info("\t+ Running torch.profiler profiling")
+
+        for phase in self.config.torch_profiler_phases:
+            torch_profiler = TorchProfiler(
+                phase=phase,
+                device=self.backend.config.device,
+                output_dir=self.config.torch_profiler_dir,
+                schedule=self.config.torch_profiler_schedule,
+                profiler_kwargs=self.config.torch_profiler_kwargs,
+            )
+
+            with torch_profiler.profile() as profiler:
+                for _ in range(torch_profiler.num_steps):
+                    self.profiled_phases[phase](self.next_inputs())
+                    profiler.step()
+
+    ## Stack sampling profiling
+    def run_stack_profiling(self):
+        self.logger.info("\t+ Running stack sampling profiling")
+
+        # a dedicated pass over the same calls as the tracked ones, as the sampling signal handler would
+        # otherwise inflate the latencies measured while it runs
+        for phase, call in self.profiled_phases.items():
+            stack_profiler = StackSamplingProfiler(
+                name=phase, output_dir=self.config.stack_profiler_dir, interval=self.config.stack_profiler_interval
+            )
+
+            with stack_profiler.profile():
+                start_time, count = time.perf_counter(), 0
+                while time.perf_counter() - start_time < self.config.duration or count < self.config.iterations:
+                    call(self.next_inputs())
+                    count += 1
+
+    @property
+    def profiled_phases(self) -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+        # the same calls as the tracked ones, decode being profiled as a whole generation
+        if self.backend.config.task in TEXT_GENERATION_TASKS:
+            prefill_kwargs = {**self.config.generate_kwargs, **TEXT_GENERATION_PREFILL_OVERRIDES}
+            return {
+                "prefill": lambda inputs: self.backend.prefill(inputs, prefill_kwargs),
+                "decode": lambda inputs: self.backend.generate(inputs, self.config.generate_kwargs),
+            }
+        elif self.backend.config.task in IMAGE_DIFFUSION_TASKS:
+            return {"call": lambda inputs: self.backend.call(inputs, self.config.call_kwargs)}
+        else:
+            return {"forward": lambda inputs: self.backend.forward(inputs, self.config.forward_kwargs)}
+
+    def next_inputs(self) -> Dict[str, Any]:
+        # cycling through the input pool, a pool of size 1 always returns the same batch
+        self.input_index = (self.input_index + 1) % len(self.input_pool)
+        return self.input_pool[self.input_index]
+
+    @property
+    def is_multi_turn(self) -> bool:
+        return self.backend.config.task in TEXT_GENERATION_TASKS and self.config.num_turns > 1
+
+    @property
+    def is_served_in_waves(self) -> bool:
+        # per-request backends send fewer concurrent requests than the batch size when they're limited
+        return (
+            self.backend.config.task in TEXT_GENERATION_TASKS
+            and self.backend.config.name in PER_REQUEST_BACKENDS
+            and self.backend.serves_in_waves(self.config.input_shapes["batch_size"])
+        )
+
+    @property
+    def concurrency_levels(self) -> List[int]:
+        # per-request backends can sweep client-side concurrency levels against the same server
+        if self.backend.config.task in TEXT_GENERATION_TASKS and self.backend.config.name in PER_REQUEST_BACKENDS:
+            return getattr(self.backend.config, "concurrency_levels", None) or []
+
+        return []
+
+    @property
+    def is_speculative(self) -> bool:
+        return (
+            self.backend.config.task in TEXT_GENERATION_TASKS
+            and getattr(self.backend.config, "assistant_model", None) is not None
+        )
+
     @property
     def atomic_forward_volume(self) -> int:  # in terms of processed samples
         return self.config.input_shapes["batch_size"]
@@ -450,3 +1168,8 @@ class InferenceScenario(Scenario[InferenceConfig]):
             return self.config.input_shapes["batch_size"] * self.config.call_kwargs["num_images_per_prompt"]
         else:
             return self.config.input_shapes["batch_size"]
+
+
+def subtract_latency_overhead(latency: Latency, overhead: float) -> Latency:
+    # latencies of the order of the overhead can end up below its mean, they are clipped to zero
+    return Latency.from_values([max(value - overhead, 0.0) for value in latency.values], unit=latency.unit)
@@ -0,0 +1,106 @@
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any, Dict, List
+
+from ..config import ScenarioConfig
+
+LOGGER = getLogger("long_context")
+
+
+@dataclass
+class LongContextConfig(ScenarioConfig):
+    name: str = "long_context"
+    _target_: str = "optimum_benchmark.scenarios.long_context.scenario.LongContextScenario"
+
+    # benchmark options
+    iterations: int = field(
+        default=3,
+        metadata={
+            "help": "Minimum number of iterations to run at each sequence length. "
+            "Set to 0 to disable this constraint (benchmark will run for `duration` seconds)."
+        },
+    )
+    duration: int = field(
+        default=0,
+        metadata={
+            "help": "Minimum duration in seconds to run at each sequence length. "
+            "Set to 0 to disable this constraint (benchmark will run for `iterations` iterations)."
+        },
+    )
+    warmup_runs: int = field(
+        default=1,
+        metadata={"help": "Number of warmup runs to perform at each sequence length before benchmarking."},
+    )
+
+    # ramp options
+    min_sequence_length: int = field(default=512, metadata={"help": "Sequence length to start the ramp from."})
+    max_sequence_length: int = field(default=131072, metadata={"help": "Sequence length to stop the ramp at."})
+    growth_factor: float = field(
+        default=2.0, metadata={"help": "Factor by which the sequence length is multiplied at each step of the ramp."}
+    )
+
+    # input/output config
+    input_shapes: Dict[str, Any] = field(
+        default_factory=dict,
+        metadata={"help": "Input shapes for the model (except `sequence_length` which is ramped)."},
+    )
+
+    # tracking options
+    memory: bool = field(default=True, metadata={"help": "Measure max memory usage"})
+    latency: bool = field(default=True, metadata={"help": "Measure latencies and throughputs"})
+
+    # output options
+    scaling_fit_dir: str = field(
+        default="long_context",
+        metadata={"help": "Directory where the prefill latency scaling curve fit is saved, next to the report."},
+    )
+
+    # methods kwargs
+    generate_kwargs: Dict[str, Any] = field(
+        default_factory=dict, metadata={"help": "Keyword arguments to pass to the generate method of the backend."}
+    )
+
+    def __post_init__(self):
+        super().__post_init__()
+
+        self.input_shapes = {"batch_size": 1, **self.input_shapes}
+
+        if "sequence_length" in self.input_shapes:
+            LOGGER.warning(
+                "`input_shapes.sequence_length` is ignored by the long context scenario. "
+                "Use `min_sequence_length` and `max_sequence_length` instead."
+            )
+            self.input_shapes.pop("sequence_length")
+
+        if self.min_sequence_length < 1 or self.min_sequence_length > self.max_sequence_length:
+            raise ValueError(
+                "`min_sequence_length` must be positive and smaller than `max_sequence_length`, "
+                f"but got {self.min_sequence_length} and {self.max_sequence_length}."
+            )
+
+        if self.growth_factor <= 1:
+            raise ValueError(f"`growth_factor` must be greater than 1, but got {self.growth_factor}.")
+
+        if not (self.latency or self.memory):
+            raise ValueError("At least one of `latency` and `memory` must be enabled.")
+
+        if "max_new_tokens" in self.generate_kwargs and "min_new_tokens" not in self.generate_kwargs:
+            self.generate_kwargs["min_new_tokens"] = self.generate_kwargs["max_new_tokens"]
+        elif "min_new_tokens" in self.generate_kwargs and "max_new_tokens" not in self.generate_kwargs:
+            self.generate_kwargs["max_new_tokens"] = self.generate_kwargs["min_new_tokens"]
+
+        if self.generate_kwargs.get("max_new_tokens") != self.generate_kwargs.get("min_new_tokens"):
+            raise ValueError(
+                "Setting `min_new_tokens` and `max_new_tokens` to different values results in non-deterministic behavior."
+            )
+
+    @property
+    def sequence_lengths(self) -> List[int]:
+        sequence_lengths = []
+        sequence_length = self.min_sequence_length
+
+        while sequence_length <= self.max_sequence_length:
+            sequence_lengths.append(int(sequence_length))
+            sequence_length = max(int(sequence_length * self.growth_factor), int(sequence_length) + 1)
+
+        return sequence_lengths
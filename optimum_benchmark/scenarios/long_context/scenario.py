@@ -0,0 +1,285 @@
+import gc
+import json
+import os
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import torch
+
+from ...backends.base import Backend, BackendConfigT
+from ...benchmark.report import BenchmarkReport, TargetMeasurements
+from ...generators.input_generator import InputGenerator
+from ...task_utils import TEXT_GENERATION_TASKS
+from ...trackers.latency import Latency, LatencySessionTracker, Throughput
+from ...trackers.memory import MemoryTracker
+from ..base import Scenario
+from .config import LongContextConfig
+
+TEXT_GENERATION_DEFAULT_KWARGS = {
+    "num_return_sequences": 1,
+    "max_new_tokens": 32,
+    "min_new_tokens": 32,
+    "do_sample": False,
+    "use_cache": True,
+    "num_beams": 1,
+}
+TEXT_GENERATION_PREFILL_OVERRIDES = {
+    "max_new_tokens": 1,
+    "min_new_tokens": 1,
+}
+
+PREFILL_THROUGHPUT_UNIT = "tokens/s"
+DECODE_THROUGHPUT_UNIT = "tokens/s"
+
+# a sequence length is considered a throughput collapse when its
+# prefill throughput drops below this fraction of the best one
+THROUGHPUT_COLLAPSE_RATIO = 0.5
+
+OUT_OF_MEMORY_MESSAGES = ["out of memory", "can't allocate memory", "failed to allocate memory"]
+
+
+class LongContextScenario(Scenario[LongContextConfig]):
+    NAME = "long_context"
+
+    def __init__(self, config: LongContextConfig) -> None:
+        super().__init__(config)
+
+    def run(self, backend: Backend[BackendConfigT]) -> BenchmarkReport:
+        self.backend = backend
+
+        if self.backend.config.task not in TEXT_GENERATION_TASKS:
+            raise ValueError(
+                f"Long context scenario only supports text generation tasks, got {self.backend.config.task}"
+            )
+
+        self.logger.info("\t+ Updating Text Generation kwargs with default values")
+        self.config.generate_kwargs = {**TEXT_GENERATION_DEFAULT_KWARGS, **self.config.generate_kwargs}
+        self.prefill_kwargs = {**self.config.generate_kwargs, **TEXT_GENERATION_PREFILL_OVERRIDES}
+
+        if self.config.latency:
+            self.logger.info("\t+ Initializing Latency tracker")
+            self.latency_tracker = LatencySessionTracker(
+                device=self.backend.config.device, backend=self.backend.config.name
+            )
+
+        if self.config.memory:
+            self.logger.info("\t+ Initializing Memory tracker")
+            self.memory_tracker = MemoryTracker(
+                backend=self.backend.config.name,
+                device=self.backend.config.device,
+                device_ids=self.backend.config.device_ids,
+            )
+
+        self.targets: Dict[str, TargetMeasurements] = {}
+        self.run_model_loading_tracking()
+
+        max_position_embeddings = self.backend.model_shapes.get("max_position_embeddings", None)
+        max_new_tokens = self.config.generate_kwargs["max_new_tokens"]
+
+        for sequence_length in self.config.sequence_lengths:
+            if max_position_embeddings is not None and sequence_length + max_new_tokens > max_position_embeddings:
+                self.logger.warning(
+                    f"\t+ Stopping the ramp at sequence length {sequence_length}, "
+                    f"it exceeds the model's maximum position embeddings ({max_position_embeddings})"
+                )
+                break
+
+            try:
+                self.run_sequence_length_tracking(sequence_length)
+            except Exception as error:
+                if not is_out_of_memory_error(error):
+                    raise error
+
+                self.logger.warning(f"\t+ Stopping the ramp at sequence length {sequence_length}, ran out of memory")
+                self.targets.pop(f"prefill_{sequence_length}", None)
+                self.targets.pop(f"decode_{sequence_length}", None)
+                self.inputs = None
+                break
+
+        # out of the except block, the error's traceback no longer holds the tensors of the failed sequence length
+        free_memory()
+
+        self.report = BenchmarkReport.from_dict(self.targets)
+
+        if self.config.latency:
+            self.save_scaling_fit()
+
+        return self.report
+
+    # Model loading tracking
+    def run_model_loading_tracking(self):
+        self.logger.info("\t+ Running model loading tracking")
+
+        with ExitStack() as context_stack:
+            if self.config.memory:
+                context_stack.enter_context(self.memory_tracker.track())
+            if self.config.latency:
+                context_stack.enter_context(self.latency_tracker.session())
+                context_stack.enter_context(self.latency_tracker.track())
+
+            self.backend.load()
+
+        self.targets["load_model"] = TargetMeasurements()
+
+        if self.config.latency:
+            self.targets["load_model"].latency = self.latency_tracker.get_latency()
+        if self.config.memory:
+            self.targets["load_model"].memory = self.memory_tracker.get_max_memory()
+
+    # Sequence length tracking
+    def run_sequence_length_tracking(self, sequence_length: int):
+        self.logger.info(f"\t+ Running tracking for sequence length {sequence_length}")
+
+        prefill_target = self.targets[f"prefill_{sequence_length}"] = TargetMeasurements()
+        decode_target = self.targets[f"decode_{sequence_length}"] = TargetMeasurements()
+
+        self.inputs = InputGenerator(
+            task=self.backend.config.task,
+            model_shapes=self.backend.model_shapes,
+            model_type=self.backend.config.model_type,
+            input_shapes={**self.config.input_shapes, "sequence_length": sequence_length},
+        )()
+        self.inputs = self.backend.prepare_inputs(inputs=self.inputs)
+
+        # warmup runs also probe for out of memory errors before any tracker is started
+        for _ in range(self.config.warmup_runs):
+            self.backend.generate(self.inputs, self.config.generate_kwargs)
+
+        if self.config.latency:
+            prefill_latency = self.track_latency(self.backend.prefill, self.prefill_kwargs)
+            generate_latency = self.track_latency(self.backend.generate, self.config.generate_kwargs)
+            decode_latency = generate_latency - prefill_latency
+
+            prefill_target.latency = prefill_latency
+            prefill_target.throughput = Throughput.from_latency(
+                prefill_latency, self.atomic_prefill_volume(sequence_length), unit=PREFILL_THROUGHPUT_UNIT
+            )
+            decode_target.latency = decode_latency
+            decode_target.throughput = Throughput.from_latency(
+                decode_latency, self.atomic_decode_volume, unit=DECODE_THROUGHPUT_UNIT
+            )
+
+        if self.config.memory:
+            with self.memory_tracker.track():
+                self.backend.prefill(self.inputs, self.prefill_kwargs)
+
+            prefill_target.memory = self.memory_tracker.get_max_memory()
+
+            with self.memory_tracker.track():
+                self.backend.generate(self.inputs, self.config.generate_kwargs)
+
+            decode_target.memory = self.memory_tracker.get_max_memory()
+
+    def track_latency(self, method: Callable[[Dict[str, Any], Dict[str, Any]], Any], kwargs: Dict[str, Any]) -> Latency:
+        with self.latency_tracker.session():
+            while (
+                self.latency_tracker.elapsed() < self.config.duration
+                or self.latency_tracker.count() < self.config.iterations
+            ):
+                with self.latency_tracker.track():
+                    method(self.inputs, kwargs)
+
+        return self.latency_tracker.get_latency()
+
+    # Scaling curve fitting
+    def save_scaling_fit(self, filename: str = "long_context_scaling.json"):
+        sequence_lengths = [
+            int(target.split("_")[-1]) for target in self.targets.keys() if target.startswith("prefill_")
+        ]
+
+        if len(sequence_lengths) == 0:
+            self.logger.warning("\t+ No sequence length fitted in memory, skipping scaling curve fitting")
+            return
+
+        prefill_latencies = [self.targets[f"prefill_{length}"].latency.mean for length in sequence_lengths]
+        prefill_throughputs = [self.targets[f"prefill_{length}"].throughput.value for length in sequence_lengths]
+        decode_throughputs = [self.targets[f"decode_{length}"].throughput.value for length in sequence_lengths]
+
+        scaling = {
+            "sequence_lengths": sequence_lengths,
+            "max_sequence_length": sequence_lengths[-1],
+            "prefill_latencies": prefill_latencies,
+            "prefill_throughputs": prefill_throughputs,
+            "decode_throughputs": decode_throughputs,
+            "collapse_sequence_length": get_collapse_sequence_length(sequence_lengths, prefill_throughputs),
+            **fit_scaling_curve(sequence_lengths, prefill_latencies),
+        }
+
+        self.logger.info(f"\t+ Prefill latency scaling is best fitted by a {scaling['best_fit']} curve")
+        path = os.path.join(self.config.scaling_fit_dir, filename)
+        self.logger.info(f"\t+ Saving scaling curve fit to {path}")
+        os.makedirs(self.config.scaling_fit_dir, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(scaling, f, indent=4)
+
+    def atomic_prefill_volume(self, sequence_length: int) -> int:  # in terms of processed tokens
+        return self.config.input_shapes["batch_size"] * sequence_length
+
+    @property
+    def atomic_decode_volume(self) -> int:  # in terms of generated tokens
+        return (
+            self.config.input_shapes["batch_size"]
+            * self.config.generate_kwargs["num_beams"]  # at each beam stage there are num_beams tokens generated
+            * (self.config.generate_kwargs["max_new_tokens"] - 1)  # 1 token is generated during prefill
+        )
+
+
+def is_out_of_memory_error(error: Exception) -> bool:
+    return isinstance(error, MemoryError) or any(message in str(error).lower() for message in OUT_OF_MEMORY_MESSAGES)
+
+
+def free_memory() -> None:
+    gc.collect()
+
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def fit_scaling_curve(sequence_lengths: List[int], latencies: List[float]) -> Dict[str, Any]:
+    """
+    Fits the prefill latency as a linear (a*L + b) and a quadratic (a*L^2 + b*L + c) function of the sequence length,
+    the quadratic term accounts for the attention cost. Returns the coefficients and the coefficient of determination
+    of each fit, as well as the share of the quadratic term in the predicted latency at the longest sequence length.
+    """
+
+    if len(sequence_lengths) < 3:
+        return {"best_fit": "insufficient_data"}
+
+    x, y = np.array(sequence_lengths, dtype=np.float64), np.array(latencies, dtype=np.float64)
+
+    linear_coefficients = np.polyfit(x, y, deg=1)
+    quadratic_coefficients = np.polyfit(x, y, deg=2)
+    linear_r2 = coefficient_of_determination(y, np.polyval(linear_coefficients, x))
+    quadratic_r2 = coefficient_of_determination(y, np.polyval(quadratic_coefficients, x))
+
+    quadratic_prediction = np.polyval(quadratic_coefficients, x[-1])
+    quadratic_share = quadratic_coefficients[0] * x[-1] ** 2 / quadratic_prediction if quadratic_prediction > 0 else 0
+
+    # the quadratic fit always has a better r2, so it is only preferred when its quadratic term is significant
+    best_fit = "quadratic" if quadratic_coefficients[0] > 0 and quadratic_share > 0.1 else "linear"
+
+    return {
+        "best_fit": best_fit,
+        "linear_coefficients": linear_coefficients.tolist(),
+        "linear_r2": linear_r2,
+        "quadratic_coefficients": quadratic_coefficients.tolist(),
+        "quadratic_r2": quadratic_r2,
+        "quadratic_share": float(quadratic_share),
+    }
+
+
+def coefficient_of_determination(y: np.ndarray, y_pred: np.ndarray) -> float:
+    ss_res = np.sum((y - y_pred) ** 2)
+    ss_tot = np.sum((y - np.mean(y)) ** 2)
+    return float(1 - ss_res / ss_tot) if ss_tot > 0 else 1.0
+
+
+def get_collapse_sequence_length(sequence_lengths: List[int], throughputs: List[float]):
+    max_throughput = max(throughputs)
+
+    for sequence_length, throughput in zip(sequence_lengths, throughputs):
+        if throughput < THROUGHPUT_COLLAPSE_RATIO * max_throughput:
+            return sequence_length
+
+    return None
@@ -0,0 +1,73 @@
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any, Dict
+
+from ..config import ScenarioConfig
+
+LOGGER = getLogger("pipeline")
+
+INPUT_SHAPES = {
+    "batch_size": 1,
+    "sequence_length": 16,  # in tokens, for text inputs
+    "height": 224,  # in pixels, for image inputs
+    "width": 224,  # in pixels, for image inputs
+    "audio_sequence_length": 16000,  # in samples, for audio inputs
+}
+
+
+@dataclass
+class PipelineConfig(ScenarioConfig):
+    name: str = "pipeline"
+    _target_: str = "optimum_benchmark.scenarios.pipeline.scenario.PipelineScenario"
+
+    # benchmark options
+    iterations: int = field(
+        default=10,
+        metadata={
+            "help": "Minimum number of requests to run through the pipeline. "
+            "Set to 0 to disable this constraint (benchmark will run for `duration` seconds)."
+        },
+    )
+    duration: int = field(
+        default=10,
+        metadata={
+            "help": "Minimum duration in seconds of the benchmark. "
+            "Set to 0 to disable this constraint (benchmark will run for `iterations` requests)."
+        },
+    )
+    warmup_runs: int = field(
+        default=10,
+        metadata={"help": "Number of requests to run through the pipeline before benchmarking."},
+    )
+
+    # input config
+    input_shapes: Dict[str, Any] = field(
+        default_factory=dict,
+        metadata={"help": "Shapes of the raw inputs. Missing keys will be filled with default values."},
+    )
+
+    # methods kwargs
+    processor_kwargs: Dict[str, Any] = field(
+        default_factory=dict, metadata={"help": "Keyword arguments to pass to the __call__ method of the processor."}
+    )
+    forward_kwargs: Dict[str, Any] = field(
+        default_factory=dict, metadata={"help": "Keyword arguments to pass to the forward method of the backend."}
+    )
+    generate_kwargs: Dict[str, Any] = field(
+        default_factory=dict, metadata={"help": "Keyword arguments to pass to the generate method of the backend."}
+    )
+
+    def __post_init__(self):
+        super().__post_init__()
+
+        self.input_shapes = {**INPUT_SHAPES, **self.input_shapes}
+
+        if "max_new_tokens" in self.generate_kwargs and "min_new_tokens" not in self.generate_kwargs:
+            self.generate_kwargs["min_new_tokens"] = self.generate_kwargs["max_new_tokens"]
+        elif "min_new_tokens" in self.generate_kwargs and "max_new_tokens" not in self.generate_kwargs:
+            self.generate_kwargs["max_new_tokens"] = self.generate_kwargs["min_new_tokens"]
+
+        if self.generate_kwargs.get("max_new_tokens") != self.generate_kwargs.get("min_new_tokens"):
+            raise ValueError(
+                "Setting `min_new_tokens` and `max_new_tokens` to different values results in non-deterministic behavior."
+            )
@@ -0,0 +1,211 @@
+from contextlib import ExitStack, nullcontext
+from typing import Any, Dict, List
+
+import torch
+from transformers import PreTrainedTokenizerBase, ProcessorMixin
+
+from ...backends.base import Backend, BackendConfigT
+from ...benchmark.report import BenchmarkReport, TargetMeasurements
+from ...preprocessors.raw_preprocessor import generate_raw_inputs, get_processor_function, get_processor_kind
+from ...task_utils import IMAGE_DIFFUSION_TASKS, TEXT_GENERATION_TASKS
+from ...trackers.latency import Latency, LatencySessionTracker, Throughput
+from ..base import Scenario
+from .config import PipelineConfig
+
+TEXT_GENERATION_DEFAULT_KWARGS = {
+    "num_return_sequences": 1,
+    "max_new_tokens": 16,
+    "min_new_tokens": 16,
+    "do_sample": False,
+    "use_cache": True,
+    "num_beams": 1,
+}
+
+AUDIO_TASKS = [
+    "audio-xvector",
+    "audio-classification",
+    "audio-frame-classification",
+    "automatic-speech-recognition",
+]
+IMAGE_TASKS = [
+    "masked-im",
+    "image-to-text",
+    "image-to-image",
+    "mask-generation",
+    "object-detection",
+    "depth-estimation",
+    "image-segmentation",
+    "image-classification",
+    "semantic-segmentation",
+]
+
+PIPELINE_THROUGHPUT_UNIT = "samples/s"
+
+
+class PipelineScenario(Scenario[PipelineConfig]):
+    NAME = "pipeline"
+
+    def __init__(self, config: PipelineConfig) -> None:
+        super().__init__(config)
+
+    def run(self, backend: Backend[BackendConfigT]) -> BenchmarkReport:
+        self.backend = backend
+
+        if self.backend.config.task in IMAGE_DIFFUSION_TASKS:
+            raise ValueError(f"Pipeline scenario doesn't support image diffusion tasks, got {self.backend.config.task}")
+
+        if self.backend.pretrained_processor is None:
+            raise ValueError(
+                f"Pipeline scenario requires a pretrained processor, but none was found for {self.backend.config.processor}"
+            )
+
+        # the model stage is a generate call for text generation tasks, but it's reported as `forward` for every
+        # task so that the stages of a pipeline report are always preprocess, forward and postprocess
+        self.generative = self.backend.config.task in TEXT_GENERATION_TASKS
+
+        if self.generative:
+            self.logger.info("\t+ Updating Text Generation kwargs with default values")
+            self.config.generate_kwargs = {**TEXT_GENERATION_DEFAULT_KWARGS, **self.config.generate_kwargs}
+
+        self.logger.info("\t+ Initializing pipeline stages")
+        self.input_processor = self.get_input_processor()
+        self.tokenizer = self.get_output_tokenizer()
+        self.id2label = getattr(self.backend.pretrained_config, "id2label", None) or {}
+        self.preprocess = get_processor_function(self.input_processor, self.config.processor_kwargs)
+
+        self.logger.info("\t+ Generating raw inputs")
+        self.raw_inputs = generate_raw_inputs(self.input_processor, self.config.input_shapes)
+
+        self.logger.info("\t+ Initializing Latency trackers")
+        # all the stages are timed on the host, as the requests of a user would be, and the device is synchronized
+        # at the end of the model stage so that the postprocessing doesn't absorb the device's queued work
+        self.preprocess_tracker = LatencySessionTracker(device="cpu", backend=self.backend.config.name)
+        self.model_tracker = LatencySessionTracker(device="cpu", backend=self.backend.config.name)
+        self.postprocess_tracker = LatencySessionTracker(device="cpu", backend=self.backend.config.name)
+
+        self.logger.info("\t+ Loading model")
+        self.backend.load()
+
+        self.logger.info("\t+ Warming up the pipeline")
+        for _ in range(self.config.warmup_runs):
+            self.run_request(tracked=False)
+
+        self.logger.info("\t+ Running pipeline latency tracking")
+        with ExitStack() as context_stack:
+            context_stack.enter_context(self.preprocess_tracker.session())
+            context_stack.enter_context(self.model_tracker.session())
+            context_stack.enter_context(self.postprocess_tracker.session())
+
+            while (
+                self.preprocess_tracker.elapsed() < self.config.duration
+                or self.preprocess_tracker.count() < self.config.iterations
+            ):
+                self.run_request(tracked=True)
+
+            preprocess_latency = self.preprocess_tracker.get_latency()
+            model_latency = self.model_tracker.get_latency()
+            postprocess_latency = self.postprocess_tracker.get_latency()
+
+        end_to_end_latency = Latency.from_values(
+            [
+                sum(latencies)
+                for latencies in zip(preprocess_latency.values, model_latency.values, postprocess_latency.values)
+            ],
+            unit=preprocess_latency.unit,
+        )
+
+        self.report = BenchmarkReport.from_dict(
+            {
+                "preprocess": TargetMeasurements(latency=preprocess_latency),
+                "forward": TargetMeasurements(latency=model_latency),
+                "postprocess": TargetMeasurements(latency=postprocess_latency),
+                "end_to_end": TargetMeasurements(
+                    latency=end_to_end_latency,
+                    throughput=Throughput.from_latency(
+                        end_to_end_latency, self.config.input_shapes["batch_size"], unit=PIPELINE_THROUGHPUT_UNIT
+                    ),
+                ),
+            }
+        )
+
+        host_share = 1 - model_latency.mean / end_to_end_latency.mean
+        self.logger.info(f"\t+ Host-side stages account for {host_share:.1%} of the end-to-end latency")
+
+        return self.report
+
+    def get_input_processor(self) -> Any:
+        if self.backend.config.task in AUDIO_TASKS:
+            kind = "feature_extractor"
+        elif self.backend.config.task in IMAGE_TASKS:
+            kind = "image_processor"
+        else:
+            kind = "tokenizer"
+
+        processor = self.backend.pretrained_processor
+        if isinstance(processor, ProcessorMixin):
+            processor = getattr(processor, kind, None)
+
+        if processor is None or get_processor_kind(processor) != kind:
+            raise ValueError(
+                f"Pipeline scenario requires a {kind} for task {self.backend.config.task}, "
+                f"but got {type(self.backend.pretrained_processor).__name__}"
+            )
+
+        if kind == "tokenizer" and getattr(processor, "pad_token", None) is None:
+            # Add a pad token if the tokenizer doesn't have one
+            processor.pad_token = processor.eos_token
+
+        return processor
+
+    def get_output_tokenizer(self) -> Any:
+        if self.backend.config.task not in TEXT_GENERATION_TASKS:
+            return None
+
+        tokenizer = getattr(self.backend.pretrained_processor, "tokenizer", self.backend.pretrained_processor)
+
+        if not isinstance(tokenizer, PreTrainedTokenizerBase):
+            raise ValueError(
+                f"Pipeline scenario requires a tokenizer to decode the outputs of task {self.backend.config.task}, "
+                f"but got {type(self.backend.pretrained_processor).__name__}"
+            )
+
+        return tokenizer
+
+    def run_request(self, tracked: bool):
+        with self.preprocess_tracker.track() if tracked else nullcontext():
+            inputs = self.backend.prepare_inputs(dict(self.preprocess(self.raw_inputs)))
+
+        with self.model_tracker.track() if tracked else nullcontext():
+            if self.generative:
+                outputs = self.backend.generate(inputs, self.config.generate_kwargs)
+            else:
+                outputs = self.backend.forward(inputs, self.config.forward_kwargs)
+
+            if self.backend.config.device == "cuda":
+                torch.cuda.synchronize()
+
+        with self.postprocess_tracker.track() if tracked else nullcontext():
+            self.postprocess(outputs)
+
+    def postprocess(self, outputs: Any) -> Any:
+        if self.generative:
+            return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+        if "logits" in outputs:
+            scores, ids = outputs["logits"].softmax(dim=-1).max(dim=-1)
+            return {"scores": scores.cpu().tolist(), "labels": map_labels(ids.cpu().tolist(), self.id2label)}
+
+        # embeddings (and any other hidden states) are pooled over the sequence and moved to the host
+        hidden_states = outputs[0]
+        if hidden_states.dim() == 3:
+            hidden_states = hidden_states.mean(dim=1)
+
+        return hidden_states.cpu().numpy()
+
+
+def map_labels(ids: Any, id2label: Dict[int, str]) -> List[Any]:
+    # ids are nested lists for token/pixel-level predictions
+    if isinstance(ids, list):
+        return [map_labels(i, id2label) for i in ids]
+
+    return id2label.get(ids, ids)
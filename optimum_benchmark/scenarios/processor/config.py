@@ -0,0 +1,75 @@
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any, Dict, List
+
+from ..config import ScenarioConfig
+
+LOGGER = getLogger("processor")
+
+INPUT_SHAPES = {
+    "batch_size": 1,
+    "sequence_length": 128,  # in tokens, for text inputs
+    "height": 224,  # in pixels, for image inputs
+    "width": 224,  # in pixels, for image inputs
+    "audio_sequence_length": 16000,  # in samples, for audio inputs
+}
+
+
+@dataclass
+class ProcessorConfig(ScenarioConfig):
+    name: str = "processor"
+    _target_: str = "optimum_benchmark.scenarios.processor.scenario.ProcessorScenario"
+
+    # benchmark options
+    iterations: int = field(
+        default=10,
+        metadata={
+            "help": "Minimum number of iterations to run for each processor. "
+            "Set to 0 to disable this constraint (benchmark will run for `duration` seconds)."
+        },
+    )
+    duration: int = field(
+        default=10,
+        metadata={
+            "help": "Minimum duration in seconds to run for each processor. "
+            "Set to 0 to disable this constraint (benchmark will run for `iterations` iterations)."
+        },
+    )
+    warmup_runs: int = field(
+        default=10,
+        metadata={"help": "Number of warmup runs to perform for each processor before benchmarking."},
+    )
+
+    # input config
+    input_shapes: Dict[str, Any] = field(
+        default_factory=dict,
+        metadata={"help": "Shapes of the raw inputs. Missing keys will be filled with default values."},
+    )
+
+    # processor options
+    num_threads: List[int] = field(
+        default_factory=lambda: [1],
+        metadata={
+            "help": "Numbers of threads to benchmark each processor with. "
+            "The batch is split into as many chunks, which are processed concurrently. The thread pools of the "
+            "processors themselves (the rayon pool of fast tokenizers and torch's intra-op pool) are limited to "
+            "one thread, so that each processor runs on exactly this number of threads."
+        },
+    )
+    slow_tokenizer: bool = field(
+        default=True,
+        metadata={"help": "Also benchmark the slow (python) tokenizer, when one is available for the model."},
+    )
+    processor_kwargs: Dict[str, Any] = field(
+        default_factory=dict, metadata={"help": "Keyword arguments to pass to the __call__ method of the processors."}
+    )
+
+    def __post_init__(self):
+        super().__post_init__()
+
+        self.input_shapes = {**INPUT_SHAPES, **self.input_shapes}
+
+        if len(self.num_threads) == 0 or any(num_threads < 1 for num_threads in self.num_threads):
+            raise ValueError(
+                f"`num_threads` must be a non-empty list of positive integers, but got {self.num_threads}."
+            )
@@ -0,0 +1,159 @@
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List
+
+import torch
+from transformers import AutoTokenizer, PreTrainedTokenizerBase, ProcessorMixin
+from transformers.feature_extraction_sequence_utils import SequenceFeatureExtractor
+from transformers.image_processing_utils import BaseImageProcessor
+
+from ...backends.base import Backend, BackendConfigT
+from ...benchmark.report import BenchmarkReport, TargetMeasurements
+from ...preprocessors.raw_preprocessor import generate_raw_inputs, get_processor_function, get_processor_kind
+from ...trackers.latency import LatencySessionTracker, Throughput
+from ..base import Scenario
+from .config import ProcessorConfig
+
+PROCESSOR_THROUGHPUT_UNIT = "samples/s"
+
+
+class ProcessorScenario(Scenario[ProcessorConfig]):
+    NAME = "processor"
+
+    def __init__(self, config: ProcessorConfig) -> None:
+        super().__init__(config)
+
+    def run(self, backend: Backend[BackendConfigT]) -> BenchmarkReport:
+        self.backend = backend
+
+        if self.backend.pretrained_processor is None:
+            raise ValueError(
+                f"Processor scenario requires a pretrained processor, but none was found for {self.backend.config.processor}"
+            )
+
+        self.logger.info("\t+ Initializing Latency tracker")
+        # processors run on the host, whatever the device of the model (which is never loaded by this scenario)
+        self.latency_tracker = LatencySessionTracker(device="cpu", backend=self.backend.config.name)
+
+        self.targets: Dict[str, TargetMeasurements] = {}
+
+        with disable_intra_op_parallelism():
+            for name, processor in self.get_processors().items():
+                inputs = generate_raw_inputs(processor, self.config.input_shapes)
+                function = get_processor_function(processor, self.config.processor_kwargs)
+
+                for num_threads in self.config.num_threads:
+                    self.run_processor_tracking(f"{name}_{num_threads}_threads", function, inputs, num_threads)
+
+        return BenchmarkReport.from_dict(self.targets)
+
+    def get_processors(self) -> Dict[str, Any]:
+        pretrained_processor = self.backend.pretrained_processor
+
+        if isinstance(pretrained_processor, ProcessorMixin):
+            # multimodal processors are benchmarked component by component
+            components = {
+                attribute: getattr(pretrained_processor, attribute) for attribute in pretrained_processor.attributes
+            }
+        else:
+            components = {get_processor_kind(pretrained_processor): pretrained_processor}
+
+        processors = {}
+        for name, component in components.items():
+            if isinstance(component, PreTrainedTokenizerBase):
+                processors.update(self.get_tokenizers(component))
+            elif isinstance(component, (BaseImageProcessor, SequenceFeatureExtractor)):
+                processors[name] = component
+            else:
+                self.logger.warning(f"\t+ Skipping {name} of type {type(component).__name__}, it is not supported")
+
+        return processors
+
+    def get_tokenizers(self, tokenizer: PreTrainedTokenizerBase) -> Dict[str, PreTrainedTokenizerBase]:
+        tokenizers = {f"tokenizer_{'fast' if tokenizer.is_fast else 'slow'}": tokenizer}
+
+        if self.config.slow_tokenizer and tokenizer.is_fast:
+            self.logger.info("\t+ Loading slow tokenizer")
+            try:
+                slow_tokenizer = AutoTokenizer.from_pretrained(
+                    self.backend.config.processor, use_fast=False, **self.backend.config.processor_kwargs
+                )
+            except Exception as error:
+                self.logger.warning(f"\t+ Could not load a slow tokenizer, skipping it: {error}")
+            else:
+                if slow_tokenizer.is_fast:
+                    self.logger.warning("\t+ The model has no slow tokenizer, skipping it")
+                else:
+                    tokenizers["tokenizer_slow"] = slow_tokenizer
+
+        for tokenizer in tokenizers.values():
+            if getattr(tokenizer, "pad_token", None) is None:
+                # Add a pad token if the tokenizer doesn't have one
+                tokenizer.pad_token = tokenizer.eos_token
+
+        return tokenizers
+
+    def run_processor_tracking(
+        self, target: str, function: Callable[[List[Any]], Any], inputs: List[Any], num_threads: int
+    ):
+        self.logger.info(f"\t+ Running {target} tracking")
+
+        if num_threads > 1:
+            # each thread processes a contiguous chunk of the batch (as concurrent requests would in a server),
+            # the rust tokenizers and most of the numpy operations of the processors release the GIL
+            chunk_size = math.ceil(len(inputs) / num_threads)
+            chunks = [inputs[i : i + chunk_size] for i in range(0, len(inputs), chunk_size)]
+            executor = ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix="processor")
+        else:
+            executor = None
+
+        def process():
+            if executor is None:
+                return function(inputs)
+
+            return list(executor.map(function, chunks))
+
+        try:
+            for _ in range(self.config.warmup_runs):
+                process()
+
+            with self.latency_tracker.session():
+                while (
+                    self.latency_tracker.elapsed() < self.config.duration
+                    or self.latency_tracker.count() < self.config.iterations
+                ):
+                    with self.latency_tracker.track():
+                        process()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        latency = self.latency_tracker.get_latency()
+        self.targets[target] = TargetMeasurements(
+            latency=latency,
+            throughput=Throughput.from_latency(latency, len(inputs), unit=PROCESSOR_THROUGHPUT_UNIT),
+        )
+
+
+@contextmanager
+def disable_intra_op_parallelism():
+    # fast tokenizers encode batches over their own (rayon) thread pool, unless TOKENIZERS_PARALLELISM is false
+    # (which they read at every call), and the torch based processors run over torch's intra-op thread pool.
+    # both are limited to one thread so that the processors run on exactly the benchmarked number of threads.
+    tokenizers_parallelism = os.environ.get("TOKENIZERS_PARALLELISM", None)
+    torch_num_threads = torch.get_num_threads()
+
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    torch.set_num_threads(1)
+
+    try:
+        yield
+    finally:
+        torch.set_num_threads(torch_num_threads)
+
+        if tokenizers_parallelism is None:
+            os.environ.pop("TOKENIZERS_PARALLELISM")
+        else:
+            os.environ["TOKENIZERS_PARALLELISM"] = tokenizers_parallelism
@@ -0,0 +1,52 @@
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any, Dict, Optional
+
+from ..config import ScenarioConfig
+
+LOGGER = getLogger("profiling")
+
+INPUT_SHAPES = {
+    "batch_size": 2,
+}
+
+
+@dataclass
+class ProfilingConfig(ScenarioConfig):
+    name: str = "profiling"
+    _target_: str = "optimum_benchmark.scenarios.profiling.scenario.ProfilingScenario"
+
+    # benchmark options
+    iterations: int = field(
+        default=10,
+        metadata={"help": "Number of profiled forward passes over which the operator records are aggregated."},
+    )
+    warmup_runs: int = field(
+        default=10,
+        metadata={"help": "Number of forward passes to perform before profiling."},
+    )
+
+    # input config
+    input_shapes: Dict[str, Any] = field(
+        default_factory=dict,
+        metadata={"help": "Input shapes for the model. Missing keys will be filled with default values."},
+    )
+
+    # report options
+    top_k: Optional[int] = field(
+        default=20,
+        metadata={
+            "help": "Number of operators and nodes, with the most total time, kept in the report (None for all)."
+        },
+    )
+
+    def __post_init__(self):
+        super().__post_init__()
+
+        self.input_shapes = {**INPUT_SHAPES, **self.input_shapes}
+
+        if self.iterations < 1:
+            raise ValueError(f"`iterations` must be greater than or equal to 1, but got {self.iterations}.")
+
+        if self.top_k is not None and self.top_k < 1:
+            raise ValueError(f"`top_k` must be greater than or equal to 1, but got {self.top_k}.")
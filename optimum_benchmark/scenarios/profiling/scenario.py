@@ -0,0 +1,103 @@
+from typing import Any, List, Union
+
+import torch
+from transformers import PreTrainedModel
+from transformers.utils.fx import symbolic_trace
+
+from ...backends.base import Backend, BackendConfigT
+from ...benchmark.report import BenchmarkReport, TargetMeasurements
+from ...generators.input_generator import InputGenerator
+from ...import_utils import is_onnxruntime_available, is_optimum_available
+from ...profilers.fx_profiler import FXProfilingWrapper
+from ...task_utils import IMAGE_DIFFUSION_TASKS
+from ...trackers.profile import Profile
+from ..base import Scenario
+from .config import ProfilingConfig
+
+if is_optimum_available() and is_onnxruntime_available():
+    from ...profilers.ort_profiler import ORTProfilingWrapper
+
+PROFILING_BACKENDS = ["pytorch", "onnxruntime"]
+
+
+class ProfilingScenario(Scenario[ProfilingConfig]):
+    NAME = "profiling"
+
+    def __init__(self, config: ProfilingConfig) -> None:
+        super().__init__(config)
+
+    def run(self, backend: Backend[BackendConfigT]) -> BenchmarkReport:
+        self.backend = backend
+
+        if self.backend.config.name not in PROFILING_BACKENDS:
+            raise ValueError(f"Profiling scenario is not supported by {self.backend.config.name}")
+
+        if self.backend.config.task in IMAGE_DIFFUSION_TASKS:
+            raise ValueError(
+                f"Profiling scenario doesn't support image diffusion tasks, got {self.backend.config.task}"
+            )
+
+        if self.backend.config.name == "onnxruntime":
+            # onnxruntime sessions can only be profiled from their creation
+            self.logger.info("\t+ Enabling onnxruntime session profiling")
+            self.backend.config.session_options = {**self.backend.config.session_options, "enable_profiling": True}
+
+        self.logger.info(f"\t+ Generating inputs for task {self.backend.config.task}")
+        inputs = InputGenerator(
+            task=self.backend.config.task,
+            model_shapes=self.backend.model_shapes,
+            model_type=self.backend.config.model_type,
+            input_shapes=self.config.input_shapes,
+        )()
+
+        self.logger.info("\t+ Loading model")
+        self.backend.load()
+
+        self.logger.info(f"\t+ Preparing inputs for backend {self.backend.config.name}")
+        inputs = self.backend.prepare_inputs(inputs=inputs)
+
+        self.logger.info("\t+ Wrapping model for profiling")
+        profiling_wrapper = self.get_profiling_wrapper(input_names=list(inputs.keys()))
+
+        with torch.inference_mode():
+            self.logger.info("\t+ Warming up the model")
+            for _ in range(self.config.warmup_runs):
+                profiling_wrapper(**inputs)
+
+            if isinstance(profiling_wrapper, FXProfilingWrapper):
+                profiling_wrapper.reset()
+
+            self.logger.info(f"\t+ Profiling {self.config.iterations} forward passes")
+            for _ in range(self.config.iterations):
+                profiling_wrapper(**inputs)
+
+        if isinstance(profiling_wrapper, FXProfilingWrapper):
+            profiling_records = profiling_wrapper.get_profiling_records()
+        else:
+            profiling_records = profiling_wrapper.get_profiling_records(last_runs=self.config.iterations)
+
+        self.logger.info(f"\t+ Aggregating {len(profiling_records)} profiling records")
+        profile = Profile.from_records(profiling_records, iterations=self.config.iterations, top_k=self.config.top_k)
+
+        return BenchmarkReport.from_dict({"forward": TargetMeasurements(profile=profile)})
+
+    def get_profiling_wrapper(self, input_names: List[str]) -> Union[FXProfilingWrapper, "ORTProfilingWrapper"]:
+        if self.backend.config.name == "onnxruntime":
+            return ORTProfilingWrapper(self.backend.pretrained_model)
+
+        model: Any = self.backend.pretrained_model
+
+        try:
+            if isinstance(model, PreTrainedModel):
+                self.logger.info("\t+ Symbolically tracing the model with transformers' tracer")
+                graph_module = symbolic_trace(model, input_names=input_names)
+            else:
+                self.logger.info("\t+ Symbolically tracing the model with torch.fx")
+                graph_module = torch.fx.symbolic_trace(model)
+        except Exception as error:
+            raise ValueError(
+                f"Profiling scenario requires a symbolically traceable model, but {self.backend.config.model} "
+                f"could not be traced: {error}"
+            ) from error
+
+        return FXProfilingWrapper(graph_module)
@@ -1,7 +1,8 @@
 from dataclasses import dataclass, field
 from logging import getLogger
-from typing import Any, Dict
+from typing import Any, Dict, List
 
+from ...profilers.torch_profiler import TORCH_PROFILER_SCHEDULE
 from ..config import ScenarioConfig
 
 LOGGER = getLogger("training")
@@ -30,6 +31,8 @@ TRAINING_ARGUMENT = {
 
 DATASET_SHAPES = {"dataset_size": 500, "sequence_length": 16, "num_choices": 1}
 
+TORCH_PROFILER_PHASES = ["train_step"]
+
 
 @dataclass
 class TrainingConfig(ScenarioConfig):
@@ -50,6 +53,30 @@ class TrainingConfig(ScenarioConfig):
     memory: bool = field(default=False, metadata={"help": "Measure max memory usage"})
     energy: bool = field(default=False, metadata={"help": "Measure energy usage"})
 
+    # profiling options
+    torch_profiler_phases: List[str] = field(
+        default_factory=list,
+        metadata={
+            "help": "Phases to profile with torch.profiler, only `train_step` is available. The schedule is applied "
+            "to the first training steps, which must fit in `warmup_steps` so that the `train` target isn't affected. "
+            "The profiler overhead still inflates the latency and throughput of the `overall` and `warmup` targets, "
+            "as well as the memory and energy measurements, which span all the steps. "
+            "Chrome traces and key averages tables are exported to `torch_profiler_dir`."
+        },
+    )
+    torch_profiler_schedule: Dict[str, int] = field(
+        default_factory=dict,
+        metadata={"help": "The `wait`, `warmup`, `active` and `repeat` steps of the torch.profiler schedule."},
+    )
+    torch_profiler_kwargs: Dict[str, Any] = field(
+        default_factory=dict,
+        metadata={"help": "Keyword arguments to pass to torch.profiler.profile (e.g. `record_shapes`, `with_stack`)."},
+    )
+    torch_profiler_dir: str = field(
+        default="torch_profiler",
+        metadata={"help": "Directory where torch.profiler traces and tables are saved, next to the report."},
+    )
+
     def __post_init__(self):
         super().__post_init__()
 
@@ -71,3 +98,16 @@ class TrainingConfig(ScenarioConfig):
             raise ValueError(
                 f"`scenario.warmup_steps` ({self.warmup_steps}) must be smaller than `scenario.max_steps` ({self.max_steps})"
             )
+
+        for phase in self.torch_profiler_phases:
+            if phase not in TORCH_PROFILER_PHASES:
+                raise ValueError(f"`torch_profiler_phases` must be among {TORCH_PROFILER_PHASES}, but got {phase}.")
+
+        if self.torch_profiler_phases:
+            schedule = {**TORCH_PROFILER_SCHEDULE, **self.torch_profiler_schedule}
+            profiled_steps = (schedule["wait"] + schedule["warmup"] + schedule["active"]) * schedule["repeat"]
+            if profiled_steps > self.warmup_steps:
+                raise ValueError(
+                    f"The torch.profiler schedule spans {profiled_steps} steps, "
+                    f"which must not exceed `scenario.warmup_steps` ({self.warmup_steps})"
+                )
@@ -5,6 +5,7 @@ from transformers import default_data_collator
 from ...backends.base import Backend, BackendConfigT
 from ...benchmark.report import BenchmarkReport
 from ...generators.dataset_generator import DatasetGenerator
+from ...profilers.torch_profiler import TorchProfiler, TorchProfilerTrainerCallback
 from ...trackers.energy import Efficiency, EnergyTracker
 from ...trackers.latency import StepLatencyTrackerTrainerCallback, Throughput
 from ...trackers.memory import MemoryTracker
@@ -54,6 +55,17 @@ class TrainingScenario(Scenario[TrainingConfig]):
                     device=backend.config.device, backend=backend.config.name, device_ids=backend.config.device_ids
                 )
                 context_stack.enter_context(energy_tracker.track(task_name="train"))
+            if self.config.torch_profiler_phases:
+                # the profiled steps are part of the warmup steps, which are excluded from the train target
+                # (but not from the overall and warmup targets, nor from the memory and energy measurements)
+                torch_profiler = TorchProfiler(
+                    phase="train_step",
+                    device=backend.config.device,
+                    output_dir=self.config.torch_profiler_dir,
+                    schedule=self.config.torch_profiler_schedule,
+                    profiler_kwargs=self.config.torch_profiler_kwargs,
+                )
+                training_callbackes.append(TorchProfilerTrainerCallback(torch_profiler))
 
             backend.train(
                 training_dataset=training_dataset,
@@ -1,26 +1,45 @@
+from .allocation import Allocation, AllocationSessionTracker
+from .cpu_usage import CPUUsage, CPUUsageTracker
 from .energy import Efficiency, Energy, EnergyTracker
 from .latency import (
     Latency,
     LatencySessionTracker,
     LatencyTracker,
+    PerRequestLatencySessionTracker,
     PerStepLatencySessionTrackerPipelineCallback,
     PerTokenLatencySessionTrackerLogitsProcessor,
     StepLatencyTrackerTrainerCallback,
     Throughput,
 )
 from .memory import Memory, MemoryTracker
+from .padding import Padding, PaddingTracker
+from .perf_counters import PerfCounters, PerfCountersTracker
+from .profile import Profile
+from .speculation import Speculation, SpeculativeDecodingSessionTracker
 
 __all__ = [
+    "Allocation",
+    "AllocationSessionTracker",
+    "CPUUsage",
+    "CPUUsageTracker",
     "Efficiency",
     "Energy",
     "EnergyTracker",
     "Latency",
     "LatencySessionTracker",
     "LatencyTracker",
+    "PerRequestLatencySessionTracker",
     "PerStepLatencySessionTrackerPipelineCallback",
     "PerTokenLatencySessionTrackerLogitsProcessor",
     "StepLatencyTrackerTrainerCallback",
     "Throughput",
     "Memory",
     "MemoryTracker",
+    "Padding",
+    "PaddingTracker",
+    "PerfCounters",
+    "PerfCountersTracker",
+    "Profile",
+    "Speculation",
+    "SpeculativeDecodingSessionTracker",
 ]
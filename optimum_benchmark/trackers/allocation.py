@@ -0,0 +1,243 @@
+import gc
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from typing import Any, Dict, List, Literal, Optional
+
+import numpy as np
+from rich.console import Console
+from rich.markdown import Markdown
+
+CONSOLE = Console()
+LOGGER = getLogger("allocation")
+
+ALLOCATION_UNIT = "s"
+
+Allocation_Unit_Literal = Literal["s"]
+
+
+@dataclass
+class Allocation:
+    unit: Allocation_Unit_Literal
+
+    iterations: int
+    collections: List[int]  # number of garbage collections of each generation
+    collected: int  # number of objects collected by these collections
+    gc_pause_total: float
+    gc_pause_max: float
+    gc_pause_per_iteration: float
+    iterations_with_gc: int
+    # share of the time of the slowest iterations (above the p99 iteration time) spent in gc pauses
+    slowest_iterations_gc_share: float
+    # net change of the number of allocated blocks of the python allocator (not measured per token)
+    allocated_blocks_per_iteration: Optional[float] = None
+    traced_memory_per_iteration: Optional[float] = None  # peak of the memory traced by tracemalloc above the start (MB)
+
+    @staticmethod
+    def from_records(
+        iteration_times: List[float],
+        iteration_pauses: List[float],
+        pauses: List[float],
+        collections: List[int],
+        collected: int,
+        allocated_blocks: Optional[List[int]] = None,
+        traced_memory: Optional[List[float]] = None,
+    ) -> "Allocation":
+        iteration_times, iteration_pauses = np.array(iteration_times), np.array(iteration_pauses)
+
+        slowest = iteration_times >= np.percentile(iteration_times, 99)
+        slowest_time = iteration_times[slowest].sum()
+
+        return Allocation(
+            unit=ALLOCATION_UNIT,
+            iterations=len(iteration_times),
+            collections=collections,
+            collected=collected,
+            gc_pause_total=sum(pauses),
+            gc_pause_max=max(pauses, default=0.0),
+            gc_pause_per_iteration=iteration_pauses.mean().item(),
+            iterations_with_gc=int((iteration_pauses > 0).sum()),
+            slowest_iterations_gc_share=(iteration_pauses[slowest].sum() / slowest_time).item()
+            if slowest_time > 0
+            else 0.0,
+            allocated_blocks_per_iteration=np.mean(allocated_blocks).item() if allocated_blocks is not None else None,
+            traced_memory_per_iteration=np.mean(traced_memory).item() if traced_memory is not None else None,
+        )
+
+    @staticmethod
+    def aggregate_across_processes(allocations: List["Allocation"]) -> "Allocation":
+        if len(allocations) == 0:
+            raise ValueError("No allocation measurements to aggregate")
+        elif any(allocation is None for allocation in allocations):
+            raise ValueError("Some allocation measurements are missing")
+
+        # each process has its own interpreter, so counts are summed and per-iteration measurements averaged
+        return Allocation(
+            unit=allocations[0].unit,
+            iterations=sum(allocation.iterations for allocation in allocations),
+            collections=[sum(counts) for counts in zip(*(allocation.collections for allocation in allocations))],
+            collected=sum(allocation.collected for allocation in allocations),
+            gc_pause_total=sum(allocation.gc_pause_total for allocation in allocations),
+            gc_pause_max=max(allocation.gc_pause_max for allocation in allocations),
+            gc_pause_per_iteration=np.mean([allocation.gc_pause_per_iteration for allocation in allocations]).item(),
+            iterations_with_gc=sum(allocation.iterations_with_gc for allocation in allocations),
+            slowest_iterations_gc_share=np.mean(
+                [allocation.slowest_iterations_gc_share for allocation in allocations]
+            ).item(),
+            allocated_blocks_per_iteration=np.mean(
+                [allocation.allocated_blocks_per_iteration for allocation in allocations]
+            ).item()
+            if allocations[0].allocated_blocks_per_iteration is not None
+            else None,
+            traced_memory_per_iteration=np.mean(
+                [allocation.traced_memory_per_iteration for allocation in allocations]
+            ).item()
+            if allocations[0].traced_memory_per_iteration is not None
+            else None,
+        )
+
+    def to_plain_text(self) -> str:
+        plain_text = ""
+        plain_text += "\t\t+ iterations: {iterations}\n"
+        plain_text += "\t\t+ collections: {collections}\n"
+        plain_text += "\t\t+ collected: {collected}\n"
+        plain_text += "\t\t+ gc_pause_total: {gc_pause_total:.6f} ({unit})\n"
+        plain_text += "\t\t+ gc_pause_max: {gc_pause_max:.6f} ({unit})\n"
+        plain_text += "\t\t+ gc_pause_per_iteration: {gc_pause_per_iteration:.6f} ({unit})\n"
+        plain_text += "\t\t+ iterations_with_gc: {iterations_with_gc}\n"
+        plain_text += "\t\t+ slowest_iterations_gc_share: {slowest_iterations_gc_share:.2%}\n"
+        if self.allocated_blocks_per_iteration is not None:
+            plain_text += "\t\t+ allocated_blocks_per_iteration: {allocated_blocks_per_iteration:.1f}\n"
+        if self.traced_memory_per_iteration is not None:
+            plain_text += "\t\t+ traced_memory_per_iteration: {traced_memory_per_iteration:.3f} (MB)\n"
+        return plain_text.format(**asdict(self))
+
+    def log(self):
+        for line in self.to_plain_text().split("\n"):
+            if line:
+                LOGGER.info(line)
+
+    def to_markdown_text(self) -> str:
+        markdown_text = ""
+        markdown_text += "| metric | value | unit |\n"
+        markdown_text += "| ------ | ----: | ---: |\n"
+        markdown_text += "| iterations                     |                         {iterations} | - |\n"
+        markdown_text += "| collections                    |                        {collections} | - |\n"
+        markdown_text += "| collected                      |                          {collected} | - |\n"
+        markdown_text += "| gc_pause_total                 |                {gc_pause_total:.6f} | {unit} |\n"
+        markdown_text += "| gc_pause_max                   |                  {gc_pause_max:.6f} | {unit} |\n"
+        markdown_text += "| gc_pause_per_iteration         |        {gc_pause_per_iteration:.6f} | {unit} |\n"
+        markdown_text += "| iterations_with_gc             |                 {iterations_with_gc} | - |\n"
+        markdown_text += "| slowest_iterations_gc_share    |  {slowest_iterations_gc_share:.2%} | - |\n"
+        if self.allocated_blocks_per_iteration is not None:
+            markdown_text += "| allocated_blocks_per_iteration | {allocated_blocks_per_iteration:.1f} | - |\n"
+        if self.traced_memory_per_iteration is not None:
+            markdown_text += "| traced_memory_per_iteration | {traced_memory_per_iteration:.3f} | MB |\n"
+        return markdown_text.format(**asdict(self))
+
+    def print(self):
+        CONSOLE.print(Markdown(self.to_markdown_text()))
+
+
+class AllocationSessionTracker:
+    """
+    Tracks the garbage collections of the interpreter (through `gc.callbacks`) and its allocations (the number of
+    blocks of the python allocator and, optionally, the memory traced by `tracemalloc`) during each tracked
+    iteration of a session. tracemalloc hooks every allocation, so it slows down the tracked code (and changes when
+    the garbage collector runs), which is why it is optional.
+    """
+
+    def __init__(self, device: str, backend: str, trace_allocations: bool = False):
+        self.device = device
+        self.backend = backend
+        self.trace_allocations = trace_allocations
+
+        LOGGER.info(f"\t\t+ Tracking garbage collections{' and traced allocations' if trace_allocations else ''}")
+
+        self.reset()
+
+    def reset(self):
+        self.start_time: Optional[float] = None
+        self.collection_start: Optional[float] = None
+
+        self.pauses: List[float] = []
+        self.collections = [0] * len(gc.get_count())
+        self.collected = 0
+
+        self.iteration_times: List[float] = []
+        self.iteration_pauses: List[float] = []
+        self.allocated_blocks: List[int] = []
+        self.traced_memory: List[float] = []
+
+    def gc_callback(self, phase: str, info: Dict[str, Any]) -> None:
+        if phase == "start":
+            self.collection_start = time.perf_counter()
+        elif self.collection_start is not None:
+            self.pauses.append(time.perf_counter() - self.collection_start)
+            self.collections[info["generation"]] += 1
+            self.collected += info["collected"]
+            self.collection_start = None
+
+    @contextmanager
+    def session(self):
+        self.reset()
+
+        started_tracemalloc = self.trace_allocations and not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+
+        gc.callbacks.append(self.gc_callback)
+        self.start_time = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            gc.callbacks.remove(self.gc_callback)
+
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+    @contextmanager
+    def track(self):
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            start_traced_memory, _ = tracemalloc.get_traced_memory()
+
+        start_num_pauses = len(self.pauses)
+        start_allocated_blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+
+        yield
+
+        end = time.perf_counter()
+        end_allocated_blocks = sys.getallocatedblocks()
+
+        self.iteration_times.append(end - start)
+        self.iteration_pauses.append(sum(self.pauses[start_num_pauses:]))
+        self.allocated_blocks.append(end_allocated_blocks - start_allocated_blocks)
+
+        if self.trace_allocations:
+            _, peak_traced_memory = tracemalloc.get_traced_memory()
+            self.traced_memory.append((peak_traced_memory - start_traced_memory) / 1e6)
+
+    def count(self) -> int:
+        return len(self.iteration_times)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start_time
+
+    def get_allocation(self) -> Allocation:
+        assert self.count() > 0, "Allocation tracker must track at least one iteration before getting the allocation"
+
+        return Allocation.from_records(
+            iteration_times=self.iteration_times,
+            iteration_pauses=self.iteration_pauses,
+            pauses=self.pauses,
+            collections=self.collections,
+            collected=self.collected,
+            allocated_blocks=self.allocated_blocks,
+            traced_memory=self.traced_memory if self.trace_allocations else None,
+        )
@@ -0,0 +1,223 @@
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from typing import Dict, List, Literal, Optional, Tuple
+
+from rich.console import Console
+from rich.markdown import Markdown
+
+CONSOLE = Console()
+LOGGER = getLogger("cpu_usage")
+
+CPU_USAGE_UNIT = "%"
+
+CPU_Usage_Unit_Literal = Literal["%"]
+
+
+@dataclass
+class CPUUsage:
+    unit: CPU_Usage_Unit_Literal
+
+    duration: float  # in seconds
+    process_utilization: float  # cpu time of the process over the duration, 100% per saturated core
+    pinned_cores_utilization: float  # mean utilization of the cores the process is allowed to run on
+    cores_utilization: Dict[str, float]  # system-wide utilization of each of these cores
+    voluntary_context_switches: int
+    involuntary_context_switches: int
+    num_threads: int  # the maximum number of threads of the process, at the start or at the end of the phase
+
+    @staticmethod
+    def aggregate_across_processes(cpu_usages: List["CPUUsage"]) -> "CPUUsage":
+        if len(cpu_usages) == 0:
+            raise ValueError("No cpu usage measurements to aggregate")
+        elif any(cpu_usage is None for cpu_usage in cpu_usages):
+            raise ValueError("Some cpu usage measurements are missing")
+
+        # cores utilization is system-wide, so cores shared by processes are averaged
+        cores_utilization: Dict[str, List[float]] = {}
+        for cpu_usage in cpu_usages:
+            for core, utilization in cpu_usage.cores_utilization.items():
+                cores_utilization.setdefault(core, []).append(utilization)
+
+        cores_utilization = {core: sum(values) / len(values) for core, values in sorted(cores_utilization.items())}
+        pinned_cores_utilization = sum(cores_utilization.values()) / len(cores_utilization)
+
+        # process-specific measurements are summed
+        return CPUUsage(
+            unit=cpu_usages[0].unit,
+            duration=max(cpu_usage.duration for cpu_usage in cpu_usages),
+            process_utilization=sum(cpu_usage.process_utilization for cpu_usage in cpu_usages),
+            pinned_cores_utilization=pinned_cores_utilization,
+            cores_utilization=cores_utilization,
+            voluntary_context_switches=sum(cpu_usage.voluntary_context_switches for cpu_usage in cpu_usages),
+            involuntary_context_switches=sum(cpu_usage.involuntary_context_switches for cpu_usage in cpu_usages),
+            num_threads=sum(cpu_usage.num_threads for cpu_usage in cpu_usages),
+        )
+
+    def to_plain_text(self) -> str:
+        plain_text = ""
+        plain_text += "\t\t+ duration: {duration:.2f} (s)\n"
+        plain_text += "\t\t+ process_utilization: {process_utilization:.1f} ({unit})\n"
+        plain_text += "\t\t+ pinned_cores_utilization: {pinned_cores_utilization:.1f} ({unit})\n"
+        plain_text += "\t\t+ voluntary_context_switches: {voluntary_context_switches}\n"
+        plain_text += "\t\t+ involuntary_context_switches: {involuntary_context_switches}\n"
+        plain_text += "\t\t+ num_threads: {num_threads}\n"
+        plain_text = plain_text.format(**asdict(self))
+
+        plain_text += "\t\t+ cores_utilization:\n"
+        for core, utilization in self.cores_utilization.items():
+            plain_text += f"\t\t\t+ {core}: {utilization:.1f} ({self.unit})\n"
+
+        return plain_text
+
+    def log(self):
+        for line in self.to_plain_text().split("\n"):
+            if line:
+                LOGGER.info(line)
+
+    def to_markdown_text(self) -> str:
+        markdown_text = ""
+        markdown_text += "| metric | value | unit |\n"
+        markdown_text += "| ------ | ----: | ---: |\n"
+        markdown_text += "| duration                     |                     {duration:.2f} | s |\n"
+        markdown_text += "| process_utilization          |           {process_utilization:.1f} | {unit} |\n"
+        markdown_text += "| pinned_cores_utilization     |      {pinned_cores_utilization:.1f} | {unit} |\n"
+        markdown_text += "| voluntary_context_switches   |   {voluntary_context_switches} | - |\n"
+        markdown_text += "| involuntary_context_switches | {involuntary_context_switches} | - |\n"
+        markdown_text += "| num_threads                  |                  {num_threads} | - |\n"
+        markdown_text = markdown_text.format(**asdict(self))
+
+        for core, utilization in self.cores_utilization.items():
+            markdown_text += f"| core_{core}_utilization | {utilization:.1f} | {self.unit} |\n"
+
+        return markdown_text
+
+    def print(self):
+        CONSOLE.print(Markdown(self.to_markdown_text()))
+
+
+class CPUUsageTracker:
+    """
+    Tracks the cpu utilization of a process and of the cores it is pinned to, its context switches and its number
+    of threads, from the differences of the procfs counters (`/proc/<pid>/stat`, `/proc/<pid>/task/*/status` and
+    `/proc/stat`) between the start and the end of a tracked phase, without any sampling in the meantime.
+    """
+
+    def __init__(self, device: str, backend: str):
+        self.device = device
+        self.backend = backend
+        self.monitored_pid = os.getpid()
+
+        if not os.path.exists("/proc/stat"):
+            raise ValueError("CPU usage tracking requires the Linux procfs (/proc), which is not available.")
+
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.pinned_cores = sorted(os.sched_getaffinity(self.monitored_pid))
+
+        LOGGER.info(f"\t\t+ Tracking CPU usage of process {self.monitored_pid} and its cores {self.pinned_cores}")
+
+        self.cpu_usage: Optional[CPUUsage] = None
+
+    def reset(self):
+        self.cpu_usage = None
+
+    @contextmanager
+    def track(self):
+        start = self.read_counters()
+
+        yield
+
+        end = self.read_counters()
+
+        duration = end["time"] - start["time"]
+        process_seconds = (end["process_ticks"] - start["process_ticks"]) / self.clock_ticks
+
+        cores_utilization = {}
+        for core in self.pinned_cores:
+            (start_busy, start_total), (end_busy, end_total) = start["cores"][core], end["cores"][core]
+            total = end_total - start_total
+            cores_utilization[str(core)] = 100 * (end_busy - start_busy) / total if total > 0 else 0.0
+
+        self.cpu_usage = CPUUsage(
+            unit=CPU_USAGE_UNIT,
+            duration=duration,
+            process_utilization=100 * process_seconds / duration if duration > 0 else 0.0,
+            pinned_cores_utilization=sum(cores_utilization.values()) / len(cores_utilization),
+            cores_utilization=cores_utilization,
+            # threads that exit during the phase take their context switches with them
+            voluntary_context_switches=max(0, end["voluntary"] - start["voluntary"]),
+            involuntary_context_switches=max(0, end["involuntary"] - start["involuntary"]),
+            num_threads=max(start["num_threads"], end["num_threads"]),
+        )
+
+    def read_counters(self) -> Dict:
+        cores = read_cores_ticks()
+        process_ticks, num_threads = read_process_ticks_and_threads(self.monitored_pid)
+        voluntary, involuntary = read_context_switches(self.monitored_pid)
+
+        return {
+            "time": time.perf_counter(),
+            "cores": cores,
+            "process_ticks": process_ticks,
+            "num_threads": num_threads,
+            "voluntary": voluntary,
+            "involuntary": involuntary,
+        }
+
+    def get_cpu_usage(self) -> CPUUsage:
+        assert self.cpu_usage is not None, "CPU usage tracker must be run before getting the cpu usage"
+
+        return self.cpu_usage
+
+
+def read_cores_ticks() -> Dict[int, Tuple[int, int]]:
+    """Returns the busy and total ticks of each core, from `/proc/stat`."""
+
+    cores_ticks = {}
+
+    with open("/proc/stat") as f:
+        for line in f:
+            if not line.startswith("cpu") or not line[3].isdigit():
+                continue
+
+            name, *values = line.split()
+            # user nice system idle iowait irq softirq steal, guest times are already included in user times
+            ticks = [int(value) for value in values[:8]]
+            total = sum(ticks)
+            cores_ticks[int(name[3:])] = (total - ticks[3] - ticks[4], total)
+
+    return cores_ticks
+
+
+def read_process_ticks_and_threads(pid: int) -> Tuple[int, int]:
+    """Returns the user and system ticks of all the threads of a process and its number of threads."""
+
+    with open(f"/proc/{pid}/stat") as f:
+        # the process name can contain spaces and parentheses, the fields after it start with the state (field 3)
+        fields = f.read().rsplit(")", 1)[1].split()
+
+    utime, stime, num_threads = int(fields[11]), int(fields[12]), int(fields[17])
+
+    return utime + stime, num_threads
+
+
+def read_context_switches(pid: int) -> Tuple[int, int]:
+    """Returns the voluntary and involuntary context switches of the current threads of a process."""
+
+    voluntary, involuntary = 0, 0
+
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{tid}/status") as f:
+                for line in f:
+                    if line.startswith("voluntary_ctxt_switches"):
+                        voluntary += int(line.split()[1])
+                    elif line.startswith("nonvoluntary_ctxt_switches"):
+                        involuntary += int(line.split()[1])
+        except FileNotFoundError:
+            # the thread exited in the meantime
+            continue
+
+    return voluntary, involuntary
@@ -1,8 +1,9 @@
+import gc
 import time
 from contextlib import contextmanager
 from dataclasses import asdict, dataclass
 from logging import getLogger
-from typing import List, Literal, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
 import numpy as np
 import torch
@@ -10,10 +11,13 @@ from rich.console import Console
 from rich.markdown import Markdown
 from transformers import TrainerCallback
 
+from .allocation import Allocation
+
 CONSOLE = Console()
 LOGGER = getLogger("latency")
 
 LATENCY_UNIT = "s"
+PER_TOKEN_BUFFER_SIZE = 4096  # initial number of timestamps of the per-token latency tracker
 
 Latency_Unit_Literal = Literal["s"]
 Throughput_Unit_Literal = Literal["samples/s", "tokens/s", "images/s", "steps/s"]
@@ -233,8 +237,11 @@ class LatencySessionTracker:
         self.end_events = []
 
         self.start_time = time.perf_counter()
-        yield
-        self.start_time = None
+        try:
+            yield
+        finally:
+            # the session is also closed when a tracked call raises (e.g. out of memory), so that it can be reopened
+            self.start_time = None
 
     def count(self) -> int:
         assert self.start_time is not None, "This method can only be called inside of a '.session()' context"
@@ -287,163 +294,260 @@ class LatencySessionTracker:
 
 
 class PerTokenLatencySessionTrackerLogitsProcessor:
-    def __init__(self, device: str, backend: str):
+    """
+    Tracks the prefill, decode and per-token latencies of generations through the logits processor hook, which is
+    called once per generated token. To keep the per-token overhead low, timestamps are written into a preallocated
+    buffer (`perf_counter_ns` values in a NumPy int64 array, or a pool of CUDA events) which is reused from one
+    session to the next and only grows (doubling) when a session needs more room, and latencies are computed with
+    vectorized operations once the session is done.
+
+    Each tracked generation occupies a contiguous slice of the buffer: its start, one timestamp per token (the first
+    one ending the prefill) and its end.
+
+    With `track_gc`, the session also registers a `gc.callbacks` hook recording the garbage collection pauses on the
+    same clock, so that each pause can be attributed to the token interval it falls in. The hook only runs when the
+    collector does, so it doesn't add any per-token overhead.
+    """
+
+    def __init__(self, device: str, backend: str, buffer_size: int = PER_TOKEN_BUFFER_SIZE, track_gc: bool = False):
         self.device = device
         self.backend = backend
 
         self.is_pytorch_cuda = (self.backend, self.device) == ("pytorch", "cuda")
 
+        if track_gc and self.is_pytorch_cuda:
+            LOGGER.warning("\t\t+ Garbage collection pauses can't be aligned with CUDA events, not tracking them")
+            track_gc = False
+
+        self.track_gc = track_gc
+
         if self.is_pytorch_cuda:
-            LOGGER.info("\t\t+ Tracking latency using Pytorch CUDA events")
+            LOGGER.info("\t\t+ Tracking latency using a pool of Pytorch CUDA events")
+            self.events = [torch.cuda.Event(enable_timing=True) for _ in range(buffer_size)]
         else:
             LOGGER.info("\t\t+ Tracking latency using CPU performance counter")
+            self.timestamps = np.empty(buffer_size, dtype=np.int64)
+            self.timestamps_view = memoryview(self.timestamps)
+
+        self.buffer_size = buffer_size
+        self.num_timestamps = 0
 
-        self.prefill_start_events: List[Union[float, torch.cuda.Event]] = []
-        self.prefill_end_events: List[Union[float, torch.cuda.Event]] = []
-        self.per_token_start_events: List[Union[float, torch.cuda.Event]] = []
-        self.per_token_end_events: List[Union[float, torch.cuda.Event]] = []
-        self.per_token_events: List[Union[float, torch.cuda.Event]] = []
-        self.decode_start_events: List[Union[float, torch.cuda.Event]] = []
-        self.decode_end_events: List[Union[float, torch.cuda.Event]] = []
+        # one entry per generation, indices of its start and end timestamps
+        self.start_indices: List[int] = []
+        self.end_indices: List[int] = []
 
+        # one entry per garbage collection, its start and end (perf_counter_ns), generation and collected objects
+        self.gc_starts: List[int] = []
+        self.gc_ends: List[int] = []
+        self.gc_generations: List[int] = []
+        self.gc_collected: List[int] = []
+
+        self.is_tracking = False
         self.start_time: Optional[float] = None
 
+    def __getstate__(self):
+        # the tracker is part of the generate kwargs of the scenario config, which is deep copied when serialized,
+        # and memoryviews can't be copied, so the view is rebuilt from the buffer instead
+        state = self.__dict__.copy()
+        state.pop("timestamps_view", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if not self.is_pytorch_cuda:
+            self.timestamps_view = memoryview(self.timestamps)
+
     @contextmanager
     def session(self):
         assert self.start_time is None
 
-        self.prefill_start_events = []
-        self.prefill_end_events = []
-        self.per_token_start_events = []
-        self.per_token_end_events = []
-        self.per_token_events = []
-        self.decode_start_events = []
-        self.decode_end_events = []
+        self.num_timestamps = 0
+        self.start_indices = []
+        self.end_indices = []
+
+        self.gc_starts = []
+        self.gc_ends = []
+        self.gc_generations = []
+        self.gc_collected = []
+
+        if self.track_gc:
+            gc.callbacks.append(self.gc_callback)
 
         self.start_time = time.perf_counter()
-        yield
-        self.start_time = None
+        try:
+            yield
+        finally:
+            self.start_time = None
+            if self.track_gc:
+                gc.callbacks.remove(self.gc_callback)
+
+    def gc_callback(self, phase: str, info: Dict[str, Any]) -> None:
+        if phase == "start":
+            self.gc_starts.append(time.perf_counter_ns())
+        elif len(self.gc_ends) < len(self.gc_starts):
+            self.gc_ends.append(time.perf_counter_ns())
+            self.gc_generations.append(info["generation"])
+            self.gc_collected.append(info["collected"])
 
     def count(self) -> int:
         assert self.start_time is not None, "This method can only be called inside of a '.session()' context"
-        assert (
-            len(self.prefill_start_events)
-            == len(self.prefill_end_events)
-            == len(self.decode_start_events)
-            == len(self.decode_end_events)
-        )
+        assert len(self.start_indices) == len(self.end_indices)
 
-        return len(self.prefill_start_events)
+        return len(self.end_indices)
 
     def elapsed(self):
         assert self.start_time is not None, "This method can only be called inside of a '.session()' context"
 
         return time.perf_counter() - self.start_time
 
-    @contextmanager
-    def track(self):
-        if self.is_pytorch_cuda:
-            start_event = torch.cuda.Event(enable_timing=True)
-            end_event = torch.cuda.Event(enable_timing=True)
+    def record(self) -> None:
+        if self.num_timestamps == self.buffer_size:
+            self.grow()
 
-            start_event.record()
-            yield
-            end_event.record()
+        if self.is_pytorch_cuda:
+            self.events[self.num_timestamps].record()
         else:
-            start_event = time.perf_counter()
-            yield
-            end_event = time.perf_counter()
-
-        self.prefill_start_events.append(start_event)
-        self.decode_end_events.append(end_event)
+            # writing through a memoryview is cheaper than numpy's item assignment
+            self.timestamps_view[self.num_timestamps] = time.perf_counter_ns()
 
-        self.per_token_start_events.extend(self.per_token_events[:-1])
-        self.per_token_end_events.extend(self.per_token_events[1:])
+        self.num_timestamps += 1
 
-    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor):
+    def grow(self) -> None:
         if self.is_pytorch_cuda:
-            event = torch.cuda.Event(enable_timing=True)
-            event.record()
+            self.events.extend(torch.cuda.Event(enable_timing=True) for _ in range(self.buffer_size))
         else:
-            event = time.perf_counter()
+            self.timestamps = np.concatenate([self.timestamps, np.empty(self.buffer_size, dtype=np.int64)])
+            self.timestamps_view = memoryview(self.timestamps)
+
+        self.buffer_size *= 2
 
-        if len(self.prefill_start_events) == len(self.prefill_end_events):
-            # on the first call (prefill), there will be the same number of prefill/decode start/end events
-            self.prefill_end_events.append(event)
-            self.decode_start_events.append(event)
+    @contextmanager
+    def track(self):
+        self.start_indices.append(self.num_timestamps)
+        self.record()
+        self.is_tracking = True
 
-        self.per_token_events.append(event)
+        try:
+            yield
+        finally:
+            self.is_tracking = False
+
+        self.end_indices.append(self.num_timestamps)
+        self.record()
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor):
+        # calls outside of tracked generations (e.g. memory or energy tracking) are ignored
+        if self.is_tracking:
+            self.record()
 
         return scores
 
-    def get_prefill_latency(self) -> Latency:
-        assert len(self.prefill_start_events) == len(self.prefill_end_events) > 0
+    def get_timestamps(self) -> np.ndarray:
+        """Returns the timestamps of the session, in seconds."""
 
         if self.is_pytorch_cuda:
             torch.cuda.synchronize()
 
-            latencies = [
-                start_event.elapsed_time(end_event) / 1e3
-                for start_event, end_event in zip(self.prefill_start_events, self.prefill_end_events)
-            ]
+            first_event = self.events[0]
+            return np.array(
+                [first_event.elapsed_time(event) / 1e3 for event in self.events[: self.num_timestamps]],
+                dtype=np.float64,
+            )
         else:
-            latencies = [
-                (end_event - start_event)
-                for start_event, end_event in zip(self.prefill_start_events, self.prefill_end_events)
-            ]
+            return self.timestamps[: self.num_timestamps] / 1e9
 
-        assert all(latency >= 0 for latency in latencies), (
-            "Found some negative latencies while performing substraction. "
-            "Please increase the dimensions of your benchmark or the number of warmup runs."
-        )
+    def get_indices(self):
+        start_indices, end_indices = np.array(self.start_indices), np.array(self.end_indices)
 
-        return Latency.from_values(latencies, unit=LATENCY_UNIT)
+        assert len(start_indices) == len(end_indices) > 0
+        assert (end_indices - start_indices > 1).all(), "Some generations didn't call the logits processor"
+
+        return start_indices, end_indices
+
+    def get_prefill_latency(self) -> Latency:
+        start_indices, _ = self.get_indices()
+        timestamps = self.get_timestamps()
+
+        # the first token ends the prefill
+        latencies = timestamps[start_indices + 1] - timestamps[start_indices]
+
+        return get_latency_from_array(latencies)
 
     def get_decode_latency(self) -> Latency:
-        assert len(self.decode_start_events) == len(self.decode_end_events) > 0
+        start_indices, end_indices = self.get_indices()
+        timestamps = self.get_timestamps()
 
-        if self.is_pytorch_cuda:
-            torch.cuda.synchronize()
+        latencies = timestamps[end_indices] - timestamps[start_indices + 1]
 
-            latencies = [
-                start_event.elapsed_time(end_event) / 1e3
-                for start_event, end_event in zip(self.decode_start_events, self.decode_end_events)
-            ]
-        else:
-            latencies = [
-                (end_event - start_event)
-                for start_event, end_event in zip(self.decode_start_events, self.decode_end_events)
-            ]
+        return get_latency_from_array(latencies)
 
-        assert all(latency >= 0 for latency in latencies), (
-            "Found some negative latencies while performing substraction. "
-            "Please increase the dimensions of your benchmark or the number of warmup runs."
-        )
+    def get_generate_latency(self) -> Latency:
+        # unlike the other latencies, it doesn't require the generations to have called the logits processor
+        start_indices, end_indices = np.array(self.start_indices), np.array(self.end_indices)
+        timestamps = self.get_timestamps()
 
-        return Latency.from_values(latencies, unit=LATENCY_UNIT)
+        assert len(start_indices) == len(end_indices) > 0
+
+        return get_latency_from_array(timestamps[end_indices] - timestamps[start_indices])
 
     def get_per_token_latency(self) -> Latency:
-        assert len(self.per_token_start_events) == len(self.per_token_end_events) > 0
+        start_indices, end_indices = self.get_indices()
+        timestamps = self.get_timestamps()
 
-        if self.is_pytorch_cuda:
-            torch.cuda.synchronize()
+        # the differences between consecutive token timestamps of the same generation
+        is_token = np.ones(self.num_timestamps, dtype=bool)
+        is_token[start_indices] = False
+        is_token[end_indices] = False
 
-            latencies = [
-                start_event.elapsed_time(end_event) / 1e3
-                for start_event, end_event in zip(self.per_token_start_events, self.per_token_end_events)
-            ]
-        else:
-            latencies = [
-                (end_event - start_event)
-                for start_event, end_event in zip(self.per_token_start_events, self.per_token_end_events)
-            ]
+        latencies = np.diff(timestamps)[is_token[:-1] & is_token[1:]]
 
-        assert all(latency >= 0 for latency in latencies), (
-            "Found some negative latencies while performing substraction. "
-            "Please increase the dimensions of your benchmark or the number of warmup runs."
+        assert len(latencies) > 0, "Per-token latency requires generations of at least two tokens"
+
+        return get_latency_from_array(latencies)
+
+    def get_per_token_allocation(self) -> Allocation:
+        assert self.track_gc, "Garbage collections are only tracked with `track_gc`"
+
+        start_indices, end_indices = self.get_indices()
+        timestamps = self.timestamps[: self.num_timestamps]
+
+        is_token = np.ones(self.num_timestamps, dtype=bool)
+        is_token[start_indices] = False
+        is_token[end_indices] = False
+        is_token_interval = is_token[:-1] & is_token[1:]
+
+        # a collection that ended is attributed to the interval between the two timestamps it started between,
+        # collections outside of the tracked generations (before the first or after the last timestamp) are dropped
+        gc_starts = np.array(self.gc_starts[: len(self.gc_ends)], dtype=np.int64)
+        gc_pauses = np.array(self.gc_ends, dtype=np.int64) - gc_starts
+        gc_intervals = np.searchsorted(timestamps, gc_starts, side="right") - 1
+        in_generations = np.zeros(len(gc_intervals), dtype=bool)
+        for start_index, end_index in zip(start_indices, end_indices):
+            in_generations |= (gc_intervals >= start_index) & (gc_intervals < end_index)
+
+        interval_pauses = np.zeros(self.num_timestamps - 1, dtype=np.int64)
+        np.add.at(interval_pauses, gc_intervals[in_generations], gc_pauses[in_generations])
+
+        collections = [0] * len(gc.get_count())
+        for generation in np.array(self.gc_generations, dtype=np.int64)[in_generations]:
+            collections[generation] += 1
+
+        return Allocation.from_records(
+            iteration_times=(np.diff(timestamps)[is_token_interval] / 1e9).tolist(),
+            iteration_pauses=(interval_pauses[is_token_interval] / 1e9).tolist(),
+            pauses=(gc_pauses[in_generations] / 1e9).tolist(),
+            collections=collections,
+            collected=int(np.array(self.gc_collected, dtype=np.int64)[in_generations].sum()),
         )
 
-        return Latency.from_values(latencies, unit=LATENCY_UNIT)
+
+def get_latency_from_array(latencies: np.ndarray) -> Latency:
+    assert (latencies >= 0).all(), (
+        "Found some negative latencies while performing substraction. "
+        "Please increase the dimensions of your benchmark or the number of warmup runs."
+    )
+
+    return Latency.from_values(latencies.tolist(), unit=LATENCY_UNIT)
 
 
 class PerStepLatencySessionTrackerPipelineCallback:
@@ -571,6 +675,81 @@ class PerStepLatencySessionTrackerPipelineCallback:
         return Latency.from_values(latencies, unit=LATENCY_UNIT)
 
 
+class PerRequestLatencySessionTracker:
+    """
+    Tracks the latency and time to first token of each of the requests sent by the backends that serve the inputs
+    of a batch as concurrent requests to an inference server. The backends call it with the `time.perf_counter()`
+    timestamps of each request (sent, first token received, done) and its number of generated tokens, which are only
+    recorded during a session.
+    """
+
+    def __init__(self, device: str, backend: str):
+        self.device = device
+        self.backend = backend
+
+        LOGGER.info("\t\t+ Tracking requests latency using CPU performance counter")
+
+        self.start_timestamps: List[float] = []
+        self.first_token_timestamps: List[float] = []
+        self.end_timestamps: List[float] = []
+        self.num_tokens: List[int] = []
+
+        self.start_time: Optional[float] = None
+
+    @contextmanager
+    def session(self):
+        assert self.start_time is None
+
+        self.start_timestamps = []
+        self.first_token_timestamps = []
+        self.end_timestamps = []
+        self.num_tokens = []
+
+        self.start_time = time.perf_counter()
+        yield
+        self.start_time = None
+
+    def count(self) -> int:
+        return len(self.end_timestamps)
+
+    def __call__(self, start: float, first_token: float, end: float, num_tokens: int) -> None:
+        # requests outside of a session (e.g. warmup, memory or energy tracking) are ignored
+        if self.start_time is not None:
+            self.start_timestamps.append(start)
+            self.first_token_timestamps.append(first_token)
+            self.end_timestamps.append(end)
+            self.num_tokens.append(num_tokens)
+
+    def get_num_tokens(self) -> int:
+        return sum(self.num_tokens)
+
+    def get_request_latency(self) -> Latency:
+        assert self.count() > 0, "Per-request latency tracker must track at least one request"
+
+        return get_latency_from_array(np.array(self.end_timestamps) - np.array(self.start_timestamps))
+
+    def get_time_to_first_token_latency(self) -> Latency:
+        assert self.count() > 0, "Per-request latency tracker must track at least one request"
+
+        return get_latency_from_array(np.array(self.first_token_timestamps) - np.array(self.start_timestamps))
+
+    def get_decode_latency(self) -> Latency:
+        assert self.count() > 0, "Per-request latency tracker must track at least one request"
+
+        return get_latency_from_array(np.array(self.end_timestamps) - np.array(self.first_token_timestamps))
+
+    def get_per_token_latency(self) -> Latency:
+        # the mean latency between consecutive tokens of each request
+        num_tokens = np.array(self.num_tokens)
+        is_multi_token = num_tokens > 1
+
+        assert is_multi_token.any(), "Per-token latency requires requests of at least two tokens"
+
+        decode_latencies = np.array(self.end_timestamps) - np.array(self.first_token_timestamps)
+
+        return get_latency_from_array(decode_latencies[is_multi_token] / (num_tokens[is_multi_token] - 1))
+
+
 class StepLatencyTrackerTrainerCallback(TrainerCallback):
     def __init__(self, device: str, backend: str) -> None:
         self.device = device
@@ -0,0 +1,80 @@
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from typing import List, Literal
+
+import torch
+from rich.console import Console
+from rich.markdown import Markdown
+
+CONSOLE = Console()
+LOGGER = getLogger("padding")
+
+PADDING_UNIT = "tokens"
+
+Padding_Unit_Literal = Literal["tokens"]
+
+
+@dataclass
+class Padding:
+    unit: Padding_Unit_Literal
+
+    useful_tokens: int
+    total_tokens: int  # all the processed tokens, including padding
+    padding_ratio: float
+
+    @staticmethod
+    def from_counts(useful_tokens: int, total_tokens: int) -> "Padding":
+        padding_ratio = 1 - useful_tokens / total_tokens if total_tokens > 0 else 0.0
+        return Padding(
+            unit=PADDING_UNIT, useful_tokens=useful_tokens, total_tokens=total_tokens, padding_ratio=padding_ratio
+        )
+
+    @staticmethod
+    def aggregate_across_processes(paddings: List["Padding"]) -> "Padding":
+        if len(paddings) == 0:
+            raise ValueError("No padding measurements to aggregate")
+        elif any(padding is None for padding in paddings):
+            raise ValueError("Some padding measurements are missing")
+
+        # token counts are process-specific so they are summed and the ratio is recomputed from them
+        return Padding.from_counts(
+            useful_tokens=sum(padding.useful_tokens for padding in paddings),
+            total_tokens=sum(padding.total_tokens for padding in paddings),
+        )
+
+    def to_plain_text(self) -> str:
+        plain_text = ""
+        plain_text += "\t\t+ useful_tokens: {useful_tokens} ({unit})\n"
+        plain_text += "\t\t+ total_tokens: {total_tokens} ({unit})\n"
+        plain_text += "\t\t+ padding_ratio: {padding_ratio:.2f}\n"
+        return plain_text.format(**asdict(self))
+
+    def log(self):
+        for line in self.to_plain_text().split("\n"):
+            if line:
+                LOGGER.info(line)
+
+    def to_markdown_text(self) -> str:
+        markdown_text = ""
+        markdown_text += "| metric        |                value |   unit |\n"
+        markdown_text += "| :------------ | -------------------: | -----: |\n"
+        markdown_text += "| useful_tokens |      {useful_tokens} | {unit} |\n"
+        markdown_text += "| total_tokens  |       {total_tokens} | {unit} |\n"
+        markdown_text += "| padding_ratio | {padding_ratio:.2f} |        |\n"
+        return markdown_text.format(**asdict(self))
+
+    def print(self):
+        CONSOLE.print(Markdown(self.to_markdown_text()))
+
+
+class PaddingTracker:
+    def __init__(self):
+        self.useful_tokens = 0
+        self.total_tokens = 0
+
+    def track(self, attention_mask: torch.Tensor):
+        self.useful_tokens += int(attention_mask.sum())
+        self.total_tokens += attention_mask.numel()
+
+    def get_padding(self) -> Padding:
+        return Padding.from_counts(useful_tokens=self.useful_tokens, total_tokens=self.total_tokens)
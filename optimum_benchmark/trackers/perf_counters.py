@@ -0,0 +1,265 @@
+import ctypes
+import os
+import platform
+import struct
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from typing import Dict, List, Literal, Optional, Tuple
+
+from rich.console import Console
+from rich.markdown import Markdown
+
+CONSOLE = Console()
+LOGGER = getLogger("perf_counters")
+
+PERF_COUNTERS_UNIT = "events"
+
+Perf_Counters_Unit_Literal = Literal["events"]
+
+PERF_EVENT_OPEN_SYSCALLS = {"x86_64": 298, "aarch64": 241, "ppc64le": 319, "s390x": 331}
+
+PERF_TYPE_HARDWARE = 0
+PERF_EVENTS = {
+    "cycles": (PERF_TYPE_HARDWARE, 0),  # PERF_COUNT_HW_CPU_CYCLES
+    "instructions": (PERF_TYPE_HARDWARE, 1),  # PERF_COUNT_HW_INSTRUCTIONS
+    "llc_misses": (PERF_TYPE_HARDWARE, 3),  # PERF_COUNT_HW_CACHE_MISSES, last level cache misses on most PMUs
+    "branch_misses": (PERF_TYPE_HARDWARE, 5),  # PERF_COUNT_HW_BRANCH_MISSES
+}
+
+PERF_EVENT_ATTR_SIZE = 112  # PERF_ATTR_SIZE_VER5
+PERF_FORMAT_TOTAL_TIMES = 1 | 2  # PERF_FORMAT_TOTAL_TIME_ENABLED | PERF_FORMAT_TOTAL_TIME_RUNNING
+# inherit (counts the threads created while counting), exclude_kernel and exclude_hv (allowed with paranoid <= 2)
+PERF_EVENT_FLAGS = (1 << 1) | (1 << 5) | (1 << 6)
+
+
+@dataclass
+class PerfCounters:
+    unit: Perf_Counters_Unit_Literal
+
+    iterations: int
+    # events per iteration, None when the event is not supported by the PMU
+    cycles: Optional[float] = None
+    instructions: Optional[float] = None
+    llc_misses: Optional[float] = None
+    branch_misses: Optional[float] = None
+    # derived ratios
+    ipc: Optional[float] = None
+    llc_mpki: Optional[float] = None
+    branch_mpki: Optional[float] = None
+
+    @staticmethod
+    def from_counts(counts: Dict[str, Optional[float]], iterations: int) -> "PerfCounters":
+        per_iteration = {
+            event: counts[event] / iterations if counts.get(event) is not None else None for event in PERF_EVENTS
+        }
+
+        return PerfCounters(
+            unit=PERF_COUNTERS_UNIT, iterations=iterations, **per_iteration, **get_ratios(per_iteration)
+        )
+
+    @staticmethod
+    def aggregate_across_processes(perf_counters: List["PerfCounters"]) -> "PerfCounters":
+        if len(perf_counters) == 0:
+            raise ValueError("No perf counters measurements to aggregate")
+        elif any(perf_counter is None for perf_counter in perf_counters):
+            raise ValueError("Some perf counters measurements are missing")
+
+        # processes run the same iterations concurrently, so their events per iteration are summed
+        per_iteration = {
+            event: sum(getattr(perf_counter, event) for perf_counter in perf_counters)
+            if getattr(perf_counters[0], event) is not None
+            else None
+            for event in PERF_EVENTS
+        }
+
+        return PerfCounters(
+            unit=perf_counters[0].unit,
+            iterations=max(perf_counter.iterations for perf_counter in perf_counters),
+            **per_iteration,
+            **get_ratios(per_iteration),
+        )
+
+    def to_plain_text(self) -> str:
+        plain_text = ""
+        plain_text += "\t\t+ iterations: {iterations}\n"
+        if self.cycles is not None:
+            plain_text += "\t\t+ cycles: {cycles:.3e} ({unit}/iteration)\n"
+        if self.instructions is not None:
+            plain_text += "\t\t+ instructions: {instructions:.3e} ({unit}/iteration)\n"
+        if self.llc_misses is not None:
+            plain_text += "\t\t+ llc_misses: {llc_misses:.3e} ({unit}/iteration)\n"
+        if self.branch_misses is not None:
+            plain_text += "\t\t+ branch_misses: {branch_misses:.3e} ({unit}/iteration)\n"
+        if self.ipc is not None:
+            plain_text += "\t\t+ ipc: {ipc:.2f} (instructions/cycle)\n"
+        if self.llc_mpki is not None:
+            plain_text += "\t\t+ llc_mpki: {llc_mpki:.2f} (misses/kilo-instruction)\n"
+        if self.branch_mpki is not None:
+            plain_text += "\t\t+ branch_mpki: {branch_mpki:.2f} (misses/kilo-instruction)\n"
+        return plain_text.format(**asdict(self))
+
+    def log(self):
+        for line in self.to_plain_text().split("\n"):
+            if line:
+                LOGGER.info(line)
+
+    def to_markdown_text(self) -> str:
+        markdown_text = ""
+        markdown_text += "| metric | value | unit |\n"
+        markdown_text += "| ------ | ----: | ---: |\n"
+        markdown_text += "| iterations    |    {iterations} | - |\n"
+        if self.cycles is not None:
+            markdown_text += "| cycles        |        {cycles:.3e} | {unit}/iteration |\n"
+        if self.instructions is not None:
+            markdown_text += "| instructions  |  {instructions:.3e} | {unit}/iteration |\n"
+        if self.llc_misses is not None:
+            markdown_text += "| llc_misses    |    {llc_misses:.3e} | {unit}/iteration |\n"
+        if self.branch_misses is not None:
+            markdown_text += "| branch_misses | {branch_misses:.3e} | {unit}/iteration |\n"
+        if self.ipc is not None:
+            markdown_text += "| ipc           |            {ipc:.2f} | instructions/cycle |\n"
+        if self.llc_mpki is not None:
+            markdown_text += "| llc_mpki      |       {llc_mpki:.2f} | misses/kilo-instruction |\n"
+        if self.branch_mpki is not None:
+            markdown_text += "| branch_mpki   |    {branch_mpki:.2f} | misses/kilo-instruction |\n"
+        return markdown_text.format(**asdict(self))
+
+    def print(self):
+        CONSOLE.print(Markdown(self.to_markdown_text()))
+
+
+def get_ratios(counts: Dict[str, Optional[float]]) -> Dict[str, Optional[float]]:
+    cycles, instructions = counts["cycles"], counts["instructions"]
+
+    ipc = instructions / cycles if cycles and instructions is not None else None
+    llc_mpki = 1e3 * counts["llc_misses"] / instructions if instructions and counts["llc_misses"] is not None else None
+    branch_mpki = (
+        1e3 * counts["branch_misses"] / instructions if instructions and counts["branch_misses"] is not None else None
+    )
+
+    return {"ipc": ipc, "llc_mpki": llc_mpki, "branch_mpki": branch_mpki}
+
+
+class PerfCountersTracker:
+    """
+    Counts hardware events (cycles, instructions, last level cache misses and branch misses) of the process with
+    `perf_event_open`, in user space only. Counters are opened on every thread of the process at the start of a
+    tracked phase and inherited by the threads created during it, and are scaled when the PMU multiplexes them.
+    Events that can't be opened (no PMU in the VM, `perf_event_paranoid` > 2, unsupported event) are skipped with a
+    warning, and the tracker measures nothing when none can be opened.
+    """
+
+    def __init__(self, device: str, backend: str):
+        self.device = device
+        self.backend = backend
+        self.monitored_pid = os.getpid()
+
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.syscall_number = PERF_EVENT_OPEN_SYSCALLS.get(platform.machine())
+        self.events = self.get_available_events()
+
+        if self.events:
+            LOGGER.info(f"\t\t+ Tracking hardware events {self.events} of process {self.monitored_pid}")
+        else:
+            LOGGER.warning("\t\t+ No hardware events can be counted, perf counters won't be reported")
+
+        self.counts: Optional[Dict[str, Optional[float]]] = None
+
+    def get_available_events(self) -> List[str]:
+        if self.syscall_number is None or not os.path.exists("/proc/sys/kernel/perf_event_paranoid"):
+            LOGGER.warning(f"\t\t+ perf_event_open is not available on {platform.system()} {platform.machine()}")
+            return []
+
+        with open("/proc/sys/kernel/perf_event_paranoid") as f:
+            paranoid = int(f.read())
+
+        if paranoid > 2:
+            LOGGER.warning(f"\t\t+ perf_event_paranoid is {paranoid}, it must be 2 or lower to count user events")
+            return []
+
+        available_events = []
+        for event in PERF_EVENTS:
+            try:
+                os.close(self.open_event(event, self.monitored_pid))
+                available_events.append(event)
+            except OSError as error:
+                LOGGER.warning(
+                    f"\t\t+ Could not open {event} counter ({error.strerror}), "
+                    "it may not be supported by the CPU or exposed to the virtual machine"
+                )
+
+        return available_events
+
+    def open_event(self, event: str, tid: int) -> int:
+        event_type, event_config = PERF_EVENTS[event]
+
+        attr = bytearray(PERF_EVENT_ATTR_SIZE)
+        struct.pack_into("IIQ", attr, 0, event_type, PERF_EVENT_ATTR_SIZE, event_config)
+        struct.pack_into("QQ", attr, 32, PERF_FORMAT_TOTAL_TIMES, PERF_EVENT_FLAGS)
+        attr_buffer = ctypes.create_string_buffer(bytes(attr), PERF_EVENT_ATTR_SIZE)
+
+        fd = self.libc.syscall(self.syscall_number, attr_buffer, tid, -1, -1, 0)
+
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        return fd
+
+    def reset(self):
+        self.counts = None
+
+    @contextmanager
+    def track(self):
+        if not self.events:
+            yield
+            return
+
+        fds: Dict[str, List[int]] = {event: [] for event in self.events}
+        for tid in os.listdir(f"/proc/{self.monitored_pid}/task"):
+            for event in self.events:
+                try:
+                    fds[event].append(self.open_event(event, int(tid)))
+                except OSError:
+                    # the thread exited in the meantime
+                    continue
+
+        start = {event: [read_counter(fd) for fd in event_fds] for event, event_fds in fds.items()}
+
+        try:
+            yield
+        finally:
+            end = {event: [read_counter(fd) for fd in event_fds] for event, event_fds in fds.items()}
+
+            for event_fds in fds.values():
+                for fd in event_fds:
+                    os.close(fd)
+
+        self.counts = dict.fromkeys(PERF_EVENTS)
+        for event in self.events:
+            self.counts[event] = sum(
+                scale_counter_delta(start_counter, end_counter)
+                for start_counter, end_counter in zip(start[event], end[event])
+            )
+
+    def get_perf_counters(self, iterations: int = 1) -> Optional[PerfCounters]:
+        if not self.events:
+            return None
+
+        assert self.counts is not None, "Perf counters tracker must be run before getting the perf counters"
+
+        return PerfCounters.from_counts(self.counts, iterations=iterations)
+
+
+def read_counter(fd: int) -> Tuple[int, int, int]:
+    """Returns the value, time enabled and time running of a counter (and of its inherited counters)."""
+
+    return struct.unpack("QQQ", os.read(fd, 24))
+
+
+def scale_counter_delta(start: Tuple[int, int, int], end: Tuple[int, int, int]) -> float:
+    value, enabled, running = (end_field - start_field for start_field, end_field in zip(start, end))
+
+    # when there are more events than hardware counters, the PMU multiplexes them and the values are extrapolated
+    return value * enabled / running if running > 0 else 0.0
@@ -0,0 +1,150 @@
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple
+
+from rich.console import Console
+from rich.markdown import Markdown
+
+CONSOLE = Console()
+LOGGER = getLogger("profile")
+
+PROFILE_UNIT = "s"
+
+Profile_Unit_Literal = Literal["s"]
+
+
+@dataclass
+class Profile:
+    unit: Profile_Unit_Literal
+
+    iterations: int
+    total: float  # the time spent in all the profiled operators, over all the iterations
+    operators: List[Dict[str, Any]]  # one row per operator type, sorted by total time
+    nodes: List[Dict[str, Any]]  # one row per graph node, sorted by total time
+
+    @staticmethod
+    def from_records(records: List[Tuple[str, str, float]], iterations: int, top_k: Optional[int] = None) -> "Profile":
+        """
+        Aggregates the (node name, operator type, seconds) records of a profiler over `iterations` runs of a model
+        into per-operator and per-node rows (count, total, mean and share of the total), keeping the `top_k` ones.
+        """
+
+        total = sum(seconds for _, _, seconds in records)
+
+        operators = aggregate_rows(
+            (({"operator": operator}, 1, seconds) for _, operator, seconds in records), total, top_k
+        )
+        nodes = aggregate_rows(
+            (({"node": node, "operator": operator}, 1, seconds) for node, operator, seconds in records), total, top_k
+        )
+
+        return Profile(unit=PROFILE_UNIT, iterations=iterations, total=total, operators=operators, nodes=nodes)
+
+    @staticmethod
+    def aggregate_across_processes(profiles: List["Profile"]) -> "Profile":
+        if len(profiles) == 0:
+            raise ValueError("No profile measurements to aggregate")
+        elif any(profile is None for profile in profiles):
+            raise ValueError("Some profile measurements are missing")
+
+        # processes run their own iterations, so rows are merged by summing their counts and totals,
+        # rows that didn't make the top-k of a process are missing from its contribution
+        total = sum(profile.total for profile in profiles)
+        top_k = max(max(len(profile.operators), len(profile.nodes)) for profile in profiles)
+
+        operators = aggregate_rows(
+            (
+                ({"operator": row["operator"]}, row["count"], row["total"])
+                for profile in profiles
+                for row in profile.operators
+            ),
+            total,
+            top_k,
+        )
+        nodes = aggregate_rows(
+            (
+                ({"node": row["node"], "operator": row["operator"]}, row["count"], row["total"])
+                for profile in profiles
+                for row in profile.nodes
+            ),
+            total,
+            top_k,
+        )
+
+        return Profile(
+            unit=PROFILE_UNIT,
+            iterations=sum(profile.iterations for profile in profiles),
+            total=total,
+            operators=operators,
+            nodes=nodes,
+        )
+
+    def to_plain_text(self) -> str:
+        plain_text = ""
+        plain_text += "\t\t+ iterations: {iterations}\n"
+        plain_text += "\t\t+ total: {total:.2e} ({unit})\n"
+        plain_text = plain_text.format(**asdict(self))
+
+        plain_text += "\t\t+ operators:\n"
+        for row in self.operators:
+            plain_text += (
+                f"\t\t\t+ {row['operator']}: {row['total']:.2e} ({self.unit}) "
+                f"{row['share']:.1%} of total, {row['count']} calls of {row['mean']:.2e} ({self.unit})\n"
+            )
+
+        plain_text += "\t\t+ nodes:\n"
+        for row in self.nodes:
+            plain_text += (
+                f"\t\t\t+ {row['node']} ({row['operator']}): {row['total']:.2e} ({self.unit}) "
+                f"{row['share']:.1%} of total, {row['count']} calls of {row['mean']:.2e} ({self.unit})\n"
+            )
+
+        return plain_text
+
+    def log(self):
+        for line in self.to_plain_text().split("\n"):
+            if line:
+                LOGGER.info(line)
+
+    def to_markdown_text(self) -> str:
+        markdown_text = ""
+        markdown_text += "| operator | count | total | mean | share | unit |\n"
+        markdown_text += "| :------- | ----: | ----: | ---: | ----: | ---: |\n"
+        for row in self.operators:
+            markdown_text += (
+                f"| {row['operator']} | {row['count']} | {row['total']:.2e} | {row['mean']:.2e} "
+                f"| {row['share']:.1%} | {self.unit} |\n"
+            )
+
+        markdown_text += "\n"
+        markdown_text += "| node | operator | count | total | mean | share | unit |\n"
+        markdown_text += "| :--- | :------- | ----: | ----: | ---: | ----: | ---: |\n"
+        for row in self.nodes:
+            markdown_text += (
+                f"| {row['node']} | {row['operator']} | {row['count']} | {row['total']:.2e} | {row['mean']:.2e} "
+                f"| {row['share']:.1%} | {self.unit} |\n"
+            )
+
+        return markdown_text
+
+    def print(self):
+        CONSOLE.print(Markdown(self.to_markdown_text()))
+
+
+def aggregate_rows(
+    entries: Iterable[Tuple[Dict[str, str], int, float]], total: float, top_k: Optional[int]
+) -> List[Dict[str, Any]]:
+    rows: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    for keys, count, seconds in entries:
+        row = rows.setdefault(tuple(keys.values()), {**keys, "count": 0, "total": 0.0})
+        row["count"] += count
+        row["total"] += seconds
+
+    sorted_rows = sorted(rows.values(), key=lambda row: row["total"], reverse=True)[:top_k]
+
+    for row in sorted_rows:
+        row["mean"] = row["total"] / row["count"]
+        row["share"] = row["total"] / total if total > 0 else 0.0
+
+    return sorted_rows
@@ -0,0 +1,250 @@
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from typing import List, Optional, Union
+
+import torch
+from rich.console import Console
+from rich.markdown import Markdown
+
+from .latency import LATENCY_UNIT, Latency
+
+CONSOLE = Console()
+LOGGER = getLogger("speculation")
+
+
+@dataclass
+class Speculation:
+    draft_tokens: int
+    accepted_tokens: int
+    generated_tokens: int
+    target_forwards: int
+
+    acceptance_rate: float
+    tokens_per_target_forward: float
+
+    @staticmethod
+    def from_counts(draft_tokens: int, generated_tokens: int, target_forwards: int) -> "Speculation":
+        # every target forward verifies the drafted tokens and generates one token of its own,
+        # so the tokens that were generated on top of those were all accepted draft tokens
+        accepted_tokens = max(generated_tokens - target_forwards, 0)
+        acceptance_rate = accepted_tokens / draft_tokens if draft_tokens > 0 else 0.0
+        tokens_per_target_forward = generated_tokens / target_forwards if target_forwards > 0 else 0.0
+
+        return Speculation(
+            draft_tokens=draft_tokens,
+            accepted_tokens=accepted_tokens,
+            generated_tokens=generated_tokens,
+            target_forwards=target_forwards,
+            acceptance_rate=acceptance_rate,
+            tokens_per_target_forward=tokens_per_target_forward,
+        )
+
+    @staticmethod
+    def aggregate_across_processes(speculations: List["Speculation"]) -> "Speculation":
+        if len(speculations) == 0:
+            raise ValueError("No speculation measurements to aggregate")
+        elif any(speculation is None for speculation in speculations):
+            raise ValueError("Some speculation measurements are missing")
+
+        # counts are process-specific so they are summed and the rates are recomputed from them
+        return Speculation.from_counts(
+            draft_tokens=sum(speculation.draft_tokens for speculation in speculations),
+            generated_tokens=sum(speculation.generated_tokens for speculation in speculations),
+            target_forwards=sum(speculation.target_forwards for speculation in speculations),
+        )
+
+    def to_plain_text(self) -> str:
+        plain_text = ""
+        plain_text += "\t\t+ draft_tokens: {draft_tokens}\n"
+        plain_text += "\t\t+ accepted_tokens: {accepted_tokens}\n"
+        plain_text += "\t\t+ generated_tokens: {generated_tokens}\n"
+        plain_text += "\t\t+ target_forwards: {target_forwards}\n"
+        plain_text += "\t\t+ acceptance_rate: {acceptance_rate:.2f}\n"
+        plain_text += "\t\t+ tokens_per_target_forward: {tokens_per_target_forward:.2f}\n"
+        return plain_text.format(**asdict(self))
+
+    def log(self):
+        for line in self.to_plain_text().split("\n"):
+            if line:
+                LOGGER.info(line)
+
+    def to_markdown_text(self) -> str:
+        markdown_text = ""
+        markdown_text += "| metric                     |                           value |\n"
+        markdown_text += "| -------------------------- | ------------------------------: |\n"
+        markdown_text += "| draft_tokens               |                  {draft_tokens} |\n"
+        markdown_text += "| accepted_tokens            |               {accepted_tokens} |\n"
+        markdown_text += "| generated_tokens           |              {generated_tokens} |\n"
+        markdown_text += "| target_forwards            |               {target_forwards} |\n"
+        markdown_text += "| acceptance_rate            |          {acceptance_rate:.2f} |\n"
+        markdown_text += "| tokens_per_target_forward  | {tokens_per_target_forward:.2f} |\n"
+        return markdown_text.format(**asdict(self))
+
+    def print(self):
+        CONSOLE.print(Markdown(self.to_markdown_text()))
+
+
+class SpeculativeDecodingSessionTracker:
+    """
+    Tracks assisted/speculative generation by hooking into the forward passes of the target and draft models.
+    Every forward pass of the draft model is a draft step (proposing one token), and every forward pass of
+    the target model is a verify step (scoring all the drafted tokens at once and generating one more).
+    The first forward pass of each model in a generation also prefills the prompt, so it is counted as a step
+    but left out of the step latencies, which would otherwise be skewed by it.
+    """
+
+    def __init__(self, device: str, backend: str):
+        self.device = device
+        self.backend = backend
+
+        self.is_pytorch_cuda = (self.backend, self.device) == ("pytorch", "cuda")
+
+        if self.is_pytorch_cuda:
+            LOGGER.info("\t\t+ Tracking draft/verify steps using Pytorch CUDA events")
+        else:
+            LOGGER.info("\t\t+ Tracking draft/verify steps using CPU performance counter")
+
+        self.generate_start_events: List[Union[float, torch.cuda.Event]] = []
+        self.generate_end_events: List[Union[float, torch.cuda.Event]] = []
+        self.draft_start_events: List[Union[float, torch.cuda.Event]] = []
+        self.draft_end_events: List[Union[float, torch.cuda.Event]] = []
+        self.verify_start_events: List[Union[float, torch.cuda.Event]] = []
+        self.verify_end_events: List[Union[float, torch.cuda.Event]] = []
+        # indices of the prefilling forward passes of each model, the first one of each tracked generation
+        self.draft_prefill_indices: List[int] = []
+        self.verify_prefill_indices: List[int] = []
+
+        self.is_tracking = False
+        self.start_time: Optional[float] = None
+
+    @contextmanager
+    def session(self, target_model: torch.nn.Module, draft_model: torch.nn.Module):
+        assert self.start_time is None
+
+        self.generate_start_events = []
+        self.generate_end_events = []
+        self.draft_start_events = []
+        self.draft_end_events = []
+        self.verify_start_events = []
+        self.verify_end_events = []
+        self.draft_prefill_indices = []
+        self.verify_prefill_indices = []
+
+        # hooks only live as long as the session, so they don't add any overhead to the other measurements
+        hooks = [
+            draft_model.register_forward_pre_hook(self.get_hook(self.draft_start_events)),
+            draft_model.register_forward_hook(self.get_hook(self.draft_end_events)),
+            target_model.register_forward_pre_hook(self.get_hook(self.verify_start_events)),
+            target_model.register_forward_hook(self.get_hook(self.verify_end_events)),
+        ]
+
+        self.start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.start_time = None
+            for hook in hooks:
+                hook.remove()
+
+    def get_hook(self, events: List[Union[float, torch.cuda.Event]]):
+        def hook(*args, **kwargs):
+            if not self.is_tracking:
+                return
+
+            if self.is_pytorch_cuda:
+                event = torch.cuda.Event(enable_timing=True)
+                event.record()
+            else:
+                event = time.perf_counter()
+
+            events.append(event)
+
+        return hook
+
+    def count(self) -> int:
+        assert self.start_time is not None, "This method can only be called inside of a '.session()' context"
+        assert len(self.generate_start_events) == len(self.generate_end_events)
+
+        return len(self.generate_start_events)
+
+    def elapsed(self):
+        assert self.start_time is not None, "This method can only be called inside of a '.session()' context"
+
+        return time.perf_counter() - self.start_time
+
+    @contextmanager
+    def track(self):
+        draft_prefill_index, verify_prefill_index = len(self.draft_start_events), len(self.verify_start_events)
+
+        if self.is_pytorch_cuda:
+            start_event = torch.cuda.Event(enable_timing=True)
+            end_event = torch.cuda.Event(enable_timing=True)
+
+            start_event.record()
+            self.is_tracking = True
+            yield
+            self.is_tracking = False
+            end_event.record()
+        else:
+            start_event = time.perf_counter()
+            self.is_tracking = True
+            yield
+            self.is_tracking = False
+            end_event = time.perf_counter()
+
+        self.generate_start_events.append(start_event)
+        self.generate_end_events.append(end_event)
+
+        if len(self.draft_start_events) > draft_prefill_index:
+            self.draft_prefill_indices.append(draft_prefill_index)
+        if len(self.verify_start_events) > verify_prefill_index:
+            self.verify_prefill_indices.append(verify_prefill_index)
+
+    def get_latency(
+        self,
+        start_events: List[Union[float, torch.cuda.Event]],
+        end_events: List[Union[float, torch.cuda.Event]],
+        excluded_indices: Optional[List[int]] = None,
+    ) -> Latency:
+        assert len(start_events) == len(end_events) > 0
+
+        if excluded_indices:
+            excluded_indices = set(excluded_indices)
+            start_events = [event for index, event in enumerate(start_events) if index not in excluded_indices]
+            end_events = [event for index, event in enumerate(end_events) if index not in excluded_indices]
+
+        if self.is_pytorch_cuda:
+            torch.cuda.synchronize()
+
+            latencies = [
+                start_event.elapsed_time(end_event) / 1e3 for start_event, end_event in zip(start_events, end_events)
+            ]
+        else:
+            latencies = [(end_event - start_event) for start_event, end_event in zip(start_events, end_events)]
+
+        assert all(latency >= 0 for latency in latencies), (
+            "Found some negative latencies while performing substraction. "
+            "Please increase the dimensions of your benchmark or the number of warmup runs."
+        )
+
+        return Latency.from_values(latencies, unit=LATENCY_UNIT)
+
+    def get_generate_latency(self) -> Latency:
+        return self.get_latency(self.generate_start_events, self.generate_end_events)
+
+    def get_draft_step_latency(self) -> Latency:
+        return self.get_latency(self.draft_start_events, self.draft_end_events, self.draft_prefill_indices)
+
+    def get_verify_step_latency(self) -> Latency:
+        return self.get_latency(self.verify_start_events, self.verify_end_events, self.verify_prefill_indices)
+
+    def get_speculation(self, new_tokens: int) -> Speculation:
+        assert len(self.generate_start_events) == len(self.generate_end_events) > 0
+
+        return Speculation.from_counts(
+            draft_tokens=len(self.draft_end_events),
+            generated_tokens=new_tokens * len(self.generate_end_events),
+            target_forwards=len(self.verify_end_events),
+        )
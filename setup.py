@@ -73,7 +73,8 @@ EXTRAS_REQUIRE = {
     # other backends
     "llama-cpp": ["llama-cpp-python"],
     "llm-swarm": ["llm-swarm"],
-    "py-txi": ["py-txi"],
+    "py-txi": ["py-txi", "aiohttp"],
+    "openai": ["aiohttp"],
     "vllm": ["vllm"],
     # optional dependencies
     "torchao": ["torchao"],
@@ -94,7 +95,12 @@ setup(
     packages=find_packages(),
     install_requires=INSTALL_REQUIRES,
     extras_require=EXTRAS_REQUIRE,
-    entry_points={"console_scripts": ["optimum-benchmark=optimum_benchmark.cli:main"]},
+    entry_points={
+        "console_scripts": [
+            "optimum-benchmark=optimum_benchmark.cli:main",
+            "optimum-benchmark-compare=optimum_benchmark.benchmark.compare:main",
+        ]
+    },
     description="Optimum-Benchmark is a unified multi-backend utility for benchmarking "
     "Transformers, Timm, Diffusers and Sentence-Transformers with full support of "
     "Optimum's hardware optimizations & quantization schemes.",
@@ -1,17 +1,67 @@
+import asyncio
+import base64
 import gc
+import hashlib
+import json
 import os
+import signal
+import sys
+import threading
 import time
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from importlib import reload
 from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from urllib.parse import unquote
 
+import numpy as np
 import pandas as pd
 import pytest
 import torch
+from datasets import Dataset, load_from_disk
+from transformers import AutoConfig, AutoTokenizer
 
-from optimum_benchmark import Benchmark, BenchmarkConfig, InferenceConfig, ProcessConfig, PyTorchConfig, TrainingConfig
+from optimum_benchmark import (
+    Benchmark,
+    BenchmarkConfig,
+    BenchmarkReport,
+    BenchmarkStore,
+    EnergyStarConfig,
+    HubOutbox,
+    InferenceConfig,
+    LongContextConfig,
+    OpenAIConfig,
+    ProcessConfig,
+    PyTorchConfig,
+    TrainingConfig,
+)
+from optimum_benchmark.backends.openai.server import OpenAIStandInServer
+from optimum_benchmark.backends.streaming_utils import stream_batch
+from optimum_benchmark.benchmark.compare import compare_benchmarks
 from optimum_benchmark.import_utils import get_git_revision_hash
+from optimum_benchmark.preprocessors.dataset_preprocessor import (
+    sort_dataset_by_length,
+    text2text_generation_preprocessing,
+    text_classification_preprocessing,
+)
+from optimum_benchmark.profilers.fx_profiler import FXProfilingWrapper
+from optimum_benchmark.scenarios.energy_star.prefetcher import BatchPrefetcher
+from optimum_benchmark.scenarios.energy_star.scenario import trim_padding
 from optimum_benchmark.system_utils import is_nvidia_system, is_rocm_system
-from optimum_benchmark.trackers import LatencySessionTracker, MemoryTracker
+from optimum_benchmark.trackers import (
+    AllocationSessionTracker,
+    CPUUsageTracker,
+    Latency,
+    LatencySessionTracker,
+    MemoryTracker,
+    Padding,
+    PaddingTracker,
+    PerfCountersTracker,
+    PerRequestLatencySessionTracker,
+    PerTokenLatencySessionTrackerLogitsProcessor,
+    SpeculativeDecodingSessionTracker,
+)
 
 PUSH_REPO_ID = os.environ.get("PUSH_REPO_ID", "optimum-benchmark/local")
 
@@ -149,6 +199,12 @@ def test_api_push_to_hub_mixin():
             from_json_artifact = artifact.__class__.from_json(f"{tempdir}/{artifact_name}.json")
             assert from_json_artifact.to_dict() == artifact.to_dict()
 
+            # dict/json api with raw samples sidecar
+            artifact.save_json(f"{tempdir}/{artifact_name}.json", sidecar=True)
+            assert os.path.exists(f"{tempdir}/{artifact_name}.raw_samples.parquet")
+            from_sidecar_artifact = artifact.__class__.from_json(f"{tempdir}/{artifact_name}.json")
+            assert from_sidecar_artifact.to_dict() == artifact.to_dict()
+
             # dataframe/csv api
             artifact.save_csv(f"{tempdir}/{artifact_name}.csv")
             assert os.path.exists(f"{tempdir}/{artifact_name}.csv")
@@ -161,6 +217,192 @@ def test_api_push_to_hub_mixin():
         assert from_hub_artifact.to_dict() == artifact.to_dict()
 
 
+@pytest.mark.parametrize(
+    "task,model",
+    [
+        ("text-generation", "hf-internal-testing/tiny-random-LlamaForCausalLM"),
+        ("feature-extraction", "hf-internal-testing/tiny-random-BertModel"),
+    ],
+)
+def test_api_openai_backend(task, model):
+    with OpenAIStandInServer(model=model, first_token_latency=0.02, per_token_latency=0.005) as server:
+        backend_config = OpenAIConfig(model=model, task=task, device="cpu", base_url=server.url)
+        scenario_config = InferenceConfig(
+            duration=1,
+            iterations=1,
+            warmup_runs=1,
+            latency=True,
+            input_shapes=INPUT_SHAPES,
+            generate_kwargs={"max_new_tokens": 4, "min_new_tokens": 4},
+        )
+        benchmark_config = BenchmarkConfig(
+            name=f"test_api_openai_backend_{task}",
+            scenario=scenario_config,
+            launcher=ProcessConfig(device_isolation=False),
+            backend=backend_config,
+        )
+        benchmark_report = Benchmark.launch(benchmark_config)
+
+    if task == "text-generation":
+        # the time to first token and the inter-token latencies, of the batch's concurrent streams
+        assert 0.02 < benchmark_report.prefill.latency.mean < 0.04
+        assert 0.005 < benchmark_report.per_token.latency.mean < 0.01
+        assert benchmark_report.per_token.latency.count == 3 * benchmark_report.decode.latency.count
+        # each input of the batch is a request
+        assert (
+            benchmark_report.per_request.latency.count
+            == INPUT_SHAPES["batch_size"] * benchmark_report.decode.latency.count
+        )
+        assert 0.02 < benchmark_report.time_to_first_token.latency.mean < 0.04
+        assert 0.035 < benchmark_report.per_request.latency.mean < 0.06
+    else:
+        assert 0.02 < benchmark_report.forward.latency.mean < 0.04
+
+
+def test_api_openai_backend_served_in_waves():
+    model = "hf-internal-testing/tiny-random-LlamaForCausalLM"
+
+    with OpenAIStandInServer(model=model, first_token_latency=0.02, per_token_latency=0.005) as server:
+        # the requests of a batch are sent one at a time
+        backend_config = OpenAIConfig(
+            model=model, task="text-generation", device="cpu", base_url=server.url, max_concurrent_requests=1
+        )
+        scenario_config = InferenceConfig(
+            duration=1,
+            iterations=1,
+            warmup_runs=1,
+            latency=True,
+            input_shapes=INPUT_SHAPES,
+            generate_kwargs={"max_new_tokens": 4, "min_new_tokens": 4},
+        )
+        benchmark_config = BenchmarkConfig(
+            name="test_api_openai_backend_served_in_waves",
+            scenario=scenario_config,
+            launcher=ProcessConfig(device_isolation=False),
+            backend=backend_config,
+        )
+        benchmark_report = Benchmark.launch(benchmark_config)
+
+    # the latencies are the per-request ones, not those of the batch (which would include the queued requests)
+    assert benchmark_report.prefill.latency.count == benchmark_report.per_request.latency.count
+    assert 0.02 < benchmark_report.prefill.latency.mean < 0.04
+    assert 0.005 < benchmark_report.per_token.latency.mean < 0.01
+    assert 0.015 < benchmark_report.decode.latency.mean < 0.03
+    # the generated tokens of a batch over its duration, which is the sum of its requests
+    batch_tokens = INPUT_SHAPES["batch_size"] * 4
+    batch_duration = INPUT_SHAPES["batch_size"] * benchmark_report.per_request.latency.mean
+    decode_throughput = benchmark_report.decode.throughput.value
+    assert 0.8 * batch_tokens / batch_duration < decode_throughput < batch_tokens / batch_duration
+
+
+class FakeAsyncInferenceClient:
+    """Streams tokens and embeddings with a fixed latency, keeping track of the requests in flight."""
+
+    def __init__(self, latency: float = 0.01):
+        self.latency = latency
+        self.in_flight_requests = 0
+        self.max_in_flight_requests = 0
+
+    async def request(self):
+        self.in_flight_requests += 1
+        self.max_in_flight_requests = max(self.max_in_flight_requests, self.in_flight_requests)
+        await asyncio.sleep(self.latency)
+
+    async def feature_extraction(self, text, **kwargs):
+        await self.request()
+        self.in_flight_requests -= 1
+        return np.zeros(4)
+
+    async def text_generation(self, prompt, stream, do_sample, max_new_tokens):
+        async def stream_tokens():
+            await self.request()
+            for _ in range(max_new_tokens):
+                await asyncio.sleep(self.latency)
+                yield " token"
+            self.in_flight_requests -= 1
+
+        return stream_tokens()
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.parametrize("max_in_flight_requests", [None, 1])
+def test_api_py_txi_client(max_in_flight_requests):
+    pytest.importorskip("py_txi")
+    from optimum_benchmark.backends.py_txi.backend import PyTXIBackend
+
+    # only the client side of the backend is tested, without a server (or a model) behind it
+    backend = PyTXIBackend.__new__(PyTXIBackend)
+    backend.config = SimpleNamespace(max_in_flight_requests=max_in_flight_requests)
+    backend.client = FakeAsyncInferenceClient()
+    backend.loop = asyncio.new_event_loop()
+
+    embeddings = backend.forward({"text": ["a", "b", "c"]}, {})
+    assert len(embeddings) == 3
+    assert backend.client.max_in_flight_requests == (max_in_flight_requests or 3)
+
+    steps = []
+    request_latency_tracker = PerRequestLatencySessionTracker(device="cpu", backend="py-txi")
+    kwargs = {
+        "max_new_tokens": 4,
+        "logits_processor": lambda *args: steps.append(args),
+        "request_latency_tracker": request_latency_tracker,
+    }
+
+    backend.client = FakeAsyncInferenceClient()
+    with request_latency_tracker.session():
+        generations = backend.generate({"prompt": ["a", "b"]}, kwargs)
+
+    assert generations == [" token" * 4] * 2
+    assert backend.client.max_in_flight_requests == (max_in_flight_requests or 2)
+    assert request_latency_tracker.count() == 2
+    assert request_latency_tracker.get_num_tokens() == 8
+    assert request_latency_tracker.get_per_token_latency().mean >= 0.01
+    # the logits processor is called once per step of the batch, unless it's served in waves
+    assert len(steps) == (0 if max_in_flight_requests == 1 else 4)
+
+    # the scenario sweeps concurrency levels by overriding the limit of the config in the generate kwargs
+    backend.client = FakeAsyncInferenceClient()
+    backend.generate({"prompt": ["a", "b", "c"]}, {**kwargs, "max_in_flight_requests": 2})
+    assert backend.client.max_in_flight_requests == 2
+
+
+@pytest.mark.parametrize("max_in_flight_requests", [None, 1])
+def test_api_stream_batch(max_in_flight_requests):
+    in_flight_requests, max_in_flight = [], []
+
+    async def stream_prompt(prompt):
+        in_flight_requests.append(prompt)
+        max_in_flight.append(len(in_flight_requests))
+        for token in range(4):
+            await asyncio.sleep(0.01)
+            yield f"{prompt}{token}"
+        in_flight_requests.remove(prompt)
+
+    steps = []
+    request_latency_tracker = PerRequestLatencySessionTracker(device="cpu", backend="openai")
+    with request_latency_tracker.session():
+        generations = asyncio.run(
+            stream_batch(
+                ["a", "b", "c"],
+                stream_prompt,
+                max_in_flight_requests=max_in_flight_requests,
+                logits_processor=lambda *args: steps.append(args),
+                request_latency_tracker=request_latency_tracker,
+            )
+        )
+
+    assert generations == [[f"{prompt}{token}" for token in range(4)] for prompt in ["a", "b", "c"]]
+    assert max(max_in_flight) == (max_in_flight_requests or 3)
+    assert request_latency_tracker.count() == 3
+    assert request_latency_tracker.get_num_tokens() == 12
+    # the time spent waiting for the semaphore is not part of the requests
+    assert request_latency_tracker.get_request_latency().mean < 0.08
+    # the logits processor is called once per step of the batch, unless it's served in waves
+    assert len(steps) == (0 if max_in_flight_requests == 1 else 4)
+
+
 @pytest.mark.parametrize("device", ["cpu", "cuda"])
 @pytest.mark.parametrize("backend", ["pytorch", "other"])
 def test_api_latency_tracker(device, backend):
@@ -191,6 +433,40 @@ def test_api_latency_tracker(device, backend):
     assert len(latency.values) == 2
 
 
+@pytest.mark.parametrize("device", ["cpu", "cuda"])
+@pytest.mark.parametrize("backend", ["pytorch", "other"])
+def test_api_per_token_latency_tracker(device, backend):
+    # a small buffer makes the tracker grow it during the session
+    tracker = PerTokenLatencySessionTrackerLogitsProcessor(device=device, backend=backend, buffer_size=8)
+    scores = torch.zeros((1, 8), device=device)
+
+    # calls outside of tracked generations are ignored
+    tracker(None, scores)
+
+    with tracker.session():
+        while tracker.count() < 3:
+            with tracker.track():
+                time.sleep(0.05)  # prefill
+                for _ in range(5):
+                    tracker(None, scores)
+                    time.sleep(0.01)  # token
+
+    prefill_latency = tracker.get_prefill_latency()
+    decode_latency = tracker.get_decode_latency()
+    per_token_latency = tracker.get_per_token_latency()
+    per_token_latency.log()
+
+    assert prefill_latency.count == decode_latency.count == 3
+    assert per_token_latency.count == 3 * 4
+    assert 0.05 < prefill_latency.mean < 0.07
+    assert 0.05 < decode_latency.mean < 0.07
+    assert 0.01 < per_token_latency.mean < 0.02
+
+    # the tracker is deep copied with the scenario config when the benchmark is serialized
+    copied_tracker = deepcopy(tracker)
+    assert copied_tracker.get_per_token_latency().values == per_token_latency.values
+
+
 @pytest.mark.parametrize("device", ["cpu", "cuda"])
 @pytest.mark.parametrize("backend", ["pytorch", "other"])
 def test_api_memory_tracker(device, backend):
@@ -245,5 +521,627 @@ def test_api_memory_tracker(device, backend):
     gc.collect()
 
 
+def test_api_cpu_usage_tracker():
+    tracker = CPUUsageTracker(device="cpu", backend="pytorch")
+
+    with tracker.track():
+        start = time.perf_counter()
+        while time.perf_counter() - start < 1:
+            pass
+
+    busy_cpu_usage = tracker.get_cpu_usage()
+    busy_cpu_usage.log()
+
+    with tracker.track():
+        for _ in range(100):
+            time.sleep(0.01)
+
+    idle_cpu_usage = tracker.get_cpu_usage()
+    idle_cpu_usage.log()
+
+    assert busy_cpu_usage.process_utilization > 50
+    assert idle_cpu_usage.process_utilization < 20
+    assert idle_cpu_usage.voluntary_context_switches >= 100
+    assert idle_cpu_usage.num_threads >= 1
+    assert set(idle_cpu_usage.cores_utilization) == {str(core) for core in os.sched_getaffinity(0)}
+
+
+def test_api_perf_counters_tracker():
+    # hardware counters are often not exposed (virtual machines, containers, perf_event_paranoid > 2)
+    tracker = PerfCountersTracker(device="cpu", backend="pytorch")
+
+    with tracker.track():
+        for _ in range(10):
+            torch.randn((256, 256)) @ torch.randn((256, 256))
+
+    perf_counters = tracker.get_perf_counters(iterations=10)
+
+    if not tracker.events:
+        assert perf_counters is None
+    else:
+        perf_counters.log()
+        assert perf_counters.iterations == 10
+        for event in tracker.events:
+            assert getattr(perf_counters, event) >= 0
+        if perf_counters.ipc is not None:
+            assert perf_counters.ipc > 0
+
+
+def test_api_allocation_tracker():
+    tracker = AllocationSessionTracker(device="cpu", backend="pytorch", trace_allocations=True)
+
+    garbage = []
+    with tracker.session():
+        while tracker.count() < 100:
+            with tracker.track():
+                # reference cycles are only freed by the garbage collector
+                for _ in range(1000):
+                    cycle = []
+                    cycle.append(cycle)
+                garbage.append([0] * 1000)
+
+    allocation = tracker.get_allocation()
+    allocation.log()
+
+    assert allocation.iterations == 100
+    assert sum(allocation.collections) > 0
+    assert allocation.collected > 0
+    assert allocation.gc_pause_total > 0
+    assert allocation.iterations_with_gc > 0
+    assert allocation.traced_memory_per_iteration > 0.008  # a list of 1000 pointers is retained per iteration
+    assert tracker.gc_callback not in gc.callbacks
+
+
+def test_api_per_token_allocation_tracker():
+    tracker = PerTokenLatencySessionTrackerLogitsProcessor(device="cpu", backend="pytorch", track_gc=True)
+    scores = torch.zeros((1, 8))
+
+    # collections outside of tracked generations are not attributed to any token
+    gc.collect()
+
+    with tracker.session():
+        while tracker.count() < 2:
+            with tracker.track():
+                tracker(None, scores)
+                for token in range(100):
+                    if token == 50:
+                        # a slow collection of many reference cycles, in the 51st token interval
+                        for _ in range(100000):
+                            cycle = []
+                            cycle.append(cycle)
+                        gc.collect()
+                    tracker(None, scores)
+
+    allocation = tracker.get_per_token_allocation()
+    allocation.log()
+
+    assert tracker.gc_callback not in gc.callbacks
+    assert allocation.iterations == 2 * 100
+    assert allocation.collections[2] >= 2
+    assert allocation.collected >= 2 * (100000 - 1)  # the last cycle is still referenced
+    assert allocation.iterations_with_gc >= 2
+    assert allocation.allocated_blocks_per_iteration is None
+    # the slowest token intervals are the ones of the explicit collections, mostly spent in them
+    assert allocation.slowest_iterations_gc_share > 0.5
+
+
+@pytest.mark.parametrize("device", ["cpu", "cuda"])
+@pytest.mark.parametrize("backend", ["pytorch", "other"])
+def test_api_speculative_decoding_tracker(device, backend):
+    tracker = SpeculativeDecodingSessionTracker(device=device, backend=backend)
+    target_model, draft_model = torch.nn.Linear(8, 8).to(device), torch.nn.Linear(8, 8).to(device)
+    inputs = torch.randn((1, 8), device=device)
+
+    with tracker.session(target_model=target_model, draft_model=draft_model):
+        # forward passes outside of a tracked generation are not counted
+        target_model(inputs)
+
+        while tracker.count() < 2:
+            with tracker.track():
+                # two rounds of drafting and verifying that generate 4 tokens in total
+                for _ in range(2):
+                    draft_model(inputs)
+                    draft_model(inputs)
+                    target_model(inputs)
+
+    speculation = tracker.get_speculation(new_tokens=4)
+    speculation.log()
+
+    assert speculation.draft_tokens == 8
+    assert speculation.target_forwards == 4
+    assert speculation.generated_tokens == 8
+    assert speculation.accepted_tokens == 4
+    assert speculation.acceptance_rate == 0.5
+    assert speculation.tokens_per_target_forward == 2.0
+
+    # the first (prefilling) forward pass of each model in a generation is left out of the step latencies
+    assert len(tracker.get_draft_step_latency().values) == 6
+    assert len(tracker.get_verify_step_latency().values) == 2
+    assert len(tracker.get_generate_latency().values) == 2
+
+    # hooks are removed at the end of the session
+    assert len(target_model._forward_pre_hooks) == len(target_model._forward_hooks) == 0
+    assert len(draft_model._forward_pre_hooks) == len(draft_model._forward_hooks) == 0
+
+
+def test_api_stack_sampling_profiler():
+    from optimum_benchmark.profilers.stack_profiler import StackSamplingProfiler
+
+    def busy_loop(duration):
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            pass
+
+    with TemporaryDirectory() as tmpdir:
+        profiler = StackSamplingProfiler(name="busy", output_dir=tmpdir, interval=0.001)
+
+        with profiler.profile():
+            busy_loop(0.2)
+
+        with open(os.path.join(tmpdir, "busy.collapsed")) as f:
+            lines = f.read().splitlines()
+
+    stacks = {line.rsplit(" ", 1)[0]: int(line.rsplit(" ", 1)[1]) for line in lines}
+    # stacks are rooted at the thread name and end with the interrupted frame
+    assert all(stack.startswith("MainThread;") for stack in stacks if "test_api_stack_sampling_profiler" in stack)
+    assert sum(count for stack, count in stacks.items() if stack.split(";")[-1].startswith("busy_loop ")) > 50
+
+    # the timer expirations coalesced into one signal are counted with the elapsed intervals
+    profiler.samples.clear()
+    profiler.last_sample_time = time.perf_counter() - 0.01
+    profiler.sample(signal.SIGALRM, sys._getframe())
+    assert len(profiler.samples) == len(threading.enumerate())
+    assert set(profiler.samples.values()) <= {10, 11}
+
+
+def test_api_processor_intra_op_parallelism():
+    from optimum_benchmark.scenarios.processor.scenario import disable_intra_op_parallelism
+
+    tokenizers_parallelism = os.environ.get("TOKENIZERS_PARALLELISM", None)
+    torch_num_threads = torch.get_num_threads()
+
+    with disable_intra_op_parallelism():
+        # fast tokenizers read the variable at every call, so their rayon pool is not used anymore
+        assert os.environ["TOKENIZERS_PARALLELISM"] == "false"
+        assert torch.get_num_threads() == 1
+
+    assert os.environ.get("TOKENIZERS_PARALLELISM", None) == tokenizers_parallelism
+    assert torch.get_num_threads() == torch_num_threads
+
+
+class FakeLongContextBackend:
+    """Generates without a model, running out of memory above a given sequence length."""
+
+    def __init__(self, max_position_embeddings: int, max_fitting_length: int):
+        self.config = SimpleNamespace(
+            name="fake", task="text-generation", device="cpu", device_ids=None, model_type="gpt2"
+        )
+        self.model_shapes = {"vocab_size": 64, "max_position_embeddings": max_position_embeddings}
+        self.max_fitting_length = max_fitting_length
+
+    def load(self):
+        pass
+
+    def prepare_inputs(self, inputs):
+        return inputs
+
+    def generate(self, inputs, kwargs):
+        sequence_length = inputs["input_ids"].shape[1]
+        if sequence_length > self.max_fitting_length:
+            raise RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB")
+        # a prefill latency growing with the sequence length and a decode latency growing with the new tokens
+        time.sleep(sequence_length * 1e-5 + kwargs["max_new_tokens"] * 1e-3)
+        return inputs["input_ids"]
+
+    def prefill(self, inputs, kwargs):
+        return self.generate(inputs, kwargs)
+
+
+@pytest.mark.parametrize(
+    "max_position_embeddings,max_fitting_length,expected_sequence_lengths",
+    [
+        # stops when a sequence length runs out of memory
+        (4096, 1024, [128, 256, 512, 1024]),
+        # stops when a sequence length and the generated tokens exceed the maximum position embeddings
+        (512, 4096, [128, 256]),
+    ],
+)
+def test_api_long_context_ramp(max_position_embeddings, max_fitting_length, expected_sequence_lengths):
+    from optimum_benchmark.scenarios.long_context.scenario import LongContextScenario
+
+    backend = FakeLongContextBackend(max_position_embeddings, max_fitting_length)
+
+    with TemporaryDirectory() as tmpdir:
+        scenario_config = LongContextConfig(
+            memory=False,
+            iterations=1,
+            warmup_runs=0,
+            min_sequence_length=128,
+            max_sequence_length=4096,
+            scaling_fit_dir=tmpdir,
+            generate_kwargs={"max_new_tokens": 4},
+        )
+        scenario = LongContextScenario(scenario_config)
+        report = scenario.run(backend)
+
+        # the latency session interrupted by the out of memory error was closed
+        assert scenario.latency_tracker.start_time is None
+
+        targets = list(report.to_dict())
+        assert targets == ["load_model"] + [
+            f"{target}_{length}" for length in expected_sequence_lengths for target in ["prefill", "decode"]
+        ]
+
+        with open(os.path.join(tmpdir, "long_context_scaling.json")) as f:
+            scaling = json.load(f)
+
+        assert scaling["sequence_lengths"] == expected_sequence_lengths
+        assert scaling["max_sequence_length"] == expected_sequence_lengths[-1]
+
+
+def test_api_long_context_scaling_fit():
+    from optimum_benchmark.scenarios.long_context.scenario import fit_scaling_curve
+
+    sequence_lengths = [512, 1024, 2048, 4096]
+
+    linear_fit = fit_scaling_curve(sequence_lengths, [1e-4 * length + 0.01 for length in sequence_lengths])
+    assert linear_fit["best_fit"] == "linear"
+    assert linear_fit["linear_r2"] == pytest.approx(1.0)
+    assert linear_fit["linear_coefficients"] == pytest.approx([1e-4, 0.01])
+
+    quadratic_fit = fit_scaling_curve(sequence_lengths, [1e-7 * length**2 + 0.01 for length in sequence_lengths])
+    assert quadratic_fit["best_fit"] == "quadratic"
+    assert quadratic_fit["quadratic_r2"] == pytest.approx(1.0)
+    assert quadratic_fit["quadratic_share"] > 0.9
+
+    assert fit_scaling_curve(sequence_lengths[:2], [0.1, 0.2]) == {"best_fit": "insufficient_data"}
+
+
+def test_api_long_context_out_of_memory_errors():
+    from optimum_benchmark.scenarios.long_context.scenario import is_out_of_memory_error
+
+    assert is_out_of_memory_error(MemoryError())
+    assert is_out_of_memory_error(RuntimeError("CUDA out of memory. Tried to allocate 2.00 GiB"))
+    assert is_out_of_memory_error(
+        RuntimeError("[enforce fail at alloc_cpu.cpp:83] DefaultCPUAllocator: can't allocate memory")
+    )
+    assert not is_out_of_memory_error(RuntimeError("shape mismatch"))
+    assert not is_out_of_memory_error(ValueError("sequence length 4096 exceeds the maximum"))
+
+
+@pytest.mark.parametrize("num_prefetch_batches", [0, 2])
+def test_api_batch_prefetcher(num_prefetch_batches):
+    def prepare_inputs(batch):
+        time.sleep(0.01)
+        return {"input_ids": batch["input_ids"] * 2}
+
+    batches = [{"input_ids": index} for index in range(5)]
+    prefetcher = BatchPrefetcher(batches, prepare_inputs, num_prefetch_batches=num_prefetch_batches)
+
+    # batches are yielded prepared and in the dataset order
+    assert [inputs["input_ids"] for inputs in prefetcher] == [0, 2, 4, 6, 8]
+    assert prefetcher.get_data_latency().count == prefetcher.get_compute_latency().count == 5
+    assert 0.0 <= prefetcher.data_bound_ratio <= 1.0
+
+    def failing_prepare_inputs(batch):
+        if batch["input_ids"] == 2:
+            raise RuntimeError("Failed to prepare batch 2")
+        return batch
+
+    # errors raised while preparing a batch are raised when it's consumed
+    consumed = []
+    with pytest.raises(RuntimeError, match="Failed to prepare batch 2"):
+        for inputs in BatchPrefetcher(batches, failing_prepare_inputs, num_prefetch_batches=num_prefetch_batches):
+            consumed.append(inputs["input_ids"])
+    assert consumed == [0, 1]
+
+    # breaking out of the loop stops the background thread
+    prefetcher = BatchPrefetcher(batches, prepare_inputs, num_prefetch_batches=num_prefetch_batches)
+    for _ in prefetcher:
+        break
+    assert not any(thread.name.startswith("batch-prefetcher") for thread in threading.enumerate())
+
+
+def test_api_padding_tracker():
+    padding_tracker = PaddingTracker()
+    padding_tracker.track(torch.tensor([[1, 1, 1, 1], [0, 0, 1, 1]]))
+    padding_tracker.track(torch.tensor([[1, 1], [1, 1]]))
+
+    padding = padding_tracker.get_padding()
+    assert padding.useful_tokens == 10
+    assert padding.total_tokens == 12
+    assert padding.padding_ratio == pytest.approx(1 / 6)
+
+    # counts are summed across processes and the ratio is recomputed from them
+    aggregated = Padding.aggregate_across_processes([padding, Padding.from_counts(useful_tokens=2, total_tokens=8)])
+    assert aggregated.total_tokens == 20
+    assert aggregated.padding_ratio == pytest.approx(1 - 12 / 20)
+    assert Padding.from_counts(useful_tokens=0, total_tokens=0).padding_ratio == 0.0
+
+
+def test_api_trim_padding():
+    batch = {
+        "input_ids": torch.tensor([[0, 5, 6, 0], [0, 7, 0, 0]]),
+        "attention_mask": torch.tensor([[0, 1, 1, 0], [0, 1, 0, 0]]),
+        "labels": torch.tensor([1, 0]),
+    }
+    trimmed = trim_padding(batch)
+
+    # only the positions that are padding for every sample are dropped, whatever the padding side
+    assert trimmed["input_ids"].tolist() == [[5, 6], [7, 0]]
+    assert trimmed["attention_mask"].tolist() == [[1, 1], [1, 0]]
+    assert trimmed["labels"].tolist() == [1, 0]
+
+
+def test_api_sort_dataset_by_length():
+    dataset = Dataset.from_dict(
+        {"input_ids": [[1, 0, 0], [1, 1, 1], [1, 1, 0]], "attention_mask": [[1, 0, 0], [1, 1, 1], [1, 1, 0]]}
+    )
+    sorted_dataset = sort_dataset_by_length(dataset)
+
+    assert sorted_dataset.column_names == ["input_ids", "attention_mask"]
+    assert [sum(mask) for mask in sorted_dataset["attention_mask"]] == [3, 2, 1]
+
+    with pytest.raises(ValueError, match="attention_mask"):
+        sort_dataset_by_length(dataset.remove_columns("attention_mask"))
+
+    with pytest.raises(ValueError, match="streamed"):
+        sort_dataset_by_length(dataset.to_iterable_dataset())
+
+
+def test_api_fx_profiling_wrapper():
+    class Model(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.linear = torch.nn.Linear(4, 2)
+
+        def forward(self, x):
+            return self.linear(x).relu()
+
+    model = Model()
+    profiling_wrapper = FXProfilingWrapper(torch.fx.symbolic_trace(model))
+    inputs = torch.randn(2, 4)
+
+    # inputs named after the forward arguments, or not (as the generated ones), are both mapped to them
+    assert torch.equal(profiling_wrapper(x=inputs), model(inputs))
+    assert torch.equal(profiling_wrapper(pixel_values=inputs), model(inputs))
+    assert [record[1] for record in profiling_wrapper.get_profiling_records()] == ["Linear", "relu"] * 2
+
+    with pytest.raises(ValueError, match="can't be mapped"):
+        profiling_wrapper(pixel_values=inputs, attention_mask=inputs)
+
+
+def test_api_dataset_preprocessing_cache():
+    model = "hf-internal-testing/tiny-random-BertModel"
+    pretrained_processor = AutoTokenizer.from_pretrained(model)
+    pretrained_config = AutoConfig.from_pretrained(model)
+
+    with TemporaryDirectory() as tempdir:
+        # only datasets backed by files are cached
+        Dataset.from_dict({"text": ["a short text", "a somewhat longer text", "text"]}).save_to_disk(tempdir)
+        dataset = load_from_disk(tempdir)
+
+        def preprocess(pretrained_config=pretrained_config, **kwargs):
+            scenario_config = EnergyStarConfig(input_shapes={"batch_size": 2}, **kwargs)
+            return text_classification_preprocessing(dataset, pretrained_processor, scenario_config, pretrained_config)
+
+        cache_file = preprocess().cache_files[0]["filename"]
+
+        # options that don't change the preprocessing (or the processor being reloaded) hit the cache
+        pretrained_processor = AutoTokenizer.from_pretrained(model)
+        assert preprocess(warmup_runs=2, energy=False).cache_files[0]["filename"] == cache_file
+
+        # preprocessing options, or the model config values they depend on, miss it
+        assert preprocess(truncation=False).cache_files[0]["filename"] != cache_file
+        assert preprocess(preprocessing_batch_size=1).cache_files[0]["filename"] != cache_file
+        pretrained_config = AutoConfig.from_pretrained(model, max_position_embeddings=4)
+        assert preprocess(pretrained_config).cache_files[0]["filename"] != cache_file
+
+
+def test_api_streamed_dataset_preprocessing():
+    model = "hf-internal-testing/tiny-random-BertModel"
+    pretrained_processor = AutoTokenizer.from_pretrained(model)
+    pretrained_config = AutoConfig.from_pretrained(model)
+
+    dataset = Dataset.from_dict(
+        {"question": ["a question", "another question", "a third one"], "context": ["a context", "context", "none"]}
+    ).to_iterable_dataset()
+    scenario_config = EnergyStarConfig(
+        streaming=True,
+        num_samples=2,
+        t5_task="question_answering",
+        dataset_prefix1="question: ",
+        dataset_prefix2=" context: ",
+        generate_kwargs={"max_new_tokens": 2},
+        input_shapes={"batch_size": 2},
+    )
+    dataset = text2text_generation_preprocessing(dataset, pretrained_processor, scenario_config, pretrained_config)
+    samples = list(dataset)
+
+    # the text columns (including the prefixed one) are replaced by the tokenized ones
+    assert len(samples) == 2
+    assert all(sorted(sample) == ["attention_mask", "input_ids"] for sample in samples)
+
+
+def test_api_benchmark_store():
+    with TemporaryDirectory() as tempdir:
+        store = BenchmarkStore(f"{tempdir}/benchmarks.db")
+
+        for model, mean in [("model-a", 0.1), ("model-b", 0.2), ("model-a", 0.3)]:
+            report = BenchmarkReport.from_list(["forward"])
+            report.forward.latency = Latency.from_values([mean] * 4, unit="s")
+            config = {
+                "name": "test_api_benchmark_store",
+                "backend": {"name": "pytorch", "model": model, "device": "cpu", "task": "fill-mask"},
+                "scenario": {"name": "inference"},
+                "launcher": {"name": "process"},
+                "environment": {"optimum_benchmark_commit": "abc"},
+            }
+            store.append(Benchmark(config=config, report=report))
+
+        df = store.query(model="model-a", backend="pytorch", commit="abc")
+        assert len(df) == 2
+        assert sorted(df["forward.latency.mean"].round(6).tolist()) == [0.1, 0.3]
+        # raw per-sample values are not stored, only summary statistics
+        assert "forward.latency.values" not in df.columns
+
+        df = store.query(metrics=["forward.latency.p50"], limit=1)
+        assert len(df) == 1
+        assert list(df.columns[-1:]) == ["forward.latency.p50"]
+        assert store.get_config(int(df.index[0]))["backend.model"] == "model-a"
+
+
+def test_api_compare_benchmarks():
+    config = {
+        "name": "test_api_compare_benchmarks",
+        "backend": {"name": "pytorch", "model": "model-a", "device": "cpu", "task": "fill-mask"},
+        "scenario": {"name": "inference"},
+        "launcher": {"name": "process"},
+    }
+
+    def get_benchmark(latencies, commit):
+        report = BenchmarkReport.from_list(["forward"])
+        report.forward.latency = Latency.from_values(latencies, unit="s")
+        return Benchmark(config={**config, "environment": {"optimum_benchmark_commit": commit}}, report=report)
+
+    rng = np.random.default_rng(0)
+    baseline = get_benchmark(list(0.1 + rng.normal(0, 0.001, 100)), commit="abc")
+    same = get_benchmark(list(0.1 + rng.normal(0, 0.001, 100)), commit="def")
+    slower = get_benchmark(list(0.12 + rng.normal(0, 0.001, 100)), commit="def")
+
+    for test in ["mann-whitney", "bootstrap"]:
+        # runs of different commits are matched by config hash
+        df = compare_benchmarks([baseline], [same], test=test)
+        assert df["metric"].tolist() == ["latency.p50"]
+        assert not df["regression"].any()
+
+        df = compare_benchmarks([baseline], [slower], test=test)
+        assert df["regression"].all()
+        assert df["p_value"].max() < 0.01
+
+
+class FakeHubHandler(BaseHTTPRequestHandler):
+    """
+    A minimal stand-in for the hub endpoints used by `HubOutbox`, rate limiting every other commit,
+    and for the file downloads of `from_pretrained`, serving the committed files.
+    """
+
+    commits = []
+    commit_attempts = 0
+    files = {}
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+
+        if self.path == "/api/repos/create":
+            self.respond(200, {"url": f"http://{self.headers['Host']}/datasets/user/repo"})
+        elif "/preupload/" in self.path:
+            files = json.loads(body)["files"]
+            self.respond(
+                200,
+                {"files": [{"path": file["path"], "uploadMode": "regular", "shouldIgnore": False} for file in files]},
+            )
+        elif "/commit/" in self.path:
+            FakeHubHandler.commit_attempts += 1
+            if FakeHubHandler.commit_attempts % 2 == 1:
+                self.respond(429, {"error": "Too Many Requests"}, headers={"Retry-After": "0"})
+            else:
+                lines = [json.loads(line) for line in body.splitlines() if line]
+                FakeHubHandler.commits.append([line["value"]["path"] for line in lines if line["key"] == "file"])
+                for line in lines:
+                    if line["key"] == "file":
+                        FakeHubHandler.files[line["value"]["path"]] = base64.b64decode(line["value"]["content"])
+                # the commit url is parsed against the default endpoint by huggingface_hub
+                self.respond(
+                    200, {"commitUrl": "https://huggingface.co/datasets/user/repo/commit/abc", "commitOid": "abc"}
+                )
+        else:
+            self.respond(404, {"error": "Not Found"})
+
+    def do_HEAD(self):
+        self.serve_file(with_content=False)
+
+    def do_GET(self):
+        self.serve_file(with_content=True)
+
+    def serve_file(self, with_content):
+        path = unquote(self.path.split("/resolve/main/", 1)[-1])
+
+        if "/resolve/main/" not in self.path or path not in FakeHubHandler.files:
+            self.respond(404, {"error": "Not Found"})
+            return
+
+        content = FakeHubHandler.files[path]
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("ETag", f'"{hashlib.sha1(content).hexdigest()}"')
+        self.send_header("X-Repo-Commit", "abc")
+        self.end_headers()
+        if with_content:
+            self.wfile.write(content)
+
+    def respond(self, status, data, headers=None):
+        content = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_api_hub_outbox():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeHubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        with TemporaryDirectory() as tempdir:
+            outbox = HubOutbox(
+                "user/repo",
+                f"{tempdir}/outbox",
+                token="token",
+                endpoint=endpoint,
+                max_files_per_commit=4,
+                initial_backoff=0,
+            )
+
+            for i in range(3):
+                report = BenchmarkReport.from_list(["forward"])
+                report.forward.latency = Latency.from_values([0.1] * 4, unit="s")
+                # the json and its sidecar are never split across commits
+                outbox.add(report, subfolder=f"benchmark_{i}", sidecar=True)
+
+            assert len(outbox.get_pending_files()) == 6
+
+            # a pending artifact is never overwritten
+            with pytest.raises(FileExistsError, match="benchmark_0"):
+                outbox.add(report, subfolder="benchmark_0")
+            assert len(outbox.get_pending_files()) == 6
+
+            commits = outbox.push()
+            assert len(commits) == 2
+            assert [len(files) for files in FakeHubHandler.commits] == [4, 2]
+            assert FakeHubHandler.commits[0][:2] == [
+                "benchmark_0/benchmark_report.json",
+                "benchmark_0/benchmark_report.raw_samples.parquet",
+            ]
+            # every commit was rate limited once before going through
+            assert FakeHubHandler.commit_attempts == 4
+            assert outbox.get_pending_files() == []
+
+            # the raw samples sidecar is downloaded along with the json
+            from_hub_report = BenchmarkReport.from_pretrained(
+                "user/repo", subfolder="benchmark_0", endpoint=endpoint, token="token", cache_dir=f"{tempdir}/cache"
+            )
+            assert from_hub_report.to_dict() == report.to_dict()
+    finally:
+        server.shutdown()
+
+
 def test_git_revision_hash_detection():
     assert get_git_revision_hash("optimum_benchmark") is not None